@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+import os
+import gzip
+import json
+import threading
+
+from storage import encode_task
+from task_record import Task
+from search_index import SearchIndex
+from sorted_views import SortedView, SORT_KEYS, id_view
+
+# Completed tasks older than this many days leave the hot task list
+ARCHIVE_AFTER_DAYS = 30
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".ndjson.gz"
+
+
+class TaskArchive:
+    """Completed tasks moved out of the task list, kept in compressed segments.
+
+    Every archiving run writes one new gzipped NDJSON segment to the
+    ``<tasks file>.archive`` directory and segments are never rewritten.
+    Tasks taken back out of the archive, because they were reopened or
+    deleted, are listed in an append-only ``removed`` file together with
+    the newest segment at that time, so archiving them again later works.
+    Nothing is read from disk until a caller asks for archived tasks, after
+    that they stay in memory with their own search index and sorted views.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.removed_path = os.path.join(path, "removed")
+        self.tasks = None  # task id -> Task once opened
+        self.search_index = None
+        self.sorted_views = {}
+        self._lock = threading.Lock()
+        self._stamp = None  # files as of the last read or write, see refresh()
+
+    def segments(self):
+        """Segment files, oldest first"""
+        if not os.path.isdir(self.path):
+            return []
+        names = sorted(name for name in os.listdir(self.path)
+                       if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX))
+        return [os.path.join(self.path, name) for name in names]
+
+    def append(self, tasks):
+        """Write tasks as a new segment, fsynced before this returns"""
+        tasks = list(tasks)
+        if not tasks:
+            return 0
+        os.makedirs(self.path, exist_ok=True)
+        number = self._last_segment() + 1
+        filename = os.path.join(self.path, f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}")
+        tmp_name = f"{filename}.tmp"
+        with open(tmp_name, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                for task in tasks:
+                    f.write((json.dumps(task, default=encode_task, ensure_ascii=False) + "\n")
+                            .encode('utf-8'))
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_name, filename)
+        with self._lock:
+            if self.tasks is not None:
+                for task in tasks:
+                    self._add(Task(task))
+                self._stamp = self._files_stamp()
+        return len(tasks)
+
+    def open(self):
+        """Read every segment into memory, once"""
+        with self._lock:
+            if self.tasks is not None:
+                return self.tasks
+            self._stamp = self._files_stamp()
+            tasks = {}
+            for task in self._read_segments():
+                tasks[task["id"]] = task
+            self.tasks = tasks
+            return tasks
+
+    def iter_tasks(self, skip=()):
+        """Yield the archived tasks whose id isn't in skip, reading one segment at a time.
+
+        Unlike open() this keeps nothing in memory, an export streams the
+        archive without holding it all at once.
+        """
+        tasks = self.tasks
+        if tasks is not None:
+            for task in list(tasks.values()):
+                if task["id"] not in skip:
+                    yield task
+            return
+        for task in self._read_segments():
+            if task["id"] not in skip:
+                yield task
+
+    def _read_segments(self):
+        """Yield the tasks still archived, segment by segment, oldest first"""
+        removed = {}  # task id -> last segment it was removed from
+        if os.path.exists(self.removed_path):
+            with open(self.removed_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        task_id, number = map(int, line.split())
+                        removed[task_id] = max(number, removed.get(task_id, 0))
+        for segment in self.segments():
+            number = self._segment_number(segment)
+            with gzip.open(segment, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    task = Task(json.loads(line))
+                    if removed.get(task["id"], 0) < number:
+                        yield task
+
+    def refresh(self):
+        """Forget the tasks read so far if another process has changed the archive since"""
+        with self._lock:
+            if self.tasks is not None and self._files_stamp() != self._stamp:
+                self.tasks = None
+                self.search_index = None
+                self.sorted_views = {}
+
+    @property
+    def is_open(self):
+        return self.tasks is not None
+
+    def get(self, task_id):
+        """Archived task, or None, without opening the archive"""
+        tasks = self.tasks
+        return tasks.get(task_id) if tasks is not None else None
+
+    def contains(self, task_id):
+        """Whether task_id is archived, opening the archive if needed"""
+        return task_id in self.open()
+
+    def remove(self, task_id):
+        """Take a task out of the archive and return it, or None"""
+        self.open()
+        with self._lock:
+            task = self.tasks.pop(task_id, None)
+            if task is None:
+                return None
+            with open(self.removed_path, 'a', encoding='utf-8') as f:
+                f.write(f"{task_id} {self._last_segment()}\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._stamp = self._files_stamp()
+            if self.search_index is not None:
+                self.search_index.remove(task_id)
+            for view in self.sorted_views.values():
+                view.remove(task_id)
+        return task
+
+    def search(self, text):
+        """Ids of archived tasks matching text, title hits first"""
+        tasks = self.open()
+        with self._lock:
+            if self.search_index is None:
+                self.search_index = SearchIndex()
+                self.search_index.rebuild(tasks.values())
+        return self.search_index.search(text, tasks.get)
+
+    def sorted_view(self, sort_by):
+        """SortedView of the archived tasks for one of SORT_KEYS, or in id order for None"""
+        tasks = self.open()
+        with self._lock:
+            view = self.sorted_views.get(sort_by)
+            if view is None:
+                if sort_by is None:
+                    view = id_view(tasks)
+                else:
+                    view = SortedView(SORT_KEYS[sort_by])
+                    view.rebuild(tasks.values())
+                self.sorted_views[sort_by] = view
+        return view
+
+    def last_run(self):
+        """Date of the last archiving run as YYYY-MM-DD, or None"""
+        try:
+            with open(os.path.join(self.path, "last_run"), 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def set_last_run(self, day):
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, "last_run"), 'w', encoding='utf-8') as f:
+            f.write(day)
+
+    def _last_segment(self):
+        segments = self.segments()
+        return self._segment_number(segments[-1]) if segments else 0
+
+    def _files_stamp(self):
+        removed = os.path.getsize(self.removed_path) if os.path.exists(self.removed_path) else 0
+        return self._last_segment(), removed
+
+    @staticmethod
+    def _segment_number(path):
+        return int(os.path.basename(path)[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+
+    def _add(self, task):
+        self.tasks[task["id"]] = task
+        if self.search_index is not None:
+            self.search_index.add(task)
+        for view in self.sorted_views.values():
+            view.add(task)
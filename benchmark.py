@@ -0,0 +1,803 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+import subprocess
+import importlib.util
+import time
+import asyncio
+import tracemalloc
+from datetime import datetime, timedelta
+
+from todo import TodoList
+from storage import (JsonStorage, JournalStorage, WriteBehindStorage, write_snapshot, read_snapshot,
+                     snapshot_body_offset)
+from sorted_views import SORT_KEYS
+from task_record import Task
+from binary_snapshot import BinaryStorage, TaskTable, write_binary_snapshot
+from archive import ARCHIVE_AFTER_DAYS
+from blob_store import BLOB_THRESHOLD
+from sqlite_store import SqliteTodoList
+from paging import PAGE_SIZE
+from task_query import compile_query
+import bulk_io
+from task_columns import np
+from reminders import DueScheduler
+
+
+def make_tasks(count, description_lines=1):
+    """Generate sample tasks shaped like the ones in tasks.json"""
+    categories = ["Personal", "Work", "Shopping", "Health", "Other"]
+    priorities = ["Low", "Medium", "High"]
+    tasks = []
+    for i in range(1, count + 1):
+        completed = i % 3 == 0
+        tasks.append({
+            "id": i,
+            "title": f"Task {i} {random.choice(['report', 'groceries', 'cluster', 'review'])}",
+            "description": "\n".join(f"Step {n} of task {i}" for n in range(description_lines)),
+            "due_date": f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+            "priority": priorities[i % 3],
+            "category": categories[i % 5],
+            "completed": completed,
+            "created_at": "2025-05-06 13:36:07",
+            "completed_at": "2025-05-07 09:00:00" if completed else None
+        })
+    return tasks
+
+
+def write_tasks_file(directory, count, **kwargs):
+    """Write a tasks.json with count tasks and return its path"""
+    filename = os.path.join(directory, "tasks.json")
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(make_tasks(count, **kwargs), f)
+    return filename
+
+
+def timed(func, repeat):
+    """Return the average time of func() in microseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def bench_ids(sizes, max_ops=2000):
+    """Per-operation cost of id lookup, update, delete and add"""
+    print(f"{'tasks':>8} {'get us':>8} {'update us':>10} {'delete us':>10} {'add us':>8}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            todo_list = TodoList(write_tasks_file(directory, size), archive_after_days=None)
+            ops = min(max_ops, size)
+            ids = random.sample(range(1, size + 1), ops)
+            it = iter(ids)
+            get_us = timed(lambda: todo_list.get_task(next(it)), ops)
+            it = iter(ids)
+            update_us = timed(lambda: todo_list.update_task(next(it), {"completed": True}), ops)
+            it = iter(ids)
+            delete_us = timed(lambda: todo_list.delete_task(next(it)), ops)
+            add_us = timed(lambda: todo_list.add_task({"title": "new", "description": "",
+                                                        "completed": False}), ops)
+            todo_list.close()
+        print(f"{size:>8} {get_us:>8.2f} {update_us:>10.2f} {delete_us:>10.2f} {add_us:>8.2f}")
+
+
+def bench_search(sizes, queries=("cluster", "task 42", "ste", "of task 9", "xyz")):
+    """Index build time and per-query latency of the search index"""
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            todo_list = TodoList(write_tasks_file(directory, size, description_lines=8),
+                                 archive_after_days=None)
+            load_s = time.perf_counter() - start
+            print(f"{size} tasks, loaded and indexed in {load_s:.2f}s")
+            for query in queries:
+                results = len(todo_list.search(query))
+                query_us = timed(lambda: todo_list.search(query), 20)
+                print(f"  {query!r:>14}: {results:>7} hits {query_us / 1000:>9.3f} ms")
+            todo_list.close()
+
+
+def bench_sort(sizes, visible_rows=50):
+    """Switching sort order: full sort of the task list vs the maintained sorted views"""
+    print(f"{'tasks':>8} {'sorted() ms':>12} {'view ms':>9} {'update us':>10}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            todo_list = TodoList(write_tasks_file(directory, size), archive_after_days=None)
+            tasks = todo_list.get_tasks()
+            sort_ms = sum(timed(lambda: sorted(tasks, key=key), 3)
+                          for key in SORT_KEYS.values()) / len(SORT_KEYS) / 1000
+            view_ms = sum(timed(lambda: todo_list.get_sorted_ids(name, 0, visible_rows), 100)
+                          for name in SORT_KEYS) / len(SORT_KEYS) / 1000
+            ids = iter(random.sample(range(1, size + 1), min(size, 1000)))
+            update_us = timed(lambda: todo_list.update_task(
+                next(ids), {"title": "Renamed", "priority": "High"}), min(size, 1000))
+            todo_list.close()
+        print(f"{size:>8} {sort_ms:>12.2f} {view_ms:>9.4f} {update_us:>10.2f}")
+
+
+def bench_writes(sizes, duration=2.0, clicks_per_second=50):
+    """Rapid checkbox toggling: time spent in update_task and number of file writes"""
+    print(f"{'tasks':>8} {'engine':>18} {'update ms':>10} {'writes':>7} {'flush ms':>9}")
+    for size in sizes:
+        for engine in (JsonStorage, WriteBehindStorage):
+            with tempfile.TemporaryDirectory() as directory:
+                filename = write_tasks_file(directory, size)
+                todo_list = TodoList(filename, storage=engine(filename), archive_after_days=None)
+                clicks = int(duration * clicks_per_second)
+                busy = 0.0
+                for click in range(clicks):
+                    task_id = click % size + 1
+                    start = time.perf_counter()
+                    todo_list.update_task(task_id, {"completed": click % 2 == 0})
+                    busy += time.perf_counter() - start
+                    time.sleep(1 / clicks_per_second)
+                start = time.perf_counter()
+                todo_list.flush()
+                flush_ms = (time.perf_counter() - start) * 1000
+                writes = getattr(todo_list.storage, "write_count", clicks)
+                todo_list.close()
+            print(f"{size:>8} {engine.__name__:>18} {busy / clicks * 1000:>10.3f} "
+                  f"{writes:>7} {flush_ms:>9.2f}")
+
+
+def bench_bulk(sizes, batch_size=1000):
+    """Streaming import and export throughput per file format, in tasks/sec"""
+    print(f"{'tasks':>8} {'format':>7} {'import/s':>10} {'export/s':>10}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "source.json")
+            with open(source, 'w', encoding='utf-8') as f:
+                bulk_io.write_tasks(f, make_tasks(size), "json")
+            for fmt in bulk_io.FORMATS:
+                # Convert the source first so every import reads its own format
+                path = os.path.join(directory, f"input.{fmt}")
+                with bulk_io.open_input(source) as f, bulk_io.open_output(path) as out:
+                    bulk_io.write_tasks(out, bulk_io.read_records(f, "json"), fmt)
+
+                filename = os.path.join(directory, f"{fmt}.tasks.json")
+                todo_list = TodoList(filename, archive_after_days=None)
+                start = time.perf_counter()
+                with bulk_io.open_input(path) as f:
+                    imported, _ = bulk_io.import_tasks(todo_list, bulk_io.read_records(f, fmt),
+                                                       batch_size)
+                todo_list.flush()
+                import_s = time.perf_counter() - start
+
+                start = time.perf_counter()
+                with open(os.devnull, 'w', encoding='utf-8') as out:
+                    exported = bulk_io.write_tasks(out, todo_list.iter_tasks(), fmt)
+                export_s = time.perf_counter() - start
+                todo_list.close()
+                print(f"{size:>8} {fmt:>7} {imported / import_s:>10,.0f} "
+                      f"{exported / export_s:>10,.0f}")
+
+
+def bulk_edit(todo_list, target):
+    """Complete everything in Work, re-prioritize one month and drop Shopping"""
+    for task in todo_list.get_tasks():
+        if task["category"] == "Work":
+            target.update_task(task["id"], {"completed": True})
+        elif task["due_date"].startswith("2025-06"):
+            target.update_task(task["id"], {"priority": "High"})
+        elif task["category"] == "Shopping":
+            target.delete_task(task["id"])
+
+
+def bench_batch(sizes):
+    """Bulk edits one update_task call at a time vs one TodoList.batch()"""
+    print(f"{'tasks':>8} {'engine':>18} {'per-call ms':>12} {'batch ms':>9} {'speedup':>8} "
+          f"{'notifications':>14}")
+    for size in sizes:
+        for engine in (JsonStorage, JournalStorage, WriteBehindStorage):
+            results = []
+            for batched in (False, True):
+                with tempfile.TemporaryDirectory() as directory:
+                    filename = write_tasks_file(directory, size)
+                    todo_list = TodoList(filename, storage=engine(filename),
+                                         archive_after_days=None)
+                    notifications = []
+                    todo_list.add_listener(notifications.append)
+                    start = time.perf_counter()
+                    if batched:
+                        with todo_list.batch() as batch:
+                            bulk_edit(todo_list, batch)
+                    else:
+                        bulk_edit(todo_list, todo_list)
+                    todo_list.flush()
+                    results.append((time.perf_counter() - start, len(notifications)))
+                    todo_list.close()
+            (call_s, call_notified), (batch_s, batch_notified) = results
+            print(f"{size:>8} {engine.__name__:>18} {call_s * 1000:>12.1f} {batch_s * 1000:>9.1f} "
+                  f"{call_s / batch_s:>7.1f}x {call_notified:>7}/{batch_notified}")
+
+
+def bench_snapshot(sizes):
+    """Checksummed snapshot write, checksum validation and full load"""
+    print(f"{'tasks':>8} {'MB':>7} {'write ms':>9} {'verify ms':>10} {'load ms':>8}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "tasks.json")
+            tasks = make_tasks(size, description_lines=4)
+            write_ms = timed(lambda: write_snapshot(filename, tasks), 3) / 1000
+            verify_ms = timed(lambda: snapshot_body_offset(filename), 10) / 1000
+            load_ms = timed(lambda: read_snapshot(filename), 3) / 1000
+            megabytes = os.path.getsize(filename) / 1e6
+        print(f"{size:>8} {megabytes:>7.1f} {write_ms:>9.1f} {verify_ms:>10.2f} {load_ms:>8.1f}")
+
+
+def bench_analytics(sizes, today="2025-06-15"):
+    """Dashboard counts: loops over the task records vs the columnar NumPy mirror"""
+    if np is None:
+        print("numpy is not installed, the columnar mirror is not available")
+        return
+    print(f"{'tasks':>8} {'build ms':>9} {'loop ms':>9} {'columns ms':>11} {'update us':>10}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            todo_list = TodoList(write_tasks_file(directory, size), archive_after_days=None)
+            tasks = todo_list.get_tasks()
+
+            def loop_counts():
+                overdue = [task for task in tasks if not task["completed"] and
+                           (task.get("due_date") or today) < today]
+                by_category = {}
+                for task in overdue:
+                    by_category[task["category"]] = by_category.get(task["category"], 0) + 1
+                per_day = {}
+                for task in tasks:
+                    if task["completed"] and task.get("completed_at"):
+                        day = task["completed_at"][:10]
+                        per_day[day] = per_day.get(day, 0) + 1
+                return by_category, per_day
+
+            def column_counts():
+                overdue = columns.overdue_mask(today)
+                return columns.count_by_category(overdue), columns.completed_per_day()
+
+            start = time.perf_counter()
+            columns = todo_list.get_columns()
+            build_ms = (time.perf_counter() - start) * 1000
+            assert loop_counts() == column_counts()
+            loop_ms = timed(loop_counts, 3) / 1000
+            columns_ms = timed(column_counts, 20) / 1000
+            ids = iter(random.sample(range(1, size + 1), min(size, 1000)))
+            update_us = timed(lambda: todo_list.update_task(next(ids), {"completed": True}),
+                              min(size, 1000))
+            todo_list.close()
+        print(f"{size:>8} {build_ms:>9.1f} {loop_ms:>9.2f} {columns_ms:>11.3f} {update_us:>10.2f}")
+
+
+def traced_bytes(build):
+    """Bytes still allocated by build() once it returns, and its result"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return allocated, result
+
+
+def bench_memory(sizes):
+    """Bytes per task held as dicts parsed from JSON vs compact Task records"""
+    print(f"{'tasks':>8} {'dict B/task':>12} {'Task B/task':>12} {'saved':>6}")
+    for size in sizes:
+        data = json.dumps(make_tasks(size))
+        dict_bytes, tasks = traced_bytes(lambda: json.loads(data))
+        del tasks
+        task_bytes, tasks = traced_bytes(lambda: [Task(task) for task in json.loads(data)])
+        del tasks
+        print(f"{size:>8} {dict_bytes / size:>12.0f} {task_bytes / size:>12.0f} "
+              f"{1 - task_bytes / dict_bytes:>6.0%}")
+
+
+def bench_lazy(sizes, description_lines=(1, 50, 200)):
+    """Startup time and memory vs description length, inline text vs the blob file"""
+    print(f"{'tasks':>8} {'desc chars':>11} {'inline ms':>10} {'inline B/task':>14} "
+          f"{'blobs ms':>9} {'blobs B/task':>13}")
+    for size in sizes:
+        for lines in description_lines:
+            tasks = make_tasks(size, description_lines=lines)
+            results = []
+            for threshold in (None, BLOB_THRESHOLD):
+                with tempfile.TemporaryDirectory() as directory:
+                    filename = os.path.join(directory, "tasks.json")
+                    storage = JournalStorage(filename, blob_threshold=threshold)
+                    storage.save(tasks)
+                    storage.close()
+
+                    def open_list():
+                        return TodoList(filename, JournalStorage(filename, blob_threshold=threshold),
+                                        archive_after_days=None)
+
+                    start = time.perf_counter()
+                    open_list().close()
+                    load_ms = (time.perf_counter() - start) * 1000
+                    allocated, todo_list = traced_bytes(open_list)
+                    todo_list.close()
+                    results.append((load_ms, allocated / size))
+            (inline_ms, inline_bytes), (blobs_ms, blob_bytes) = results
+            chars = len(tasks[0]["description"])
+            print(f"{size:>8} {chars:>11} {inline_ms:>10.1f} {inline_bytes:>14.0f} "
+                  f"{blobs_ms:>9.1f} {blob_bytes:>13.0f}")
+
+
+def directory_size(path):
+    """Total size of the files under path in bytes"""
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def bench_archive(sizes, completed_share=0.95, query="cluster"):
+    """Open, save and search cost with all history in tasks.json vs old tasks archived"""
+    print(f"{'tasks':>8} {'mode':>9} {'hot':>8} {'open ms':>9} {'save ms':>9} {'search ms':>10} "
+          f"{'disk MB':>8} {'archive open ms':>16}")
+    for size in sizes:
+        tasks = make_tasks(size)
+        for i, task in enumerate(tasks):
+            task["completed"] = i % 100 < completed_share * 100
+            task["completed_at"] = "2025-05-07 09:00:00" if task["completed"] else None
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "tasks.json")
+            write_snapshot(filename, tasks, backups=0)
+            for mode, days in (("inline", None), ("archived", ARCHIVE_AFTER_DAYS)):
+                if days is not None:
+                    # The first open moves the history out, measure the steady state after it
+                    TodoList(filename, archive_after_days=days).close()
+                start = time.perf_counter()
+                todo_list = TodoList(filename, archive_after_days=days)
+                open_ms = (time.perf_counter() - start) * 1000
+                save_ms = timed(todo_list.save_tasks, 3) / 1000
+                # The first search builds the index, which is the part that grows with history
+                start = time.perf_counter()
+                todo_list.search(query)
+                search_ms = (time.perf_counter() - start) * 1000
+                start = time.perf_counter()
+                todo_list.get_completed_tasks(include_archived=True)
+                archive_ms = (time.perf_counter() - start) * 1000
+                hot = len(todo_list.tasks_by_id)
+                todo_list.close()
+                megabytes = directory_size(directory) / 1e6
+                print(f"{size:>8} {mode:>9} {hot:>8} {open_ms:>9.1f} {save_ms:>9.1f} "
+                      f"{search_ms:>10.1f} {megabytes:>8.1f} {archive_ms:>16.1f}")
+
+
+def write_task_files(directory, count):
+    """Write the same tasks as tasks.json and tasks.bin in directory"""
+    tasks = [Task(task) for task in make_tasks(count)]
+    write_snapshot(os.path.join(directory, "tasks.json"), tasks, backups=0)
+    write_binary_snapshot(os.path.join(directory, "tasks.bin"), tasks, backups=0)
+
+
+def bench_startup(sizes, visible_rows=50):
+    """Opening a task list, its first sorted page and a full save, JSON vs binary snapshot"""
+    print(f"{'tasks':>8} {'format':>7} {'open ms':>9} {'first page ms':>14} {'get_task us':>12} "
+          f"{'save ms':>8} {'decoded':>8}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            write_task_files(directory, size)
+            for fmt in ("json", "bin"):
+                filename = os.path.join(directory, f"tasks.{fmt}")
+                start = time.perf_counter()
+                todo_list = TodoList(filename, BinaryStorage(filename) if fmt == "bin" else None,
+                                     archive_after_days=None)
+                open_ms = (time.perf_counter() - start) * 1000
+                ids = random.sample(range(1, size + 1), min(size, 1000))
+                get_us = timed(lambda: todo_list.get_task(ids.pop()), len(ids))
+                # Before the sorted page, which reads every task
+                start = time.perf_counter()
+                todo_list.save_tasks()
+                save_ms = (time.perf_counter() - start) * 1000
+                # Records of the binary snapshot decoded so far, the JSON one reads them all
+                tasks = todo_list.tasks_by_id
+                decoded = len(tasks.loaded) if isinstance(tasks, TaskTable) else len(tasks)
+                start = time.perf_counter()
+                todo_list.get_sorted_ids("Due Date", 0, visible_rows)
+                page_ms = (time.perf_counter() - start) * 1000
+                todo_list.close()
+                del todo_list
+                print(f"{size:>8} {fmt:>7} {open_ms:>9.1f} {page_ms:>14.1f} {get_us:>12.1f} "
+                      f"{save_ms:>8.1f} {decoded:>8}")
+
+
+# Run in a fresh interpreter so imports and Qt start-up are part of the time
+FIRST_PAINT_SCRIPT = """
+import os, sys, time
+start = time.perf_counter()
+from PyQt5.QtCore import QEvent, QObject
+from PyQt5.QtWidgets import QApplication
+app = QApplication(sys.argv[:1])
+window = getattr(__import__(sys.argv[1]), sys.argv[2])()
+
+def elapsed():
+    print(f"{(time.perf_counter() - start) * 1000:.1f}", flush=True)
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            app.removeEventFilter(self)
+            elapsed()
+        return False
+
+def first_page():
+    elapsed()
+    os._exit(0)
+
+watcher = FirstPaint()
+app.installEventFilter(watcher)
+window.firstPageShown.connect(first_page)
+window.show()
+app.exec_()
+"""
+
+
+def bench_firstpaint(sizes, apps=(("modern_todo", "ModernTodoApp"), ("todo_gui", "TodoApp"))):
+    """Launch to first paint and to first page of tasks for both GUIs, tasks.json vs tasks.bin"""
+    if importlib.util.find_spec("PyQt5") is None:
+        print("PyQt5 is not installed, the GUIs can't be started")
+        return
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen",
+               PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")])))
+    print(f"{'tasks':>8} {'app':>12} {'json paint':>11} {'json tasks':>11} {'bin paint':>10} "
+          f"{'bin tasks':>10}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            write_task_files(directory, size)
+            for module, app_class in apps:
+                times = []
+                for fmt in ("json", "bin"):
+                    # The GUIs open tasks.bin when it exists and tasks.json otherwise
+                    hidden = os.path.join(directory, "hidden.bin")
+                    if fmt == "json":
+                        os.replace(os.path.join(directory, "tasks.bin"), hidden)
+                    try:
+                        result = subprocess.run(
+                            [sys.executable, "-c", FIRST_PAINT_SCRIPT, module, app_class],
+                            cwd=directory, env=env, capture_output=True, text=True, timeout=600)
+                    finally:
+                        if fmt == "json":
+                            os.replace(hidden, os.path.join(directory, "tasks.bin"))
+                    # The script prints the time of the first paint, then of the first page
+                    if result.returncode != 0 or len(result.stdout.split()) < 2:
+                        print(f"{module} failed: {result.stderr.strip().splitlines()[-1:]}")
+                        times += [float("nan")] * 2
+                    else:
+                        times += [float(value) for value in result.stdout.split()[:2]]
+                print(f"{size:>8} {module:>12} {times[0]:>11.0f} {times[1]:>11.0f} "
+                      f"{times[2]:>10.0f} {times[3]:>10.0f}")
+
+
+
+# Toggles in the card view, which only keeps the visible cards, then with a
+# live card for every task at fixed slots as CardScrollArea places them
+THEME_SCRIPT = """
+import sys, time
+from PyQt5.QtWidgets import QApplication, QScrollArea, QWidget
+app = QApplication(sys.argv[:1])
+app.setStyle("Fusion")
+from modern_todo import CardScrollArea, TaskCard, apply_app_theme
+from benchmark import make_tasks
+
+def elapsed(start):
+    return (time.perf_counter() - start) * 1000
+
+def toggle_ms(window):
+    window.resize(1200, 800)
+    window.show()
+    app.processEvents()
+    times = []
+    for name in ["dark", "light"] * int(sys.argv[2]):
+        start = time.perf_counter()
+        apply_app_theme(name)
+        app.processEvents()
+        times.append(elapsed(start))
+    window.close()
+    return sum(times) / len(times)
+
+apply_app_theme("light")
+tasks = make_tasks(int(sys.argv[1]))
+card_view = CardScrollArea()
+card_view.set_tasks(tasks)
+view = toggle_ms(card_view)
+view_cards = card_view.live_card_count
+start = time.perf_counter()
+container = QWidget()
+stride = CardScrollArea.CARD_HEIGHT + CardScrollArea.SPACING
+for row, task in enumerate(tasks):
+    card = TaskCard(task, container)
+    card.setGeometry(0, row * stride, 1100, CardScrollArea.CARD_HEIGHT)
+container.setMinimumHeight(len(tasks) * stride)
+scroll = QScrollArea()
+scroll.setWidget(container)
+scroll.setWidgetResizable(True)
+build = elapsed(start)
+print(f"{build:.1f} {toggle_ms(scroll):.1f} {view:.1f} {view_cards}")
+"""
+
+
+def bench_theme(sizes, toggles=3, max_cards=10000):
+    """Theme toggle latency with a TaskCard widget for every task and in the card view"""
+    if importlib.util.find_spec("PyQt5") is None:
+        print("PyQt5 is not installed, the GUI can't be started")
+        return
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen",
+               PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")])))
+    print(f"{'cards':>8} {'build ms':>9} {'toggle ms':>10} {'card view ms':>13} {'view cards':>11}")
+    for size in sizes:
+        if size > max_cards:
+            print(f"{size:>8} skipped, more than {max_cards} card widgets")
+            continue
+        result = subprocess.run([sys.executable, "-c", THEME_SCRIPT, str(size), str(toggles)],
+                                env=env, capture_output=True, text=True, timeout=1800)
+        if result.returncode != 0 or len(result.stdout.split()) < 4:
+            print(f"{size:>8} failed: {result.stderr.strip().splitlines()[-1:]}")
+            continue
+        build, live, view, view_cards = (float(value) for value in result.stdout.split()[:4])
+        print(f"{size:>8} {build:>9.0f} {live:>10.1f} {view:>13.1f} {view_cards:>11.0f}")
+
+
+def bench_paging(sizes, page_size=PAGE_SIZE):
+    """Time to the first page of tasks vs the whole task list, for JSON, binary and SQLite"""
+    print(f"{'tasks':>8} {'store':>7} {'all tasks ms':>13} {'first page ms':>14} "
+          f"{'next page us':>13} {'sorted page us':>15}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            write_task_files(directory, size)
+            sqlite_list = SqliteTodoList(os.path.join(directory, "tasks.db"))
+            sqlite_list.import_json(os.path.join(directory, "tasks.json"))
+            sqlite_list.close()
+            for store in ("json", "bin", "db"):
+                filename = os.path.join(directory, f"tasks.{store}")
+                if store == "db":
+                    todo_list = SqliteTodoList(filename)
+                else:
+                    storage = BinaryStorage(filename) if store == "bin" else None
+                    todo_list = TodoList(filename, storage, archive_after_days=None)
+                # The first page includes building the id order, later pages seek to the cursor
+                start = time.perf_counter()
+                page = todo_list.get_page(limit=page_size)
+                first_ms = (time.perf_counter() - start) * 1000
+                next_us = timed(lambda: todo_list.get_page(after=page.cursor, limit=page_size), 100)
+                sorted_page = todo_list.get_page(sort="Due Date", limit=size // 2 or 1)
+                sorted_us = timed(lambda: todo_list.get_page(
+                    sort="Due Date", after=sorted_page.cursor, limit=page_size), 100)
+                start = time.perf_counter()
+                todo_list.get_tasks()
+                all_ms = (time.perf_counter() - start) * 1000
+                todo_list.close()
+                del todo_list
+                print(f"{size:>8} {store:>7} {all_ms:>13.1f} {first_ms:>14.2f} {next_us:>13.1f} "
+                      f"{sorted_us:>15.1f}")
+
+
+def bench_query(sizes, queries=("priority:High due<2025-03-01", "category:Work -completed cluster",
+                                 "due>=2025-06-01 due<2025-06-08 pending", "overdue")):
+    """Query language: a predicate over every task vs a page from the planned candidates"""
+    print(f"{'tasks':>8} {'query':>40} {'parse us':>9} {'cached us':>10} {'scan ms':>9} "
+          f"{'page ms':>9} {'matches':>8}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            todo_list = TodoList(write_tasks_file(directory, size), archive_after_days=None)
+            # Build the indexes the plans use, they are kept up to date after that
+            todo_list.search("warm")
+            todo_list.get_sorted_ids("Due Date", 0, 1)
+            todo_list.get_sorted_ids("Priority", 0, 1)
+            for query in queries:
+                def parse():
+                    compile_query.cache_clear()
+                    compile_query(query)
+                parse_us = timed(parse, 100)
+                cached_us = timed(lambda: compile_query(query), 1000)
+                accept = compile_query(query).predicate()
+                start = time.perf_counter()
+                matches = sum(1 for task in todo_list.tasks_by_id.values() if accept(task))
+                scan_ms = (time.perf_counter() - start) * 1000
+                page_ms = timed(lambda: todo_list.get_page(sort="Due Date", query=query), 10) / 1000
+                print(f"{size:>8} {query:>40} {parse_us:>9.1f} {cached_us:>10.2f} {scan_ms:>9.2f} "
+                      f"{page_ms:>9.2f} {matches:>8}")
+            todo_list.close()
+
+
+def bench_sync(sizes, edits=100):
+    """Picking up another process's edits: incremental refresh vs reopening the task list"""
+    print(f"{'tasks':>8} {'engine':>18} {'idle us':>8} {'lock us':>8} {'refresh ms':>11} "
+          f"{'reopen ms':>10} {'changes':>8}")
+    for size in sizes:
+        for engine in (JournalStorage, BinaryStorage):
+            with tempfile.TemporaryDirectory() as directory:
+                write_task_files(directory, size)
+                filename = os.path.join(directory, "tasks.json" if engine is JournalStorage
+                                        else "tasks.bin")
+                # Two task lists on the same files behave like two processes
+                reader = TodoList(filename, storage=engine(filename), archive_after_days=None)
+                writer = TodoList(filename, storage=engine(filename), archive_after_days=None)
+                idle_us = timed(reader.refresh, 1000)
+                def lock():
+                    with reader.storage.lock:
+                        pass
+                lock_us = timed(lock, 1000)
+                notifications = []
+                reader.add_listener(notifications.append)
+                for task_id in random.sample(range(1, size + 1), min(edits, size)):
+                    writer.update_task(task_id, {"priority": "Low"})
+                start = time.perf_counter()
+                reader.refresh()
+                refresh_ms = (time.perf_counter() - start) * 1000
+                start = time.perf_counter()
+                reopened = TodoList(filename, storage=engine(filename), archive_after_days=None)
+                reopen_ms = (time.perf_counter() - start) * 1000
+                changes = sum(len(change.updated) for change in notifications)
+                for todo_list in (reopened, writer, reader):
+                    todo_list.close()
+            print(f"{size:>8} {engine.__name__:>18} {idle_us:>8.2f} {lock_us:>8.2f} "
+                  f"{refresh_ms:>11.2f} {reopen_ms:>10.2f} {changes:>8}")
+
+
+def bench_reminders(sizes, edits=1000, days=400):
+    """Due-date reminders: the heap scheduler vs looking at every task on each wakeup"""
+    print(f"{'tasks':>8} {'engine':>18} {'build ms':>9} {'scan ms':>8} {'next us':>8} "
+          f"{'edit us':>8} {'+sched us':>10} {'fired':>7} {'fire us':>8}")
+    for size in sizes:
+        for engine in (JournalStorage, BinaryStorage):
+            with tempfile.TemporaryDirectory() as directory:
+                write_task_files(directory, size)
+                filename = os.path.join(directory, "tasks.json" if engine is JournalStorage
+                                        else "tasks.bin")
+                todo_list = TodoList(filename, storage=engine(filename), archive_after_days=None)
+                start_day = datetime(2025, 1, 1)
+                now = [start_day.timestamp()]
+                start = time.perf_counter()
+                scheduler = DueScheduler(todo_list, clock=lambda: now[0])
+                build_ms = (time.perf_counter() - start) * 1000
+                # What a polling loop does on every tick
+                today = start_day.strftime("%Y-%m-%d")
+                scan_ms = timed(lambda: [task for task in todo_list.tasks_by_id.values()
+                                         if "" < (task.get("due_date") or "") <= today
+                                         and not task.get("completed", False)], 3) / 1000
+                next_us = timed(scheduler.next_deadline, 10000)
+                # Moving due dates, with and without the scheduler listening
+                ids = random.sample(range(1, size + 1), min(edits, size))
+                def move():
+                    for task_id in ids:
+                        due = start_day + timedelta(days=random.randrange(days))
+                        todo_list.update_task(task_id, {"due_date": due.strftime("%Y-%m-%d")})
+                scheduler.close()
+                edit_us = timed(move, 1) / len(ids)
+                todo_list.add_listener(scheduler)
+                sched_us = timed(move, 1) / len(ids) - edit_us
+                # A day at a time through every due date
+                fired = 0
+                start = time.perf_counter()
+                for day in range(days):
+                    now[0] = (start_day + timedelta(days=day, hours=12)).timestamp()
+                    fired += len(scheduler.fire_due())
+                fire_us = (time.perf_counter() - start) * 1e6 / max(fired, 1)
+                todo_list.close()
+            print(f"{size:>8} {engine.__name__:>18} {build_ms:>9.1f} {scan_ms:>8.2f} "
+                  f"{next_us:>8.2f} {edit_us:>8.1f} {sched_us:>10.1f} {fired:>7} {fire_us:>8.2f}")
+
+
+async def http_request(reader, writer, method, path, body=None):
+    """Send one request on a kept-alive connection and return (status, body)"""
+    data = b"" if body is None else json.dumps(body).encode('utf-8')
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                 f"Content-Length: {len(data)}\r\n\r\n".encode('latin-1') + data)
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        name, _, value = line.partition(b":")
+        if name.lower() == b"content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def load_clients(port, task_ids, clients, duration, write_share):
+    """Run clients on persistent connections for duration seconds, latencies per kind"""
+    reads = ["/tasks?limit=50", "/tasks?sort=Due%20Date&limit=50",
+             "/tasks?query=priority:High%20pending&limit=50", "/tasks?search=cluster&limit=20"]
+    # The first search and query build the indexes they use, that's not what is measured
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for path in reads:
+        await http_request(reader, writer, "GET", path)
+    writer.close()
+    latencies = {"read": [], "write": []}
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        while time.perf_counter() < deadline:
+            if random.random() < write_share:
+                kind, method, body = "write", "PATCH", {"priority": random.choice(["Low", "High"])}
+                path = f"/tasks/{random.choice(task_ids)}"
+            elif random.random() < 0.5:
+                kind, method, body, path = "read", "GET", None, f"/tasks/{random.choice(task_ids)}"
+            else:
+                kind, method, body, path = "read", "GET", None, random.choice(reads)
+            start = time.perf_counter()
+            status, _ = await http_request(reader, writer, method, path, body)
+            latencies[kind].append(time.perf_counter() - start)
+            if status >= 400:
+                raise RuntimeError(f"{method} {path} answered {status}")
+        writer.close()
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))] if values else float("nan")
+
+
+def bench_server(sizes, clients=32, duration=3.0, write_share=0.1):
+    """HTTP API under load on localhost: requests/sec and p50/p99 latency of reads and writes"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    print(f"{'tasks':>8} {'clients':>8} {'req/s':>9} {'read p50 ms':>12} {'read p99 ms':>12} "
+          f"{'write p50 ms':>13} {'write p99 ms':>13}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            filename = write_tasks_file(directory, size)
+            # Archive the completed tasks and fold that into tasks.json before the server
+            # opens it, the requests then only see tasks that stay in the task list
+            TodoList(filename).close()
+            task_ids = [task["id"] for task in make_tasks(size) if not task["completed"]]
+            server = subprocess.Popen(
+                [sys.executable, os.path.join(here, "todo_server.py"), "--tasks", filename,
+                 "--port", "0"], cwd=directory, stderr=subprocess.PIPE, text=True)
+            try:
+                # The server prints "Serving ... on http://HOST:PORT" once it listens
+                port = int(server.stderr.readline().rsplit(":", 1)[1])
+                latencies = asyncio.run(load_clients(port, task_ids, clients, duration,
+                                                     write_share))
+            finally:
+                server.terminate()
+                server.wait()
+        requests = len(latencies["read"]) + len(latencies["write"])
+        print(f"{size:>8} {clients:>8} {requests / duration:>9,.0f} "
+              f"{percentile(latencies['read'], 0.5) * 1000:>12.2f} "
+              f"{percentile(latencies['read'], 0.99) * 1000:>12.2f} "
+              f"{percentile(latencies['write'], 0.5) * 1000:>13.2f} "
+              f"{percentile(latencies['write'], 0.99) * 1000:>13.2f}")
+
+
+BENCHMARKS = {
+    "archive": bench_archive,
+    "analytics": bench_analytics,
+    "batch": bench_batch,
+    "bulk": bench_bulk,
+    "firstpaint": bench_firstpaint,
+    "ids": bench_ids,
+    "lazy": bench_lazy,
+    "memory": bench_memory,
+    "paging": bench_paging,
+    "query": bench_query,
+    "reminders": bench_reminders,
+    "search": bench_search,
+    "server": bench_server,
+    "snapshot": bench_snapshot,
+    "sort": bench_sort,
+    "startup": bench_startup,
+    "sync": bench_sync,
+    "theme": bench_theme,
+    "writes": bench_writes,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Todo List Manager benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args.sizes)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
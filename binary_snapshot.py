@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import mmap
+import zlib
+import struct
+import threading
+from collections import namedtuple
+from collections.abc import MutableMapping, ValuesView
+
+from blob_store import BlobRef
+from storage import (SNAPSHOT_BACKUPS, CorruptSnapshotError, JournalStorage, encode_task,
+                     file_stamp, replace_snapshot, snapshot_candidates)
+from task_record import FIELDS, MISSING, Task, format_date
+
+BINARY_MAGIC = b"TODOBIN\x00"
+BINARY_VERSION = 1
+# magic, version, record size, task count, highest id, heap length, CRC-32 of the fields before it
+HEADER = struct.Struct("<8sHHQqQI")
+# id, field bits, completed, due ordinal, created and completed seconds,
+# then (offset, length) into the string heap for title, description,
+# priority, category and a JSON object with everything that has no column
+RECORD = struct.Struct("<qHBxiqq10I")
+RECORD_ID = struct.Struct("<q")
+RECORD_IDS = struct.Struct(f"<q{RECORD.size - RECORD_ID.size}x")
+# id, field bits, completed and completed seconds, skipping the other columns
+RECORD_STATUS = struct.Struct(f"<qHB13xq{RECORD.size - 32}x")
+# id, field bits, completed and due ordinal
+RECORD_DUE = struct.Struct(f"<qHBxi{RECORD.size - 16}x")
+MAX_HEAP = 0xFFFFFFFF
+
+# Field bits: the value is in its column, otherwise it is in the JSON object if set at all
+FIELD_BITS = {key: 1 << n for n, key in enumerate(FIELDS)}
+(TITLE_BIT, DESCRIPTION_BIT, DUE_BIT, PRIORITY_BIT, CATEGORY_BIT, COMPLETED_BIT,
+ CREATED_BIT, COMPLETED_AT_BIT) = (FIELD_BITS[key] for key in list(FIELDS)[1:])
+DESCRIPTION_IN_BLOBS = 1 << 14
+HAS_OTHER = 1 << 15
+INT_COLUMNS = {"due_date": "due", "created_at": "created", "completed_at": "completed_time"}
+TEXT_COLUMNS = ("title", "description", "priority", "category")
+# Windows won't replace a file that is mapped
+MAPPED_FILES_LOCKED = os.name == "nt"
+
+
+class BinarySnapshot:
+    """Read-only view of a binary snapshot file through mmap.
+
+    The file is a header, a table of fixed-width records sorted by id and a
+    heap of UTF-8 strings. Opening it only reads the header, a record is
+    decoded into a Task when task() asks for its row. The body has no
+    checksum, hashing it would read every page; the header has a CRC and
+    the file size must match it, and files are only ever replaced whole.
+    """
+
+    def __init__(self, path, blobs=None):
+        self.path = path
+        self.blobs = blobs
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise CorruptSnapshotError(f"{path} is truncated")
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, record_size, count, max_id, heap_length, crc = \
+                HEADER.unpack_from(self.map)
+            if magic != BINARY_MAGIC or version != BINARY_VERSION or record_size != RECORD.size:
+                raise CorruptSnapshotError(f"{path} is not a version {BINARY_VERSION} binary snapshot")
+            if crc != zlib.crc32(self.map[:HEADER.size - 4]):
+                raise CorruptSnapshotError(f"{path} has a damaged header")
+            self.count = count
+            self.max_id = max_id
+            self.heap_offset = HEADER.size + count * RECORD.size
+            if size != self.heap_offset + heap_length:
+                raise CorruptSnapshotError(f"{path} is truncated")
+        except CorruptSnapshotError:
+            self.map.close()
+            raise
+
+    def __len__(self):
+        return self.count
+
+    def ids(self, chunk_rows=4096):
+        """Task ids in file order, read a chunk of records at a time"""
+        for start in range(0, self.count, chunk_rows):
+            begin = HEADER.size + start * RECORD.size
+            end = HEADER.size + min(start + chunk_rows, self.count) * RECORD.size
+            for (task_id,) in RECORD_IDS.iter_unpack(self.map[begin:end]):
+                yield task_id
+
+    def completed_before(self, seconds, chunk_rows=4096):
+        """(row, id) of completed tasks with a completed_at before seconds, without decoding"""
+        for start in range(0, self.count, chunk_rows):
+            begin = HEADER.size + start * RECORD.size
+            end = HEADER.size + min(start + chunk_rows, self.count) * RECORD.size
+            for row, (task_id, bits, completed, completed_time) in enumerate(
+                    RECORD_STATUS.iter_unpack(self.map[begin:end]), start):
+                if completed == 1 and bits & COMPLETED_BIT and bits & COMPLETED_AT_BIT and \
+                        completed_time < seconds:
+                    yield row, task_id
+
+    def open_due(self, chunk_rows=4096):
+        """(row, id, due ordinal) of tasks not completed that have a due date, without decoding.
+
+        The ordinal is None when the due date or status has no column but the
+        record has fields outside the columns, only decoding tells then.
+        """
+        for start in range(0, self.count, chunk_rows):
+            begin = HEADER.size + start * RECORD.size
+            end = HEADER.size + min(start + chunk_rows, self.count) * RECORD.size
+            for row, (task_id, bits, completed, due) in enumerate(
+                    RECORD_DUE.iter_unpack(self.map[begin:end]), start):
+                if bits & COMPLETED_BIT and completed == 1:
+                    continue
+                if bits & DUE_BIT and (bits & COMPLETED_BIT or not bits & HAS_OTHER):
+                    yield row, task_id, due
+                elif bits & HAS_OTHER:
+                    yield row, task_id, None
+
+    def find(self, task_id):
+        """Row of task_id, or None, by binary search over the id column"""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            found = RECORD_ID.unpack_from(self.map, HEADER.size + mid * RECORD.size)[0]
+            if found < task_id:
+                low = mid + 1
+            elif found > task_id:
+                high = mid
+            else:
+                return mid
+        return None
+
+    def task(self, row):
+        """Decode one record into a Task"""
+        (task_id, bits, completed, due, created, completed_time, title, title_length,
+         description, description_length, priority, priority_length, category,
+         category_length, other, other_length) = RECORD.unpack_from(
+            self.map, HEADER.size + row * RECORD.size)
+        data = self.map
+        heap = self.heap_offset
+        task = Task.__new__(Task)
+        task.extra = None
+        task.id = task_id
+        if bits & TITLE_BIT:
+            task.title = data[heap + title:heap + title + title_length].decode('utf-8')
+        if bits & DESCRIPTION_IN_BLOBS:
+            task.description = BlobRef(self.blobs, description, description_length)
+        elif bits & DESCRIPTION_BIT:
+            start = heap + description
+            task.description = data[start:start + description_length].decode('utf-8')
+        if bits & DUE_BIT:
+            task.due = due
+        if bits & PRIORITY_BIT:
+            start = heap + priority
+            task.priority = sys.intern(data[start:start + priority_length].decode('utf-8'))
+        if bits & CATEGORY_BIT:
+            start = heap + category
+            task.category = sys.intern(data[start:start + category_length].decode('utf-8'))
+        if bits & COMPLETED_BIT:
+            task.completed = completed == 1
+        if bits & CREATED_BIT:
+            task.created = created
+        if bits & COMPLETED_AT_BIT:
+            task.completed_time = completed_time
+        if bits & HAS_OTHER:
+            task.update(json.loads(self.text(other, other_length)))
+        return task
+
+    def text(self, offset, length):
+        start = self.heap_offset + offset
+        return self.map[start:start + length].decode('utf-8')
+
+    def raw(self, offset, length):
+        start = self.heap_offset + offset
+        return self.map[start:start + length]
+
+    def close(self):
+        self.map.close()
+
+
+class SnapshotRow(namedtuple("SnapshotRow", "snapshot row id")):
+    """A record of a snapshot that was never decoded, written out by copying its bytes"""
+    __slots__ = ()
+
+    def copy(self):
+        # The snapshot file is never changed in place, the record stays as it is
+        return self
+
+
+class TaskTable(MutableMapping):
+    """Tasks keyed by id on top of a BinarySnapshot, decoded on first access.
+
+    Decoded and newly set tasks are kept in ``loaded``, ids deleted from
+    the snapshot in ``deleted``. Iteration follows the snapshot's id order
+    and then the order new tasks were added, and like a dict it raises
+    RuntimeError if tasks are added or deleted while it runs.
+    """
+
+    def __init__(self, snapshot=None):
+        self.snapshot = snapshot
+        self.loaded = {}  # task id -> Task
+        self.added = {}  # ids not in the snapshot, in insertion order
+        self.deleted = set()
+        self._lock = threading.Lock()
+        self._version = 0
+
+    def __getitem__(self, task_id):
+        task = self.loaded.get(task_id)
+        if task is not None:
+            return task
+        row = self._row(task_id)
+        if row is None:
+            raise KeyError(task_id)
+        # Another thread may have decoded it meanwhile, setdefault keeps the first copy
+        return self.loaded.setdefault(task_id, self.snapshot.task(row))
+
+    def __setitem__(self, task_id, task):
+        if not isinstance(task, Task):
+            task = Task(task)
+        with self._lock:
+            if task_id not in self.loaded and task_id not in self.added and \
+                    self._row(task_id) is None:
+                self.added[task_id] = None
+                self._version += 1
+            self.loaded[task_id] = task
+
+    def __delitem__(self, task_id):
+        with self._lock:
+            if task_id in self.added:
+                del self.added[task_id]
+            elif self._row(task_id) is not None:
+                self.deleted.add(task_id)
+            else:
+                raise KeyError(task_id)
+            self.loaded.pop(task_id, None)
+            self._version += 1
+
+    def __contains__(self, task_id):
+        return task_id in self.added or self._row(task_id) is not None
+
+    def __len__(self):
+        size = len(self.added) - len(self.deleted)
+        return size + (len(self.snapshot) if self.snapshot is not None else 0)
+
+    def __iter__(self):
+        version = self._version
+        if self.snapshot is not None:
+            for task_id in self.snapshot.ids():
+                if self._version != version:
+                    raise RuntimeError("TaskTable changed size during iteration")
+                if task_id not in self.deleted:
+                    yield task_id
+        for task_id in list(self.added):
+            if self._version != version:
+                raise RuntimeError("TaskTable changed size during iteration")
+            yield task_id
+
+    def values(self):
+        return TaskTableValues(self)
+
+    def iter_tasks(self):
+        """Tasks in iteration order, decoding the snapshot in file order instead of by id"""
+        version = self._version
+        snapshot = self.snapshot
+        loaded = self.loaded
+        if snapshot is not None:
+            for row, task_id in enumerate(snapshot.ids()):
+                if self._version != version:
+                    raise RuntimeError("TaskTable changed size during iteration")
+                if task_id in self.deleted:
+                    continue
+                task = loaded.get(task_id)
+                if task is None:
+                    task = loaded.setdefault(task_id, snapshot.task(row))
+                yield task
+        for task_id in list(self.added):
+            if self._version != version:
+                raise RuntimeError("TaskTable changed size during iteration")
+            yield self.loaded[task_id]
+
+    def completed_before(self, seconds):
+        """Tasks completed before seconds, only those records of the snapshot are decoded"""
+        loaded = self.loaded
+        tasks = [task for task in list(loaded.values())
+                 if task.get("completed") and (task.completed_seconds or seconds) < seconds]
+        if self.snapshot is not None:
+            for row, task_id in self.snapshot.completed_before(seconds):
+                if task_id not in loaded and task_id not in self.deleted:
+                    tasks.append(loaded.setdefault(task_id, self.snapshot.task(row)))
+        return tasks
+
+    def open_due_dates(self):
+        """(id, due date) of tasks not completed that have one, reading the snapshot's columns"""
+        loaded = self.loaded
+        due_dates = [(task_id, task["due_date"]) for task_id, task in list(loaded.items())
+                     if task.get("due_date") and not task.get("completed", False)]
+        if self.snapshot is not None:
+            for row, task_id, due in self.snapshot.open_due():
+                if task_id in loaded or task_id in self.deleted:
+                    continue
+                if due is not None:
+                    due_dates.append((task_id, format_date(due)))
+                    continue
+                task = loaded.setdefault(task_id, self.snapshot.task(row))
+                if task.get("due_date") and not task.get("completed", False):
+                    due_dates.append((task_id, task["due_date"]))
+        return due_dates
+
+    def records(self):
+        """Tasks in iteration order, a SnapshotRow for each record that was never decoded"""
+        version = self._version
+        loaded = self.loaded
+        records = []
+        if self.snapshot is not None:
+            for row, task_id in enumerate(self.snapshot.ids()):
+                if task_id in self.deleted:
+                    continue
+                task = loaded.get(task_id)
+                records.append(task if task is not None else SnapshotRow(self.snapshot, row, task_id))
+        records.extend(loaded[task_id] for task_id in list(self.added))
+        if self._version != version:
+            raise RuntimeError("TaskTable changed size during iteration")
+        return records
+
+    def rebase(self, snapshot):
+        """Read the records not decoded yet from snapshot, a newer file of the same tasks.
+
+        Decoded tasks stay as they are, so do the tasks added or deleted
+        after the snapshot was written. The old file is left to whoever
+        still reads from it and closed when the last of them drops it.
+        """
+        ids = list(self)
+        in_snapshot = set(snapshot.ids())
+        with self._lock:
+            self.added = dict.fromkeys(task_id for task_id in ids if task_id not in in_snapshot)
+            self.deleted = in_snapshot.difference(ids)
+            self.snapshot = snapshot
+            self._version += 1
+
+    def max_id(self):
+        """Highest task id, without reading the records"""
+        highest = self.snapshot.max_id if self.snapshot is not None else 0
+        return max(highest, max(self.added, default=0))
+
+    def detach(self):
+        """Decode every remaining record and release the snapshot file"""
+        if self.snapshot is None:
+            return
+        tasks = {task.id: task for task in self.iter_tasks()}
+        snapshot = self.snapshot
+        with self._lock:
+            self.loaded = tasks
+            self.added = dict.fromkeys(tasks)
+            self.deleted = set()
+            self.snapshot = None
+        snapshot.close()
+
+    def _row(self, task_id):
+        if self.snapshot is None or type(task_id) is not int or task_id in self.deleted:
+            return None
+        return self.snapshot.find(task_id)
+
+
+class TaskTableValues(ValuesView):
+    def __iter__(self):
+        return self._mapping.iter_tasks()
+
+    def records(self):
+        return self._mapping.records()
+
+
+def write_binary_snapshot(filename, tasks, backups=SNAPSHOT_BACKUPS, blobs=None):
+    """Atomically write tasks as a binary snapshot, keeping older ones as backups.
+
+    With a BlobStore, descriptions of its threshold length or more are
+    appended to it and only referenced from the record. SnapshotRows are
+    copied from their snapshot without being decoded.
+    """
+    tasks = sorted((task if isinstance(task, (Task, SnapshotRow)) else Task(task)
+                    for task in tasks), key=lambda task: task.id)
+    table = bytearray(len(tasks) * RECORD.size)
+    heap = bytearray()
+    strings = {}  # priority and category -> heap position, they repeat a lot
+
+    def put(text, shared=False):
+        position = strings.get(text) if shared else None
+        if position is None:
+            data = text.encode('utf-8')
+            position = (len(heap), len(data))
+            heap.extend(data)
+            if shared:
+                strings[text] = position
+        return position
+
+    moved = {}  # (snapshot, offset) of a priority or category there -> offset here
+
+    def copy_record(row, source):
+        """Copy a record of another snapshot, moving its strings to this heap"""
+        snapshot = source.snapshot
+        values = list(RECORD.unpack_from(snapshot.map, HEADER.size + source.row * RECORD.size))
+        bits = values[1]
+        # Only the offsets change, slots 6 to 15 are the (offset, length) pairs
+        for slot, bit in ((6, TITLE_BIT), (8, DESCRIPTION_BIT), (14, HAS_OTHER)):
+            if bits & bit and not (bit == DESCRIPTION_BIT and bits & DESCRIPTION_IN_BLOBS):
+                offset = len(heap)
+                heap.extend(snapshot.raw(values[slot], values[slot + 1]))
+                values[slot] = offset
+        for slot, bit in ((10, PRIORITY_BIT), (12, CATEGORY_BIT)):
+            if bits & bit:
+                key = (snapshot, values[slot])
+                offset = moved.get(key)
+                if offset is None:
+                    offset = moved[key] = put(snapshot.text(values[slot], values[slot + 1]),
+                                              shared=True)[0]
+                values[slot] = offset
+        RECORD.pack_into(table, row * RECORD.size, *values)
+
+    for row, task in enumerate(tasks):
+        if type(task) is SnapshotRow:
+            # Descriptions in another blob file have to be moved, which needs the task
+            if task.snapshot.blobs is blobs:
+                copy_record(row, task)
+                continue
+            task = task.snapshot.task(task.row)
+        bits = 0
+        columns = {}
+        other = dict(task.extra) if task.extra else {}
+        for key, (slot, _, format_value) in FIELDS.items():
+            value = getattr(task, slot, MISSING)
+            if value is MISSING or key == "id":
+                continue
+            if key == "description":
+                if type(value) is BlobRef and (value.store is not blobs or value.offset > MAX_HEAP):
+                    value = value.load()
+                if type(value) is str and blobs is not None and blobs.threshold is not None and \
+                        len(value) >= blobs.threshold:
+                    value = blobs.put(value)
+                if type(value) is BlobRef and value.offset <= MAX_HEAP:
+                    bits |= FIELD_BITS[key] | DESCRIPTION_IN_BLOBS
+                    columns[key] = (value.offset, value.length)
+                    continue
+            if key in TEXT_COLUMNS and type(value) is str:
+                columns[key] = put(value, shared=key in ("priority", "category"))
+            elif key in INT_COLUMNS and type(value) is int:
+                columns[key] = value
+            elif key == "completed" and type(value) is bool:
+                columns[key] = value
+            else:
+                other[key] = format_value(value) if format_value else value
+                continue
+            bits |= FIELD_BITS[key]
+        if other:
+            bits |= HAS_OTHER
+            columns["other"] = put(json.dumps(other, default=encode_task, ensure_ascii=False))
+        RECORD.pack_into(
+            table, row * RECORD.size, task.id, bits, columns.get("completed", False),
+            columns.get("due_date", 0), columns.get("created_at", 0),
+            columns.get("completed_at", 0), *columns.get("title", (0, 0)),
+            *columns.get("description", (0, 0)), *columns.get("priority", (0, 0)),
+            *columns.get("category", (0, 0)), *columns.get("other", (0, 0)))
+    if len(heap) > MAX_HEAP:
+        raise ValueError(f"Text of {len(tasks)} tasks is too large for a binary snapshot")
+    if blobs is not None:
+        blobs.sync()
+
+    fields = HEADER.pack(BINARY_MAGIC, BINARY_VERSION, RECORD.size, len(tasks),
+                         tasks[-1].id if tasks else 0, len(heap), 0)[:HEADER.size - 4]
+    tmp_name = f"{filename}.tmp"
+    with open(tmp_name, 'wb') as f:
+        f.write(fields + struct.pack("<I", zlib.crc32(fields)))
+        f.write(table)
+        f.write(heap)
+        f.flush()
+        os.fsync(f.fileno())
+    replace_snapshot(filename, tmp_name, backups)
+
+
+def open_binary_snapshot(filename, blobs=None, backups=SNAPSHOT_BACKUPS):
+    """Map the newest valid binary snapshot, None if there is none yet"""
+    candidates = snapshot_candidates(filename, backups)
+    for path in candidates:
+        try:
+            return BinarySnapshot(path, blobs)
+        except (OSError, ValueError):
+            continue
+    if candidates:
+        raise CorruptSnapshotError(f"No valid snapshot found for {filename}")
+    return None
+
+
+class BinaryStorage(JournalStorage):
+    """JournalStorage whose snapshot is a memory-mapped binary file.
+
+    load() returns a TaskTable over the snapshot, so opening a task list
+    only reads the header and the journal, and each record is decoded the
+    first time it is used. A new snapshot copies the records that were
+    never decoded from the old file, and the table then moves over to it.
+    Only on Windows, which won't replace a mapped file, the table is
+    detached from the old file first.
+    """
+
+    def __init__(self, filename="tasks.bin", **kwargs):
+        super().__init__(filename, **kwargs)
+        self.table = None
+        self._compacted = None  # file_stamp() of a snapshot the compactor wrote
+
+    def load(self):
+        """Open the snapshot and replay the journals on top of it"""
+        with self.lock:
+            self._detach()
+            self.meta = self._load_meta()
+            self._seen_snapshot = file_stamp(self.filename)
+            self.table = TaskTable(open_binary_snapshot(self.filename, self.blobs))
+            for path in (self.old_journal_path, self.journal_path):
+                self._replay(path, self.table)
+            if os.path.exists(self.old_journal_path):
+                # A previous compaction did not finish, fold everything into a snapshot now
+                self.save(self.table.values())
+            self._journal_size = self._seen_journal = self._file_size(self.journal_path)
+            return self.table
+
+    def poll(self):
+        """Like JournalStorage.poll(), but the task list keeps the table it has.
+
+        A reload detaches both tables, the changes are then applied to the
+        one in use and the new snapshot isn't left mapped.
+        """
+        with self.lock:
+            if self._compacted is not None and self._compacted == self._seen_snapshot:
+                self._rebase()
+            self._compacted = None
+            table = self.table
+            tasks, records = super().poll()
+            if tasks is not None:
+                tasks.detach()
+                self.table = table
+            return tasks, records
+
+    def save(self, tasks):
+        """Write a full snapshot and start a new, empty journal"""
+        with self.lock:
+            self._detach()
+            super().save(self._records(tasks))
+            self._rebase()
+
+    def compact(self, tasks):
+        """Rotate the journal and write a snapshot of tasks"""
+        with self.lock:
+            self._detach()
+            super().compact(self._records(tasks))
+
+    def _write_snapshot(self, snapshot, meta, base):
+        super()._write_snapshot(snapshot, meta, base)
+        with self.lock:
+            if self._seen_snapshot == file_stamp(self.filename):
+                # Ours was moved into place, the table moves over on the next poll()
+                self._compacted = self._seen_snapshot
+
+    def write_tasks(self, tasks, filename=None):
+        """Write tasks as the new binary snapshot, or to filename without backups"""
+        if filename is None:
+            write_binary_snapshot(self.filename, tasks, blobs=self.blobs)
+        else:
+            write_binary_snapshot(filename, tasks, backups=0, blobs=self.blobs)
+
+    def _read_tasks(self):
+        table = TaskTable(open_binary_snapshot(self.filename, self.blobs))
+        self._replay(self.journal_path, table)
+        if MAPPED_FILES_LOCKED:
+            table.detach()
+            return table.values()
+        return table.records()
+
+    @staticmethod
+    def _records(tasks):
+        # The records of a table that were never decoded are copied as they are
+        return tasks.records() if isinstance(tasks, TaskTableValues) else tasks
+
+    def _rebase(self):
+        """Move the table over to the snapshot just written, with the lock held"""
+        if self.table is not None:
+            self.table.rebase(open_binary_snapshot(self.filename, self.blobs))
+
+    def _detach(self):
+        if MAPPED_FILES_LOCKED and self.table is not None:
+            self.table.detach()
+
+
+def convert(source, target):
+    """Copy a task file to another format, JSON or binary by extension, returns the task count"""
+    engines = [BinaryStorage(path) if path.endswith(".bin") else JournalStorage(path)
+               for path in (source, target)]
+    reader, writer = engines
+    try:
+        tasks = reader.load()
+        tasks = list(tasks.values()) if isinstance(tasks, TaskTable) else tasks
+        writer.meta = dict(reader.meta)
+        writer.save(tasks)
+    finally:
+        reader.close()
+        writer.close()
+    return len(tasks)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: binary_snapshot.py SOURCE TARGET   (tasks.json -> tasks.bin or back)")
+        sys.exit(1)
+    count = convert(sys.argv[1], sys.argv[2])
+    print(f"Converted {count} tasks from {sys.argv[1]} to {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
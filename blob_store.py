@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+import os
+import mmap
+import hashlib
+import threading
+
+# Text fields that may live in the blob file, and the length from which they do
+BLOB_FIELDS = ("description",)
+BLOB_THRESHOLD = 256
+
+
+class BlobRef:
+    """A text stored in a BlobStore, read from the memory map only when needed"""
+    __slots__ = ("store", "offset", "length")
+
+    def __init__(self, store, offset, length):
+        self.store = store
+        self.offset = offset
+        self.length = length
+
+    def load(self):
+        """The whole text"""
+        return self.store.read(self.offset, self.length).decode('utf-8')
+
+    def preview(self, limit):
+        """The first limit characters and whether the text goes on, reading only those bytes"""
+        size = min(self.length, limit * 4)  # a UTF-8 character is at most 4 bytes
+        text = self.store.read(self.offset, size).decode('utf-8', errors='ignore')
+        return text[:limit], size < self.length or len(text) > limit
+
+    def __bool__(self):
+        return self.length > 0
+
+    def __repr__(self):
+        return f"BlobRef({self.offset}, {self.length})"
+
+    # The same text in the same file, such as after loading a snapshot again
+    def __eq__(self, other):
+        if type(other) is not BlobRef:
+            return NotImplemented
+        return (self.store is other.store and self.offset == other.offset
+                and self.length == other.length)
+
+    def __hash__(self):
+        return hash((self.offset, self.length))
+
+    # Blobs never change, copies can share them
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class BlobStore:
+    """Append-only file of UTF-8 texts addressed by (offset, length).
+
+    Reads go through an mmap of the file that is remapped when the file has
+    grown, so only the pages of texts that are actually shown get loaded.
+    Existing bytes are never rewritten, snapshots and their backups can all
+    point into the same file.
+    """
+
+    def __init__(self, path, threshold=BLOB_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._file = None
+        self._map = None
+        # SHA-256 of the texts written during this session -> BlobRef, so saving
+        # again doesn't append them twice and doesn't keep the texts themselves
+        self._written = {}
+
+    def put(self, text):
+        """Append text and return its BlobRef"""
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).digest()
+        with self._lock:
+            ref = self._written.get(digest)
+            if ref is not None:
+                return ref
+            if self._file is None:
+                # Unbuffered, so each text is one append to wherever the file ends,
+                # also when another process appends to it
+                self._file = open(self.path, 'ab', buffering=0)
+            self._file.write(data)
+            ref = BlobRef(self, self._file.tell() - len(data), len(data))
+            self._written[digest] = ref
+            return ref
+
+    def sync(self):
+        """Make the appended texts durable, before a snapshot points at them"""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def read(self, offset, length):
+        """Raw bytes of a blob"""
+        if length == 0:
+            return b""
+        with self._lock:
+            if self._map is None or offset + length > len(self._map):
+                if self._file is not None:
+                    self._file.flush()
+                self._remap()
+            if offset + length > len(self._map):
+                raise ValueError(f"Blob at {offset}+{length} is past the end of {self.path}")
+            return self._map[offset:offset + length]
+
+    def _remap(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError(f"{self.path} is empty")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def store_blobs(record, blobs):
+    """Move long text fields of a task dict into blobs"""
+    for key in BLOB_FIELDS:
+        value = record.get(key)
+        if type(value) is BlobRef and value.store is not blobs:
+            # Text from another task file's blobs, copied into this one
+            value = record[key] = value.load()
+        if blobs.threshold is not None and isinstance(value, str) and len(value) >= blobs.threshold:
+            record[key] = blobs.put(value)
+    return record
+
+
+def attach_blobs(task, blobs, lazy=True):
+    """Turn {"$blob": [offset, length]} fields back into BlobRefs, or into their text"""
+    for key in BLOB_FIELDS:
+        value = task.get(key)
+        if type(value) is dict and "$blob" in value:
+            ref = BlobRef(blobs, *value["$blob"])
+            task[key] = ref if lazy else ref.load()
+    return task
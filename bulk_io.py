@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import csv
+import json
+import sys
+
+from blob_store import BlobStore, attach_blobs
+from storage import SNAPSHOT_MAGIC, encode_task, iter_json_array, open_snapshot
+from sorted_views import PRIORITY_ORDER
+from task_record import FIELDS, parse_date, parse_datetime
+
+FORMATS = ("json", "ndjson", "csv")
+EXTENSIONS = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+
+CSV_FIELDS = list(FIELDS)
+TRUE_STRINGS = {"1", "true", "yes", "y", "x", "✓"}
+FALSE_STRINGS = {"", "0", "false", "no", "n"}
+# Date fields and the parser that turns a valid value into an int
+TIME_PARSERS = {"due_date": parse_date, "created_at": parse_datetime,
+                "completed_at": parse_datetime}
+
+
+class InvalidTaskError(ValueError):
+    """Raised for an input record that can't be turned into a task"""
+
+
+def detect_format(path):
+    """Guess the file format from its extension, JSON array by default"""
+    for extension, fmt in EXTENSIONS.items():
+        if path.lower().endswith(extension):
+            return fmt
+    return "json"
+
+
+def open_input(path):
+    """Open path (or '-' for stdin) as text, skipping a checksummed snapshot header"""
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+    with open(path, 'rb') as f:
+        is_snapshot = f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+    if is_snapshot:
+        return open_snapshot(path, backups=0)
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def open_blobs(path):
+    """The blob file saved next to a tasks file, or None"""
+    blob_path = f"{path}.blobs"
+    if path == "-" or not os.path.exists(blob_path):
+        return None
+    return BlobStore(blob_path)
+
+
+def open_output(path):
+    """Open path (or '-' for stdout) for writing text"""
+    if path == "-":
+        return io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def read_records(f, fmt, blobs=None):
+    """Yield raw records from an open file one at a time.
+
+    With the BlobStore of a tasks file, descriptions kept in it are read back.
+    """
+    if fmt == "json":
+        for record in iter_json_array(f):
+            if blobs is not None and isinstance(record, dict):
+                attach_blobs(record, blobs, lazy=False)
+            yield record
+    elif fmt == "ndjson":
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    raise InvalidTaskError(f"line {number}: {e}") from None
+    elif fmt == "csv":
+        for row in csv.DictReader(f):
+            # Empty cells mean "not set", except for the text fields
+            yield {key: value for key, value in row.items()
+                   if key and (value or key in ("title", "description"))}
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+
+
+def _check_time(task, name):
+    value = task[name]
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str):
+        raise InvalidTaskError(f"{name} must be a string")
+    if type(TIME_PARSERS[name](value)) is not int:
+        raise InvalidTaskError(f"invalid {name}: {value!r}")
+    return value
+
+
+def validate_task(record):
+    """Check a raw record and return it as a clean task dict without an id"""
+    if not isinstance(record, dict):
+        raise InvalidTaskError("record is not an object")
+    task = {key: value for key, value in record.items() if key != "id"}
+
+    title = task.get("title")
+    if not isinstance(title, str) or not title.strip():
+        raise InvalidTaskError("title is missing")
+    description = task.get("description")
+    if description is None:
+        task["description"] = ""
+    elif not isinstance(description, str):
+        raise InvalidTaskError("description must be a string")
+
+    completed = task.get("completed", False)
+    if isinstance(completed, str):
+        if completed.strip().lower() in TRUE_STRINGS:
+            completed = True
+        elif completed.strip().lower() in FALSE_STRINGS:
+            completed = False
+    if not isinstance(completed, bool):
+        raise InvalidTaskError(f"invalid completed: {completed!r}")
+    task["completed"] = completed
+
+    # None is what an exported task without a priority has, like a missing one
+    if task.get("priority") is not None and task["priority"] not in PRIORITY_ORDER:
+        raise InvalidTaskError(f"invalid priority: {task['priority']!r}")
+    if "category" in task and not isinstance(task["category"], (str, type(None))):
+        raise InvalidTaskError("category must be a string")
+
+    for name in TIME_PARSERS:
+        if name in task:
+            task[name] = _check_time(task, name)
+    task.setdefault("completed_at", None)
+    return task
+
+
+def import_tasks(todo_list, records, batch_size=1000, on_error=None):
+    """Validate records and add them to todo_list in batches.
+
+    Only one batch is held in memory, and every batch is one call to
+    ``add_tasks``, so one block of ids and one storage write. Invalid
+    records are skipped and passed to ``on_error(number, error)``.
+    Returns (imported, rejected).
+    """
+    imported = rejected = 0
+    batch = []
+    for number, record in enumerate(records, 1):
+        try:
+            batch.append(validate_task(record))
+        except InvalidTaskError as e:
+            rejected += 1
+            if on_error is not None:
+                on_error(number, e)
+            continue
+        if len(batch) >= batch_size:
+            imported += len(todo_list.add_tasks(batch))
+            batch = []
+    if batch:
+        imported += len(todo_list.add_tasks(batch))
+    return imported, rejected
+
+
+def write_tasks(f, tasks, fmt):
+    """Stream tasks to an open file, returns the number written"""
+    count = 0
+    for text, count in export_chunks(tasks, fmt):
+        f.write(text)
+    return count
+
+
+def export_chunks(tasks, fmt, chunk_size=1000):
+    """Yield (text, tasks so far) as tasks are encoded, one piece per chunk_size tasks"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    buffer = io.StringIO()
+    if fmt == "json":
+        buffer.write("[")
+    elif fmt == "csv":
+        writer = csv.DictWriter(buffer, CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+    count = 0
+    for task in tasks:
+        if fmt == "csv":
+            writer.writerow(task)
+        else:
+            line = json.dumps(task, default=encode_task, ensure_ascii=False)
+            if fmt == "json":
+                buffer.write((",\n    " if count else "\n    ") + line)
+            else:
+                buffer.write(line + "\n")
+        count += 1
+        if count % chunk_size == 0:
+            yield buffer.getvalue(), count
+            buffer.seek(0)
+            buffer.truncate()
+    if fmt == "json":
+        buffer.write("\n]\n" if count else "]\n")
+    yield buffer.getvalue(), count
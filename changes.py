@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+
+class ChangeSet:
+    """Net effect of one mutation or one batch on the task list.
+
+    ``added`` holds the new task records, ``updated`` maps a task id to the
+    fields that changed and ``deleted`` lists removed ids. A task added and
+    then changed in the same batch only shows up in ``added``, and one
+    added and deleted again doesn't show up at all.
+    """
+
+    def __init__(self):
+        self.added = {}  # task id -> task
+        self.updated = {}  # task id -> changed fields
+        self.deleted = []
+
+    def __bool__(self):
+        return bool(self.added or self.updated or self.deleted)
+
+    def __len__(self):
+        return len(self.added) + len(self.updated) + len(self.deleted)
+
+    def __repr__(self):
+        return (f"ChangeSet(added={list(self.added)}, updated={list(self.updated)}, "
+                f"deleted={self.deleted})")
+
+    def add(self, task):
+        self.added[task["id"]] = task
+
+    def update(self, task_id, fields):
+        if task_id in self.added:
+            return
+        self.updated.setdefault(task_id, {}).update(fields)
+
+    def delete(self, task_id):
+        if self.added.pop(task_id, None) is not None:
+            return
+        self.updated.pop(task_id, None)
+        self.deleted.append(task_id)
+
+
+class Batch:
+    """Mutations collected by ``batch()`` and applied together on commit.
+
+    Nothing touches the task list until the ``with`` block ends, so an
+    exception inside it leaves the tasks as they were. New tasks get their
+    record right away, ids are filled in by the time the block exits.
+    """
+
+    def __init__(self, todo_list):
+        self.todo_list = todo_list
+        self.ops = []
+        self.changes = None
+
+    def add_task(self, task):
+        """Queue a new task and return its record"""
+        task = self.todo_list._new_task(task)
+        self.ops.append(("add", task))
+        return task
+
+    def update_task(self, task_id, updated_data):
+        """Queue changes to an existing task"""
+        self.ops.append(("update", task_id, dict(updated_data)))
+
+    def delete_task(self, task_id):
+        """Queue a task for deletion"""
+        self.ops.append(("delete", task_id))
+
+    def __len__(self):
+        return len(self.ops)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.changes = self.todo_list._commit_batch(self.ops)
+        self.ops = []
+        return False
+
+
+class TaskObserver:
+    """Typed change events from a task list, register one with add_listener().
+
+    A single mutation arrives as task_added, task_updated or task_deleted,
+    a batch of changes arrives as one tasks_changed call. Subclasses
+    override the events they care about. The default tasks_changed replays
+    the batch as single events.
+    """
+
+    def task_added(self, task):
+        """A new task was added"""
+
+    def task_updated(self, task_id, fields):
+        """fields of the task task_id changed"""
+
+    def task_deleted(self, task_id):
+        """The task task_id was deleted"""
+
+    def tasks_changed(self, changes):
+        """A ChangeSet with more than one change"""
+        for task in changes.added.values():
+            self.task_added(task)
+        for task_id, fields in changes.updated.items():
+            self.task_updated(task_id, fields)
+        for task_id in changes.deleted:
+            self.task_deleted(task_id)
+
+    def __call__(self, changes):
+        if len(changes) != 1:
+            self.tasks_changed(changes)
+        elif changes.added:
+            self.task_added(next(iter(changes.added.values())))
+        elif changes.updated:
+            self.task_updated(*next(iter(changes.updated.items())))
+        else:
+            self.task_deleted(changes.deleted[0])
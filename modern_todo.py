@@ -1,677 +1,1261 @@
-#!/usr/bin/env python3
-
-import sys
-import os
-from datetime import datetime, date
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                            QHBoxLayout, QListWidget, QPushButton, QLabel, 
-                            QLineEdit, QTextEdit, QDialog, QMessageBox,
-                            QListWidgetItem, QFrame, QSplitter, QStackedWidget,
-                            QComboBox, QScrollArea, QToolButton, QMenu, QAction,
-                            QButtonGroup, QRadioButton, QCalendarWidget, QDateEdit)
-from PyQt5.QtCore import Qt, QSize, QPropertyAnimation, QEasingCurve, pyqtSignal, QDate
-from PyQt5.QtGui import QIcon, QFont, QColor, QPalette, QPainter, QPen
-
-from core.todo_manager import TodoManager
-from core.settings import Settings
-
-# Constants
-ICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "todo_icon.ico")
-
-# Color schemes
-LIGHT_THEME = {
-    'bg_primary': '#ffffff',
-    'bg_secondary': '#f8f9fa',
-    'text_primary': '#212529',
-    'text_secondary': '#6c757d',
-    'accent': '#0d6efd',
-    'success': '#198754',
-    'warning': '#ffc107',
-    'error': '#dc3545',
-    'border': '#dee2e6',
-    'hover': '#e9ecef'
-}
-
-DARK_THEME = {
-    'bg_primary': '#212529',
-    'bg_secondary': '#343a40',
-    'text_primary': '#f8f9fa',
-    'text_secondary': '#adb5bd',
-    'accent': '#0d6efd',
-    'success': '#198754',
-    'warning': '#ffc107',
-    'error': '#dc3545',
-    'border': '#495057',
-    'hover': '#1a1d20'
-}
-
-PRIORITY_COLORS = {
-    'High': '#dc3545',
-    'Medium': '#ffc107',
-    'Low': '#198754'
-}
-
-class SearchBar(QWidget):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        layout = QHBoxLayout()
-        layout.setContentsMargins(16, 8, 16, 8)
-        
-        # Search input
-        self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("Search tasks...")
-        self.search_input.setMinimumWidth(300)
-        self.search_input.setStyleSheet("""
-            QLineEdit {
-                padding: 8px 16px;
-                border-radius: 20px;
-                border: 1px solid #dee2e6;
-                background: #f8f9fa;
-                font-size: 14px;
-            }
-        """)
-        
-        # User profile button
-        self.profile_btn = QToolButton()
-        self.profile_btn.setIcon(QIcon.fromTheme("user"))
-        self.profile_btn.setIconSize(QSize(24, 24))
-        self.profile_btn.setStyleSheet("""
-            QToolButton {
-                border: none;
-                padding: 8px;
-            }
-            QToolButton:hover {
-                background: #e9ecef;
-                border-radius: 4px;
-            }
-        """)
-        
-        layout.addWidget(self.search_input)
-        layout.addStretch()
-        layout.addWidget(self.profile_btn)
-        
-        self.setLayout(layout)
-        self.setFixedHeight(60)
-
-class SidebarButton(QPushButton):
-    def __init__(self, text, icon_name=None, parent=None):
-        super().__init__(text, parent)
-        self.setCheckable(True)
-        self.setFixedHeight(40)
-        if icon_name:
-            self.setIcon(QIcon.fromTheme(icon_name))
-        self.setStyleSheet("""
-            QPushButton {
-                text-align: left;
-                padding: 8px 16px;
-                border: none;
-                border-radius: 4px;
-                margin: 2px 8px;
-                font-size: 14px;
-            }
-            QPushButton:checked {
-                background-color: #0d6efd;
-                color: white;
-            }
-            QPushButton:hover:!checked {
-                background-color: #e9ecef;
-            }
-        """)
-
-class Sidebar(QWidget):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setFixedWidth(240)
-        layout = QVBoxLayout()
-        layout.setContentsMargins(0, 0, 0, 0)
-        layout.setSpacing(4)
-        
-        # App title
-        title = QLabel("Todo List")
-        title.setStyleSheet("""
-            font-size: 24px;
-            font-weight: bold;
-            padding: 16px;
-            color: #0d6efd;
-        """)
-        layout.addWidget(title)
-        
-        # Navigation buttons
-        self.nav_buttons = {
-            'all': SidebarButton("All Tasks", "view-list"),
-            'today': SidebarButton("Today", "calendar-today"),
-            'upcoming': SidebarButton("Upcoming", "calendar"),
-            'completed': SidebarButton("Completed", "checkbox"),
-            'categories': SidebarButton("Categories", "folder"),
-            'settings': SidebarButton("Settings", "configure")
-        }
-        
-        # Button group for navigation
-        self.nav_group = QButtonGroup(self)
-        for btn in self.nav_buttons.values():
-            layout.addWidget(btn)
-            self.nav_group.addButton(btn)
-        
-        layout.addStretch()
-        
-        # Theme toggle
-        self.theme_toggle = QPushButton("Toggle Theme")
-        self.theme_toggle.setIcon(QIcon.fromTheme("weather-clear-night"))
-        self.theme_toggle.setStyleSheet("""
-            QPushButton {
-                padding: 8px 16px;
-                margin: 8px;
-                border-radius: 4px;
-                background: #f8f9fa;
-                border: 1px solid #dee2e6;
-            }
-            QPushButton:hover {
-                background: #e9ecef;
-            }
-        """)
-        layout.addWidget(self.theme_toggle)
-        
-        self.setLayout(layout)
-
-class TaskCard(QFrame):
-    taskChanged = pyqtSignal(int)  # Signal to emit when task is modified
-    
-    def __init__(self, task, parent=None):
-        super().__init__(parent)
-        self.task = task
-        self.setFrameStyle(QFrame.StyledPanel)
-        self.setup_ui()
-        
-    def setup_ui(self):
-        layout = QVBoxLayout()
-        
-        # Header with checkbox and title
-        header = QHBoxLayout()
-        
-        # Checkbox
-        self.checkbox = QToolButton()
-        self.checkbox.setCheckable(True)
-        self.checkbox.setChecked(self.task.get("completed", False))
-        self.checkbox.clicked.connect(self.toggle_completed)
-        self.checkbox.setStyleSheet("""
-            QToolButton {
-                border: 2px solid #dee2e6;
-                border-radius: 12px;
-                padding: 4px;
-                background: white;
-            }
-            QToolButton:checked {
-                background: #198754;
-                border-color: #198754;
-            }
-        """)
-        
-        # Title
-        title = QLabel(self.task["title"])
-        title.setStyleSheet("font-weight: bold; font-size: 16px;")
-        
-        header.addWidget(self.checkbox)
-        header.addWidget(title)
-        header.addStretch()
-        
-        # Priority tag
-        priority = self.task.get("priority", "Medium")
-        priority_label = QLabel(priority)
-        priority_label.setStyleSheet(f"""
-            background: {PRIORITY_COLORS[priority]};
-            color: white;
-            padding: 4px 8px;
-            border-radius: 4px;
-            font-size: 12px;
-        """)
-        header.addWidget(priority_label)
-        
-        # Edit and delete buttons
-        edit_btn = QToolButton()
-        edit_btn.setIcon(QIcon.fromTheme("document-edit"))
-        edit_btn.clicked.connect(self.edit_task)
-        delete_btn = QToolButton()
-        delete_btn.setIcon(QIcon.fromTheme("edit-delete"))
-        delete_btn.clicked.connect(self.delete_task)
-        
-        for btn in [edit_btn, delete_btn]:
-            btn.setStyleSheet("""
-                QToolButton {
-                    border: none;
-                    padding: 4px;
-                }
-                QToolButton:hover {
-                    background: #e9ecef;
-                    border-radius: 4px;
-                }
-            """)
-            header.addWidget(btn)
-        
-        layout.addLayout(header)
-        
-        # Description
-        if self.task.get("description"):
-            desc = QLabel(self.task["description"])
-            desc.setWordWrap(True)
-            desc.setStyleSheet("color: #6c757d; margin-top: 8px;")
-            layout.addWidget(desc)
-        
-        # Footer with due date and category
-        footer = QHBoxLayout()
-        
-        if self.task.get("due_date"):
-            due_label = QLabel(f"Due: {self.task['due_date']}")
-            due_label.setStyleSheet("color: #6c757d; font-size: 12px;")
-            footer.addWidget(due_label)
-        
-        if self.task.get("category"):
-            category_label = QLabel(self.task["category"])
-            category_label.setStyleSheet("""
-                background: #e9ecef;
-                color: #212529;
-                padding: 2px 6px;
-                border-radius: 3px;
-                font-size: 12px;
-            """)
-            footer.addWidget(category_label)
-        
-        footer.addStretch()
-        layout.addLayout(footer)
-        
-        self.setLayout(layout)
-    
-    def toggle_completed(self):
-        self.task["completed"] = self.checkbox.isChecked()
-        self.task["completed_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S") if self.task["completed"] else None
-        self.taskChanged.emit(self.task["id"])
-    
-    def edit_task(self):
-        dialog = TaskEditDialog(self, self.task)
-        if dialog.exec_():
-            self.task.update(dialog.get_task_data())
-            self.taskChanged.emit(self.task["id"])
-    
-    def delete_task(self):
-        reply = QMessageBox.question(
-            self, "Delete Task",
-            f"Are you sure you want to delete '{self.task['title']}'?",
-            QMessageBox.Yes | QMessageBox.No,
-            QMessageBox.No
-        )
-        if reply == QMessageBox.Yes:
-            self.taskChanged.emit(self.task["id"])
-
-class TaskEditDialog(QDialog):
-    def __init__(self, parent=None, task=None):
-        super().__init__(parent)
-        self.task = task
-        self.setWindowTitle("Add Task" if not task else "Edit Task")
-        self.setMinimumWidth(500)
-        self.setup_ui()
-        
-    def setup_ui(self):
-        layout = QVBoxLayout()
-        layout.setSpacing(16)
-        
-        # Title
-        title_label = QLabel("Title:")
-        self.title_input = QLineEdit()
-        if self.task:
-            self.title_input.setText(self.task["title"])
-        
-        # Description
-        desc_label = QLabel("Description:")
-        self.desc_input = QTextEdit()
-        self.desc_input.setMaximumHeight(100)
-        if self.task:
-            self.desc_input.setText(self.task.get("description", ""))
-        
-        # Due Date
-        due_label = QLabel("Due Date:")
-        self.due_input = QDateEdit()
-        self.due_input.setCalendarPopup(True)
-        if self.task and self.task.get("due_date"):
-            self.due_input.setDate(QDate.fromString(self.task["due_date"], "yyyy-MM-dd"))
-        else:
-            self.due_input.setDate(QDate.currentDate())
-        
-        # Priority
-        priority_label = QLabel("Priority:")
-        self.priority_input = QComboBox()
-        self.priority_input.addItems(["Low", "Medium", "High"])
-        if self.task:
-            self.priority_input.setCurrentText(self.task.get("priority", "Medium"))
-        
-        # Category
-        category_label = QLabel("Category:")
-        self.category_input = QComboBox()
-        self.category_input.setEditable(True)
-        self.category_input.addItems(["Personal", "Work", "Shopping", "Health"])
-        if self.task:
-            self.category_input.setCurrentText(self.task.get("category", ""))
-        
-        # Add all widgets
-        for label, widget in [
-            (title_label, self.title_input),
-            (desc_label, self.desc_input),
-            (due_label, self.due_input),
-            (priority_label, self.priority_input),
-            (category_label, self.category_input)
-        ]:
-            layout.addWidget(label)
-            layout.addWidget(widget)
-        
-        # Buttons
-        button_layout = QHBoxLayout()
-        self.cancel_btn = QPushButton("Cancel")
-        self.save_btn = QPushButton("Save")
-        self.save_btn.setDefault(True)
-        
-        for btn, primary in [(self.cancel_btn, False), (self.save_btn, True)]:
-            btn.setStyleSheet(f"""
-                QPushButton {{
-                    padding: 8px 16px;
-                    border-radius: 4px;
-                    font-size: 14px;
-                    background: {('#0d6efd' if primary else '#f8f9fa')};
-                    color: {('white' if primary else '#212529')};
-                    border: {('none' if primary else '1px solid #dee2e6')};
-                }}
-                QPushButton:hover {{
-                    background: {('#0b5ed7' if primary else '#e9ecef')};
-                }}
-            """)
-        
-        self.cancel_btn.clicked.connect(self.reject)
-        self.save_btn.clicked.connect(self.accept)
-        
-        button_layout.addWidget(self.cancel_btn)
-        button_layout.addWidget(self.save_btn)
-        
-        layout.addLayout(button_layout)
-        self.setLayout(layout)
-    
-    def get_task_data(self):
-        return {
-            "title": self.title_input.text(),
-            "description": self.desc_input.toPlainText(),
-            "due_date": self.due_input.date().toString("yyyy-MM-dd"),
-            "priority": self.priority_input.currentText(),
-            "category": self.category_input.currentText()
-        }
-
-def get_icon(name):
-    """Helper function to get icons with fallback to system theme"""
-    icon_path = os.path.join("icons", f"{name}.png")
-    if os.path.exists(icon_path):
-        return QIcon(icon_path)
-    return QIcon.fromTheme(name, QIcon.fromTheme("application-x-executable"))
-
-class ModernTodoApp(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.todo_list = TodoManager()
-        self.settings = Settings()
-        self.current_theme = self.settings.get_theme()
-        self.current_view = self.settings.get_view()
-        self.current_filter = "all"
-        self.init_ui()
-        self.load_tasks()
-        
-    def init_ui(self):
-        self.setWindowTitle("Todo List Manager")
-        self.setMinimumSize(1200, 800)
-        
-        if os.path.exists(ICON_PATH):
-            self.setWindowIcon(QIcon(ICON_PATH))
-        
-        # Main layout
-        main_widget = QWidget()
-        self.setCentralWidget(main_widget)
-        layout = QHBoxLayout()
-        main_widget.setLayout(layout)
-        
-        # Sidebar
-        self.sidebar = Sidebar()
-        self.sidebar.theme_toggle.clicked.connect(self.toggle_theme)
-        self.sidebar.nav_group.buttonClicked.connect(self.handle_navigation)
-        layout.addWidget(self.sidebar)
-        
-        # Main content area
-        content_layout = QVBoxLayout()
-        
-        # Search bar
-        self.search_bar = SearchBar()
-        self.search_bar.search_input.textChanged.connect(self.filter_tasks)
-        content_layout.addWidget(self.search_bar)
-        
-        # Toolbar
-        toolbar_layout = QHBoxLayout()
-        
-        # View toggle
-        self.view_toggle = QButtonGroup()
-        list_view_btn = QRadioButton("List View")
-        card_view_btn = QRadioButton("Card View")
-        card_view_btn.setChecked(True)
-        self.view_toggle.addButton(list_view_btn)
-        self.view_toggle.addButton(card_view_btn)
-        
-        # Sort options
-        self.sort_combo = QComboBox()
-        self.sort_combo.addItems(["Due Date", "Priority", "Title"])
-        self.sort_combo.currentTextChanged.connect(self.sort_tasks)
-        
-        for widget in [list_view_btn, card_view_btn, QLabel("Sort by:"), self.sort_combo]:
-            toolbar_layout.addWidget(widget)
-        
-        toolbar_layout.addStretch()
-        content_layout.addLayout(toolbar_layout)
-        
-        # Task container
-        self.stack_widget = QStackedWidget()
-        
-        # List view
-        self.list_widget = QListWidget()
-        self.list_widget.setStyleSheet("""
-            QListWidget {
-                border: none;
-                background: transparent;
-            }
-            QListWidget::item {
-                padding: 8px;
-                margin: 2px 0;
-                border-radius: 4px;
-            }
-            QListWidget::item:hover {
-                background: #e9ecef;
-            }
-        """)
-        
-        # Card view
-        self.card_scroll = QScrollArea()
-        self.card_container = QWidget()
-        self.card_layout = QVBoxLayout()
-        self.card_container.setLayout(self.card_layout)
-        self.card_scroll.setWidget(self.card_container)
-        self.card_scroll.setWidgetResizable(True)
-        self.card_scroll.setStyleSheet("QScrollArea { border: none; }")
-        
-        self.stack_widget.addWidget(self.list_widget)
-        self.stack_widget.addWidget(self.card_scroll)
-        content_layout.addWidget(self.stack_widget)
-        
-        # Connect view toggle
-        list_view_btn.toggled.connect(lambda: self.switch_view("list"))
-        card_view_btn.toggled.connect(lambda: self.switch_view("card"))
-        
-        # Floating add button
-        self.add_button = QToolButton(self)
-        self.add_button.setText("+")
-        self.add_button.setFixedSize(56, 56)
-        self.add_button.clicked.connect(self.add_task)
-        self.add_button.setStyleSheet("""
-            QToolButton {
-                background-color: #0d6efd;
-                color: white;
-                border-radius: 28px;
-                font-size: 24px;
-                font-weight: bold;
-            }
-            QToolButton:hover {
-                background-color: #0b5ed7;
-            }
-        """)
-        
-        layout.addLayout(content_layout)
-        
-        # Position floating button
-        self.add_button.move(self.width() - 76, self.height() - 76)
-        
-        # Apply initial theme
-        self.apply_theme()
-    
-    def resizeEvent(self, event):
-        super().resizeEvent(event)
-        # Update floating button position
-        self.add_button.move(self.width() - 76, self.height() - 76)
-    
-    def switch_view(self, view_type):
-        self.current_view = view_type
-        self.stack_widget.setCurrentIndex(0 if view_type == "list" else 1)
-        self.load_tasks()
-    
-    def toggle_theme(self):
-        self.current_theme = "dark" if self.current_theme == "light" else "light"
-        self.apply_theme()
-    
-    def apply_theme(self):
-        theme = DARK_THEME if self.current_theme == "dark" else LIGHT_THEME
-        self.setStyleSheet(f"""
-            QMainWindow, QWidget {{
-                background-color: {theme['bg_primary']};
-                color: {theme['text_primary']};
-            }}
-            QListWidget, QScrollArea, QFrame {{
-                background-color: {theme['bg_secondary']};
-                border: 1px solid {theme['border']};
-                border-radius: 8px;
-            }}
-            QLineEdit, QTextEdit, QComboBox, QDateEdit {{
-                background-color: {theme['bg_secondary']};
-                color: {theme['text_primary']};
-                border: 1px solid {theme['border']};
-                padding: 8px;
-                border-radius: 4px;
-            }}
-            QComboBox::drop-down {{
-                border: none;
-            }}
-            QComboBox::down-arrow {{
-                image: url(down_arrow.png);
-                width: 12px;
-                height: 12px;
-            }}
-        """)
-    
-    def handle_navigation(self, button):
-        for name, btn in self.sidebar.nav_buttons.items():
-            if btn == button:
-                self.current_filter = name
-                break
-        self.load_tasks()
-    
-    def filter_tasks(self):
-        search_text = self.search_bar.search_input.text().lower()
-        tasks = self.todo_list.get_tasks()
-        
-        filtered_tasks = []
-        for task in tasks:
-            if (search_text in task["title"].lower() or 
-                search_text in task.get("description", "").lower()):
-                if self.current_filter == "today":
-                    if task["due_date"] == date.today().strftime("%Y-%m-%d"):
-                        filtered_tasks.append(task)
-                elif self.current_filter == "upcoming":
-                    if task["due_date"] > date.today().strftime("%Y-%m-%d"):
-                        filtered_tasks.append(task)
-                elif self.current_filter == "completed":
-                    if task.get("completed", False):
-                        filtered_tasks.append(task)
-                else:
-                    filtered_tasks.append(task)
-        
-        self.display_tasks(filtered_tasks)
-    
-    def sort_tasks(self):
-        sort_key = self.sort_combo.currentText()
-        tasks = self.todo_list.get_tasks()
-        
-        if sort_key == "Due Date":
-            tasks.sort(key=lambda x: x.get("due_date", ""))
-        elif sort_key == "Priority":
-            priority_order = {"High": 0, "Medium": 1, "Low": 2}
-            tasks.sort(key=lambda x: priority_order.get(x.get("priority", "Medium"), 1))
-        else:  # Title
-            tasks.sort(key=lambda x: x["title"].lower())
-        
-        self.display_tasks(tasks)
-    
-    def display_tasks(self, tasks):
-        if self.current_view == "list":
-            self.list_widget.clear()
-            for task in tasks:
-                item = QListWidgetItem()
-                self.set_task_item(item, task)
-                self.list_widget.addItem(item)
-        else:
-            # Clear existing cards
-            while self.card_layout.count():
-                child = self.card_layout.takeAt(0)
-                if child.widget():
-                    child.widget().deleteLater()
-            
-            # Add new cards
-            for task in tasks:
-                card = TaskCard(task)
-                card.taskChanged.connect(self.handle_task_change)
-                self.card_layout.addWidget(card)
-            self.card_layout.addStretch()
-    
-    def handle_task_change(self, task_id):
-        task = self.todo_list.get_task(task_id)
-        if task:
-            self.todo_list.update_task(task_id, task)
-            self.load_tasks()
-    
-    def load_tasks(self):
-        tasks = self.todo_list.get_tasks()
-        self.display_tasks(tasks)
-    
-    def set_task_item(self, item, task):
-        title = task["title"]
-        if task["completed"]:
-            title = "✓ " + title
-        item.setText(title)
-        item.setData(Qt.UserRole, task)
-        
-        if task["completed"]:
-            item.setForeground(QColor(LIGHT_THEME["success"]))
-    
-    def add_task(self):
-        dialog = TaskEditDialog(self)
-        if dialog.exec_():
-            task_data = dialog.get_task_data()
-            task_data["completed"] = False
-            task_data["created_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.todo_list.add_task(task_data)
-            self.load_tasks()
-
-def main():
-    app = QApplication(sys.argv)
-    app.setStyle('Fusion')
-    window = ModernTodoApp()
-    window.show()
-    sys.exit(app.exec_())
-
-if __name__ == '__main__':
+#!/usr/bin/env python3
+
+import sys
+import os
+from bisect import bisect_left, insort
+from datetime import datetime
+from functools import lru_cache
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
+                            QHBoxLayout, QListView, QPushButton, QLabel, 
+                            QLineEdit, QTextEdit, QDialog, QMessageBox,
+                            QStyledItemDelegate, QStyle, QFrame, QSplitter, QStackedWidget,
+                            QComboBox, QScrollArea, QToolButton, QMenu, QAction,
+                            QButtonGroup, QRadioButton, QCalendarWidget, QDateEdit,
+                            QInputDialog)
+from PyQt5.QtCore import (Qt, QSize, QRect, QPropertyAnimation, QEasingCurve, pyqtSignal, QDate,
+                          QAbstractListModel, QModelIndex, QObject, QRunnable, QThreadPool,
+                          QTimer)
+from PyQt5.QtGui import QIcon, QFont, QColor, QPalette, QPainter, QPen
+
+# The storage engines are imported by open_task_list(), after the window is on screen
+from task_window import PREVIEW_CHARS, TaskWindowMixin
+from sorted_views import SORT_KEYS
+from paging import PAGE_SIZE, FILTERS, filter_plan
+from task_query import QuerySyntaxError, compile_query, load_smart_views, save_smart_view
+from changes import TaskObserver
+from task_record import text_preview
+from core.settings import Settings
+
+# Constants
+ICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "todo_icon.ico")
+
+# Color schemes
+LIGHT_THEME = {
+    'bg_primary': '#ffffff',
+    'bg_secondary': '#f8f9fa',
+    'text_primary': '#212529',
+    'text_secondary': '#6c757d',
+    'accent': '#0d6efd',
+    'success': '#198754',
+    'warning': '#ffc107',
+    'error': '#dc3545',
+    'border': '#dee2e6',
+    'hover': '#e9ecef',
+    'accent_hover': '#0b5ed7'
+}
+
+DARK_THEME = {
+    'bg_primary': '#212529',
+    'bg_secondary': '#343a40',
+    'text_primary': '#f8f9fa',
+    'text_secondary': '#adb5bd',
+    'accent': '#0d6efd',
+    'success': '#198754',
+    'warning': '#ffc107',
+    'error': '#dc3545',
+    'border': '#495057',
+    'hover': '#1a1d20',
+    'accent_hover': '#0b5ed7'
+}
+
+THEMES = {'light': LIGHT_THEME, 'dark': DARK_THEME}
+
+PRIORITY_COLORS = {
+    'High': '#dc3545',
+    'Medium': '#ffc107',
+    'Low': '#198754'
+}
+
+# Wait this long after the last keystroke before running a search
+SEARCH_DEBOUNCE_MS = 150
+# Sidebar keys of saved smart views start with this, the rest is the view name
+SMART_VIEW_PREFIX = "smart:"
+
+@lru_cache(maxsize=None)
+def compile_theme(colors):
+    """Stylesheet and palette for a theme, given as sorted (name, color) pairs.
+
+    Built once per distinct theme, switching back and forth only swaps
+    finished objects. The palette colors everything, the stylesheet only
+    shapes the sidebar, search bar, buttons and dialogs. Task cards and
+    the list view must stay out of it: a widget under a stylesheet keeps
+    the palette it was polished with, so every card would need polishing.
+    """
+    theme = dict(colors)
+    stylesheet = f"""
+        QLineEdit, QTextEdit, QComboBox, QDateEdit {{
+            background-color: {theme['bg_secondary']};
+            color: {theme['text_primary']};
+            border: 1px solid {theme['border']};
+            padding: 8px;
+            border-radius: 4px;
+        }}
+        QComboBox::drop-down {{
+            border: none;
+        }}
+        QComboBox::down-arrow {{
+            image: url(down_arrow.png);
+            width: 12px;
+            height: 12px;
+        }}
+        QLineEdit#searchInput {{
+            padding: 8px 16px;
+            border-radius: 20px;
+            font-size: 14px;
+        }}
+        QLabel#appTitle {{
+            font-size: 24px;
+            font-weight: bold;
+            padding: 16px;
+            color: {theme['accent']};
+        }}
+        SidebarButton {{
+            text-align: left;
+            padding: 8px 16px;
+            border: none;
+            border-radius: 4px;
+            margin: 2px 8px;
+            font-size: 14px;
+            color: {theme['text_primary']};
+        }}
+        SidebarButton:checked {{
+            background-color: {theme['accent']};
+            color: white;
+        }}
+        SidebarButton:hover:!checked {{
+            background-color: {theme['hover']};
+        }}
+        QPushButton#themeToggle, TaskEditDialog QPushButton {{
+            padding: 8px 16px;
+            border-radius: 4px;
+            background: {theme['bg_secondary']};
+            color: {theme['text_primary']};
+            border: 1px solid {theme['border']};
+        }}
+        QPushButton#themeToggle {{
+            margin: 8px;
+        }}
+        TaskEditDialog QPushButton {{
+            font-size: 14px;
+        }}
+        QPushButton#themeToggle:hover, TaskEditDialog QPushButton:hover {{
+            background: {theme['hover']};
+        }}
+        TaskEditDialog QPushButton[primary="true"] {{
+            background: {theme['accent']};
+            color: white;
+            border: none;
+        }}
+        TaskEditDialog QPushButton[primary="true"]:hover {{
+            background: {theme['accent_hover']};
+        }}
+        QToolButton#addButton {{
+            background-color: {theme['accent']};
+            color: white;
+            border-radius: 28px;
+            font-size: 24px;
+            font-weight: bold;
+        }}
+        QToolButton#addButton:hover {{
+            background-color: {theme['accent_hover']};
+        }}
+    """
+    palette = QPalette()
+    for role, name in [(QPalette.Window, 'bg_primary'), (QPalette.WindowText, 'text_primary'),
+                       (QPalette.Base, 'bg_secondary'), (QPalette.AlternateBase, 'hover'),
+                       (QPalette.Text, 'text_primary'), (QPalette.Button, 'bg_secondary'),
+                       (QPalette.ButtonText, 'text_primary'), (QPalette.Highlight, 'accent'),
+                       (QPalette.Light, 'bg_primary'), (QPalette.Midlight, 'hover'),
+                       (QPalette.Mid, 'border'), (QPalette.Dark, 'border'),
+                       (QPalette.PlaceholderText, 'text_secondary')]:
+        palette.setColor(role, QColor(theme[name]))
+    palette.setColor(QPalette.HighlightedText, QColor("white"))
+    return stylesheet, palette
+
+def current_stylesheet():
+    """Stylesheet of the theme last applied, for widgets created later like dialogs"""
+    name = QApplication.instance().property("theme") or "light"
+    return compile_theme(tuple(sorted(THEMES[name].items())))[0]
+
+def apply_app_theme(name, styled_widgets=()):
+    """Switch the application palette to one of THEMES and restyle styled_widgets.
+
+    Only the styled widgets and their children are polished again, everything
+    else just repaints with the new palette, however many cards there are.
+    """
+    stylesheet, palette = compile_theme(tuple(sorted(THEMES[name].items())))
+    app = QApplication.instance()
+    app.setPalette(palette)
+    app.setProperty("theme", name)
+    for widget in styled_widgets:
+        widget.setStyleSheet(stylesheet)
+
+class SearchBar(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout()
+        layout.setContentsMargins(16, 8, 16, 8)
+        
+        # Search input
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search tasks or priority:High due<+7d -completed")
+        self.search_input.setMinimumWidth(300)
+        self.search_input.setObjectName("searchInput")
+        
+        # Saves the search as a smart view in the sidebar
+        self.save_view_btn = QToolButton()
+        self.save_view_btn.setIcon(QIcon.fromTheme("bookmark-new"))
+        self.save_view_btn.setToolTip("Save as smart view")
+        
+        # User profile button
+        self.profile_btn = QToolButton()
+        self.profile_btn.setIcon(QIcon.fromTheme("user"))
+        self.profile_btn.setIconSize(QSize(24, 24))
+        self.profile_btn.setAutoRaise(True)
+        
+        layout.addWidget(self.search_input)
+        layout.addWidget(self.save_view_btn)
+        layout.addStretch()
+        layout.addWidget(self.profile_btn)
+        
+        self.setLayout(layout)
+        self.setFixedHeight(60)
+
+class SidebarButton(QPushButton):
+    def __init__(self, text, icon_name=None, parent=None):
+        super().__init__(text, parent)
+        self.setCheckable(True)
+        self.setFixedHeight(40)
+        if icon_name:
+            self.setIcon(QIcon.fromTheme(icon_name))
+
+class Sidebar(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFixedWidth(240)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(4)
+        
+        # App title
+        title = QLabel("Todo List")
+        title.setObjectName("appTitle")
+        layout.addWidget(title)
+        
+        # Navigation buttons
+        self.nav_buttons = {
+            'all': SidebarButton("All Tasks", "view-list"),
+            'today': SidebarButton("Today", "calendar-today"),
+            'upcoming': SidebarButton("Upcoming", "calendar"),
+            'completed': SidebarButton("Completed", "checkbox"),
+            'categories': SidebarButton("Categories", "folder"),
+            'settings': SidebarButton("Settings", "configure")
+        }
+        
+        # Button group for navigation
+        self.nav_group = QButtonGroup(self)
+        for btn in self.nav_buttons.values():
+            layout.addWidget(btn)
+            self.nav_group.addButton(btn)
+        
+        # Saved smart views go below the built-in ones
+        self.smart_view_layout = QVBoxLayout()
+        self.smart_view_layout.setSpacing(4)
+        layout.addLayout(self.smart_view_layout)
+        
+        layout.addStretch()
+        
+        # Theme toggle
+        self.theme_toggle = QPushButton("Toggle Theme")
+        self.theme_toggle.setIcon(QIcon.fromTheme("weather-clear-night"))
+        self.theme_toggle.setObjectName("themeToggle")
+        layout.addWidget(self.theme_toggle)
+        
+        self.setLayout(layout)
+    
+    def add_smart_view(self, name):
+        """Sidebar button for a saved smart view"""
+        key = SMART_VIEW_PREFIX + name
+        if key not in self.nav_buttons:
+            btn = SidebarButton(name, "view-filter")
+            self.nav_buttons[key] = btn
+            self.smart_view_layout.addWidget(btn)
+            self.nav_group.addButton(btn)
+        return self.nav_buttons[key]
+
+# Task fields that decide whether and where a task shows up in a query
+SORT_FIELDS = {"Due Date": {"due_date"}, "Priority": {"priority"}, "Title": {"title"}}
+SEARCH_FIELDS = {"title", "description"}
+
+# Reads of a task list that keeps changing under the worker before it gives up
+QUERY_ATTEMPTS = 3
+
+class QuerySignals(QObject):
+    finished = pyqtSignal(int, list, object, bool)  # generation, task ids, next cursor, appended
+    failed = pyqtSignal(int, str)  # generation, error message
+
+class TaskQueryWorker(QRunnable):
+    """Fetches one page for the sidebar view, search and sort off the GUI thread.
+
+    Every query gets a generation number. A worker whose generation is no
+    longer the latest never reports, so stale work is dropped instead of
+    repainting the view. With a cursor the page continues the rows already
+    shown instead of replacing them. Errors are reported through
+    signals.failed, an exception must not escape the thread pool.
+    """
+    
+    def __init__(self, todo_list, generation, is_current, view, query, search_text, sort_by,
+                 after=None, limit=PAGE_SIZE):
+        super().__init__()
+        self.todo_list = todo_list
+        self.generation = generation
+        self.is_current = is_current
+        self.view = view
+        self.plan = query
+        self.search_text = search_text
+        self.sort_by = sort_by
+        self.after = after
+        self.limit = limit
+        self.signals = QuerySignals()
+    
+    def run(self):
+        for _ in range(QUERY_ATTEMPTS):
+            if not self.is_current(self.generation):
+                return
+            try:
+                ids, cursor = self.query()
+                break
+            except RuntimeError:
+                # The task list changed while we read it, read it again
+                continue
+            except Exception as e:
+                self.signals.failed.emit(self.generation, str(e))
+                return
+        else:
+            self.signals.failed.emit(self.generation, "the task list kept changing")
+            return
+        if self.is_current(self.generation):
+            self.signals.finished.emit(self.generation, ids, cursor, self.after is not None)
+    
+    def query(self):
+        # The storage seeks to the cursor in its sort indexes, so a page costs the
+        # same however many tasks there are. Only the completed view opens the archive.
+        page = self.todo_list.get_page(
+            filter=self.view, sort=self.sort_by, after=self.after, limit=self.limit,
+            search=self.search_text or None, include_archived=self.view == "completed",
+            query=self.plan)
+        return [task["id"] for task in page.tasks], page.cursor
+
+class RowIndex:
+    """Task id -> row of a list that rows are appended to and removed from.
+    
+    Removing a row doesn't renumber the ones after it. Rows keep the number
+    they got when the index was built or they were appended, the removed
+    numbers are kept sorted, and a row is its number minus the removed
+    numbers before it. A delete is a bisect instead of a pass over every row.
+    """
+    
+    def __init__(self, tasks=()):
+        self.numbers = {task["id"]: row for row, task in enumerate(tasks)}
+        self.removed = []
+    
+    def __contains__(self, task_id):
+        return task_id in self.numbers
+    
+    def get(self, task_id):
+        number = self.numbers.get(task_id)
+        if number is None:
+            return None
+        return number - bisect_left(self.removed, number)
+    
+    def append(self, task_id, row):
+        """Index task_id at row, the end of the list"""
+        self.numbers[task_id] = row + len(self.removed)
+    
+    def remove(self, task_id):
+        insort(self.removed, self.numbers.pop(task_id))
+
+class TaskListModel(QAbstractListModel):
+    """List model over task dicts.
+
+    set_tasks() diffs the new task list against the current rows and emits
+    rowsRemoved/layoutChanged/rowsInserted/dataChanged only for what moved,
+    so the view never rebuilds per-row objects. Rows come a page at a time,
+    when the view scrolls to the end it asks for the next one through
+    moreRequested and append_tasks() adds it.
+    """
+    moreRequested = pyqtSignal()
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tasks = []
+        self.rows = RowIndex()  # task id -> row
+        self.has_more = False
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.tasks)
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.has_more
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            # Asked once per page, the next page sets it again
+            self.has_more = False
+            self.moreRequested.emit()
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        task = self.tasks[index.row()]
+        if role == Qt.DisplayRole:
+            return ("✓ " if task.get("completed") else "") + task["title"]
+        if role == Qt.UserRole:
+            return task
+        if role == Qt.ForegroundRole and task.get("completed"):
+            return QColor(LIGHT_THEME["success"])
+        if role == Qt.ToolTipRole:
+            text, truncated = text_preview(task, "description", PREVIEW_CHARS)
+            return text + "…" if truncated else text or None
+        return None
+    
+    def set_tasks(self, tasks):
+        wanted = {task["id"] for task in tasks}
+        
+        # Drop rows that are no longer shown, one contiguous run at a time
+        row = len(self.tasks) - 1
+        while row >= 0:
+            if self.tasks[row]["id"] in wanted:
+                row -= 1
+                continue
+            last = row
+            while row >= 0 and self.tasks[row]["id"] not in wanted:
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row + 1, last)
+            del self.tasks[row + 1:last + 1]
+            self.endRemoveRows()
+        
+        # Reorder the remaining rows if the sort order changed
+        current = {task["id"]: task for task in self.tasks}
+        kept_ids = [task["id"] for task in tasks if task["id"] in current]
+        if kept_ids != [task["id"] for task in self.tasks]:
+            self.layoutAboutToBeChanged.emit()
+            old_ids = [task["id"] for task in self.tasks]
+            new_rows = {task_id: row for row, task_id in enumerate(kept_ids)}
+            self.tasks = [current[task_id] for task_id in kept_ids]
+            for index in self.persistentIndexList():
+                self.changePersistentIndex(index, self.index(new_rows[old_ids[index.row()]]))
+            self.layoutChanged.emit()
+        
+        # Insert new rows, one contiguous run at a time
+        row = 0
+        while row < len(tasks):
+            if tasks[row]["id"] in current:
+                row += 1
+                continue
+            first = row
+            while row < len(tasks) and tasks[row]["id"] not in current:
+                row += 1
+            self.beginInsertRows(QModelIndex(), first, row - 1)
+            self.tasks[first:first] = tasks[first:row]
+            self.endInsertRows()
+        
+        # Repaint rows whose task dict was replaced by a different one
+        changed = [row for row, task in enumerate(tasks)
+                   if self.tasks[row] is not task and self.tasks[row] != task]
+        self.tasks = list(tasks)
+        self.rows = RowIndex(self.tasks)
+        if changed:
+            self.dataChanged.emit(self.index(changed[0]), self.index(changed[-1]))
+    
+    def append_tasks(self, tasks):
+        # A task that moved up into rows already shown is not added twice
+        tasks = [task for task in tasks if task["id"] not in self.rows]
+        if not tasks:
+            return
+        first = len(self.tasks)
+        self.beginInsertRows(QModelIndex(), first, first + len(tasks) - 1)
+        self.tasks.extend(tasks)
+        for row, task in enumerate(tasks, first):
+            self.rows.append(task["id"], row)
+        self.endInsertRows()
+    
+    def update_task(self, task):
+        row = self.rows.get(task["id"])
+        if row is not None:
+            self.tasks[row] = task
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+    
+    def remove_task(self, task_id):
+        row = self.rows.get(task_id)
+        if row is not None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.tasks[row]
+            self.rows.remove(task_id)
+            self.endRemoveRows()
+
+class TaskItemDelegate(QStyledItemDelegate):
+    """Paints a task row directly, without any per-row widgets"""
+    ROW_HEIGHT = 44
+    
+    def paint(self, painter, option, index):
+        task = index.data(Qt.UserRole)
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        elif option.state & QStyle.State_MouseOver:
+            painter.fillRect(option.rect, option.palette.midlight())
+        
+        rect = option.rect.adjusted(12, 0, -12, 0)
+        metrics = option.fontMetrics
+        
+        # Priority tag on the right
+        priority = task.get("priority") or "Medium"
+        tag_width = metrics.horizontalAdvance(priority) + 16
+        tag = QRect(rect.right() - tag_width, rect.center().y() - 10, tag_width, 20)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(PRIORITY_COLORS.get(priority, PRIORITY_COLORS["Medium"])))
+        painter.drawRoundedRect(tag, 4, 4)
+        painter.setPen(QColor("white"))
+        painter.drawText(tag, Qt.AlignCenter, priority)
+        
+        # Due date left of the tag
+        text_right = tag.left() - 12
+        if task.get("due_date"):
+            due_text = f"Due: {task['due_date']}"
+            due_width = metrics.horizontalAdvance(due_text)
+            due_rect = QRect(text_right - due_width, rect.top(), due_width, rect.height())
+            painter.setPen(option.palette.color(QPalette.PlaceholderText))
+            painter.drawText(due_rect, Qt.AlignVCenter | Qt.AlignRight, due_text)
+            text_right = due_rect.left() - 12
+        
+        # Title, elided to the space that is left
+        foreground = index.data(Qt.ForegroundRole)
+        painter.setPen(foreground if foreground is not None else option.palette.text().color())
+        title_rect = QRect(rect.left(), rect.top(), max(0, text_right - rect.left()), rect.height())
+        title = metrics.elidedText(index.data(Qt.DisplayRole), Qt.ElideRight, title_rect.width())
+        painter.drawText(title_rect, Qt.AlignVCenter | Qt.AlignLeft, title)
+        
+        painter.restore()
+    
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+class TaskCard(QFrame):
+    taskChanged = pyqtSignal(int, dict)  # task id, changed fields
+    taskDeleted = pyqtSignal(int)
+    
+    def __init__(self, task=None, parent=None):
+        super().__init__(parent)
+        self.task = None
+        self.priority = None
+        self.setFrameStyle(QFrame.StyledPanel)
+        # No stylesheet rules, the card and its labels follow the palette
+        self.setAutoFillBackground(True)
+        self.setBackgroundRole(QPalette.Base)
+        self.setup_ui()
+        if task is not None:
+            self.bind(task)
+        
+    def setup_ui(self):
+        """Build the child widgets once, bind() fills them in for a task"""
+        layout = QVBoxLayout()
+        
+        small_font = self.font()
+        small_font.setPixelSize(12)
+        
+        # Header with checkbox and title
+        header = QHBoxLayout()
+        
+        # Checkbox
+        self.checkbox = QToolButton()
+        self.checkbox.setCheckable(True)
+        self.checkbox.clicked.connect(self.toggle_completed)
+        self.checkbox.setAutoRaise(True)
+        
+        # Title
+        self.title_label = QLabel()
+        title_font = self.title_label.font()
+        title_font.setPixelSize(16)
+        title_font.setBold(True)
+        self.title_label.setFont(title_font)
+        
+        header.addWidget(self.checkbox)
+        header.addWidget(self.title_label)
+        header.addStretch()
+        
+        # Priority tag, its palette is set by bind()
+        self.priority_label = QLabel()
+        self.priority_label.setFont(small_font)
+        self.priority_label.setAutoFillBackground(True)
+        self.priority_label.setBackgroundRole(QPalette.Window)
+        self.priority_label.setContentsMargins(8, 4, 8, 4)
+        header.addWidget(self.priority_label)
+        
+        # Edit and delete buttons
+        edit_btn = QToolButton()
+        edit_btn.setIcon(QIcon.fromTheme("document-edit"))
+        edit_btn.clicked.connect(self.edit_task)
+        delete_btn = QToolButton()
+        delete_btn.setIcon(QIcon.fromTheme("edit-delete"))
+        delete_btn.clicked.connect(self.delete_task)
+        
+        for btn in [edit_btn, delete_btn]:
+            btn.setAutoRaise(True)
+            header.addWidget(btn)
+        
+        layout.addLayout(header)
+        
+        # Description
+        self.desc_label = QLabel()
+        self.desc_label.setWordWrap(True)
+        self.desc_label.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+        self.desc_label.setForegroundRole(QPalette.PlaceholderText)
+        self.desc_label.setContentsMargins(0, 8, 0, 0)
+        layout.addWidget(self.desc_label, 1)
+        
+        # Full description, only loaded when the card is expanded
+        self.desc_full = QTextEdit()
+        self.desc_full.setReadOnly(True)
+        self.desc_full.setFrameShape(QFrame.NoFrame)
+        self.desc_full.hide()
+        layout.addWidget(self.desc_full, 1)
+        
+        # Footer with due date and category
+        footer = QHBoxLayout()
+        
+        self.due_label = QLabel()
+        self.due_label.setFont(small_font)
+        self.due_label.setForegroundRole(QPalette.PlaceholderText)
+        footer.addWidget(self.due_label)
+        
+        self.category_label = QLabel()
+        self.category_label.setFont(small_font)
+        self.category_label.setAutoFillBackground(True)
+        self.category_label.setBackgroundRole(QPalette.Midlight)
+        self.category_label.setContentsMargins(6, 2, 6, 2)
+        footer.addWidget(self.category_label)
+        
+        footer.addStretch()
+        
+        self.more_btn = QToolButton()
+        self.more_btn.setText("More")
+        self.more_btn.setFont(small_font)
+        self.more_btn.setAutoRaise(True)
+        more_palette = QPalette()
+        more_palette.setColor(QPalette.ButtonText, QColor(LIGHT_THEME["accent"]))
+        self.more_btn.setPalette(more_palette)
+        self.more_btn.clicked.connect(self.toggle_expanded)
+        footer.addWidget(self.more_btn)
+        layout.addLayout(footer)
+        
+        self.setLayout(layout)
+    
+    def bind(self, task):
+        """Show another task in this card, reusing the existing child widgets"""
+        self.task = task
+        self.checkbox.setChecked(task.get("completed", False))
+        self.title_label.setText(task["title"])
+        
+        # Only recolor the tag when the priority actually changes. Its palette
+        # sets just these two roles, the rest still follows the theme
+        priority = task.get("priority") or "Medium"
+        self.priority_label.setText(priority)
+        if priority != self.priority:
+            self.priority = priority
+            tag_palette = QPalette()
+            tag_palette.setColor(QPalette.Window,
+                                 QColor(PRIORITY_COLORS.get(priority, PRIORITY_COLORS["Medium"])))
+            tag_palette.setColor(QPalette.WindowText, QColor("white"))
+            self.priority_label.setPalette(tag_palette)
+        
+        # Only the preview is read, the full text waits for toggle_expanded()
+        text, truncated = text_preview(task, "description", PREVIEW_CHARS)
+        self.desc_label.setText(text + "…" if truncated else text)
+        self.desc_label.setVisible(bool(text))
+        self.desc_full.hide()
+        self.desc_full.clear()
+        self.more_btn.setText("More")
+        self.more_btn.setVisible(truncated)
+        self.due_label.setText(f"Due: {task['due_date']}" if task.get("due_date") else "")
+        self.due_label.setVisible(bool(task.get("due_date")))
+        self.category_label.setText(task.get("category") or "")
+        self.category_label.setVisible(bool(task.get("category")))
+    
+    def toggle_expanded(self):
+        """Switch between the preview and the full, scrollable description"""
+        expanded = not self.desc_full.isVisible()
+        if expanded:
+            self.desc_full.setPlainText(self.task.get("description") or "")
+        else:
+            self.desc_full.clear()
+        self.desc_full.setVisible(expanded)
+        self.desc_label.setVisible(not expanded)
+        self.more_btn.setText("Less" if expanded else "More")
+    
+    def toggle_completed(self):
+        completed = self.checkbox.isChecked()
+        self.taskChanged.emit(self.task["id"], {
+            "completed": completed,
+            "completed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S") if completed else None
+        })
+    
+    def edit_task(self):
+        dialog = TaskEditDialog(self, self.task)
+        if dialog.exec_():
+            self.taskChanged.emit(self.task["id"], dialog.get_task_data())
+    
+    def delete_task(self):
+        reply = QMessageBox.question(
+            self, "Delete Task",
+            f"Are you sure you want to delete '{self.task['title']}'?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            self.taskDeleted.emit(self.task["id"])
+
+class CardScrollArea(QScrollArea):
+    """Scroll area that only shows cards for the visible tasks.
+
+    Cards sit at fixed-height slots on a container as tall as the whole list.
+    Cards that scroll out of the viewport plus OVERSCAN rows go back to a pool
+    and are rebound to the tasks that scroll in, so the number of live
+    TaskCard widgets depends on the viewport height, not on the task count.
+    Tasks come a page at a time, moreRequested asks for the next page once
+    the overscan rows reach the end of the loaded ones.
+    """
+    taskChanged = pyqtSignal(int, dict)
+    taskDeleted = pyqtSignal(int)
+    moreRequested = pyqtSignal()
+    CARD_HEIGHT = 150
+    SPACING = 8
+    OVERSCAN = 3
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tasks = []
+        self.rows = RowIndex()  # task id -> row
+        self.active = {}  # row -> card showing it
+        self.pool = []  # hidden cards ready for reuse
+        self.has_more = False
+        self.container = QWidget()
+        self.setWidget(self.container)
+        self.setWidgetResizable(True)
+        self.verticalScrollBar().valueChanged.connect(self.update_visible_cards)
+    
+    @property
+    def live_card_count(self):
+        """Number of TaskCard widgets that currently exist"""
+        return len(self.active) + len(self.pool)
+    
+    def set_tasks(self, tasks):
+        self.tasks = list(tasks)
+        self.rows = RowIndex(self.tasks)
+        for card in self.active.values():
+            self.release_card(card)
+        self.active = {}
+        stride = self.CARD_HEIGHT + self.SPACING
+        self.container.setMinimumHeight(len(self.tasks) * stride + self.SPACING)
+        self.update_visible_cards()
+    
+    def append_tasks(self, tasks):
+        for task in tasks:
+            if task["id"] not in self.rows:
+                self.rows.append(task["id"], len(self.tasks))
+                self.tasks.append(task)
+        stride = self.CARD_HEIGHT + self.SPACING
+        self.container.setMinimumHeight(len(self.tasks) * stride + self.SPACING)
+        self.update_visible_cards()
+    
+    def update_task(self, task):
+        row = self.rows.get(task["id"])
+        if row is not None:
+            self.tasks[row] = task
+            if row in self.active:
+                self.active[row].bind(task)
+    
+    def remove_task(self, task_id):
+        row = self.rows.get(task_id)
+        if row is not None:
+            del self.tasks[row]
+            self.rows.remove(task_id)
+            # Only the visible cards below the removed row need rebinding
+            for card_row in [card_row for card_row in self.active if card_row >= row]:
+                self.release_card(self.active.pop(card_row))
+            stride = self.CARD_HEIGHT + self.SPACING
+            self.container.setMinimumHeight(len(self.tasks) * stride + self.SPACING)
+            self.update_visible_cards()
+    
+    def update_visible_cards(self):
+        stride = self.CARD_HEIGHT + self.SPACING
+        top = self.verticalScrollBar().value()
+        first = max(0, top // stride - self.OVERSCAN)
+        last = min(len(self.tasks),
+                   (top + self.viewport().height()) // stride + 1 + self.OVERSCAN)
+        
+        for row in [row for row in self.active if not first <= row < last]:
+            self.release_card(self.active.pop(row))
+        
+        width = self.container.width() - 2 * self.SPACING
+        for row in range(first, last):
+            card = self.active.get(row)
+            if card is None:
+                card = self.acquire_card()
+                card.bind(self.tasks[row])
+                self.active[row] = card
+            card.setGeometry(self.SPACING, self.SPACING + row * stride, width, self.CARD_HEIGHT)
+        
+        if self.has_more and last >= len(self.tasks):
+            # Asked once per page, the next page sets it again
+            self.has_more = False
+            self.moreRequested.emit()
+    
+    def acquire_card(self):
+        if self.pool:
+            card = self.pool.pop()
+        else:
+            card = TaskCard(parent=self.container)
+            card.taskChanged.connect(self.taskChanged.emit)
+            card.taskDeleted.connect(self.taskDeleted.emit)
+        card.show()
+        return card
+    
+    def release_card(self, card):
+        card.hide()
+        self.pool.append(card)
+    
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_visible_cards()
+
+class TaskEditDialog(QDialog):
+    def __init__(self, parent=None, task=None):
+        super().__init__(parent)
+        self.task = task
+        self.setWindowTitle("Add Task" if not task else "Edit Task")
+        self.setMinimumWidth(500)
+        self.setStyleSheet(current_stylesheet())
+        self.setup_ui()
+        
+    def setup_ui(self):
+        layout = QVBoxLayout()
+        layout.setSpacing(16)
+        
+        # Title
+        title_label = QLabel("Title:")
+        self.title_input = QLineEdit()
+        if self.task:
+            self.title_input.setText(self.task["title"])
+        
+        # Description
+        desc_label = QLabel("Description:")
+        self.desc_input = QTextEdit()
+        self.desc_input.setMaximumHeight(100)
+        if self.task:
+            self.desc_input.setText(self.task.get("description", ""))
+        
+        # Due Date
+        due_label = QLabel("Due Date:")
+        self.due_input = QDateEdit()
+        self.due_input.setCalendarPopup(True)
+        if self.task and self.task.get("due_date"):
+            self.due_input.setDate(QDate.fromString(self.task["due_date"], "yyyy-MM-dd"))
+        else:
+            self.due_input.setDate(QDate.currentDate())
+        
+        # Priority
+        priority_label = QLabel("Priority:")
+        self.priority_input = QComboBox()
+        self.priority_input.addItems(["Low", "Medium", "High"])
+        if self.task:
+            self.priority_input.setCurrentText(self.task.get("priority", "Medium"))
+        
+        # Category
+        category_label = QLabel("Category:")
+        self.category_input = QComboBox()
+        self.category_input.setEditable(True)
+        self.category_input.addItems(["Personal", "Work", "Shopping", "Health"])
+        if self.task:
+            self.category_input.setCurrentText(self.task.get("category", ""))
+        
+        # Add all widgets
+        for label, widget in [
+            (title_label, self.title_input),
+            (desc_label, self.desc_input),
+            (due_label, self.due_input),
+            (priority_label, self.priority_input),
+            (category_label, self.category_input)
+        ]:
+            layout.addWidget(label)
+            layout.addWidget(widget)
+        
+        # Buttons
+        button_layout = QHBoxLayout()
+        self.cancel_btn = QPushButton("Cancel")
+        self.save_btn = QPushButton("Save")
+        self.save_btn.setDefault(True)
+        
+        self.save_btn.setProperty("primary", True)
+        
+        self.cancel_btn.clicked.connect(self.reject)
+        self.save_btn.clicked.connect(self.accept)
+        
+        button_layout.addWidget(self.cancel_btn)
+        button_layout.addWidget(self.save_btn)
+        
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+    
+    def get_task_data(self):
+        return {
+            "title": self.title_input.text(),
+            "description": self.desc_input.toPlainText(),
+            "due_date": self.due_input.date().toString("yyyy-MM-dd"),
+            "priority": self.priority_input.currentText(),
+            "category": self.category_input.currentText()
+        }
+
+def get_icon(name):
+    """Helper function to get icons with fallback to system theme"""
+    icon_path = os.path.join("icons", f"{name}.png")
+    if os.path.exists(icon_path):
+        return QIcon(icon_path)
+    return QIcon.fromTheme(name, QIcon.fromTheme("application-x-executable"))
+
+class ModernTodoApp(TaskWindowMixin, QMainWindow, TaskObserver):
+    """Main window, painted first and filled in once the task list is open.
+
+    The task list is opened right after the first frame, so an empty window
+    shows up while the tasks load. Only the view in use is built, the other
+    one the first time it is switched to.
+    """
+    # tasks.db is used when there is one
+    USE_DATABASE = True
+    # Emitted once, when the first page of tasks has been put in the view
+    firstPageShown = pyqtSignal()
+    
+    def __init__(self):
+        super().__init__()
+        self.todo_list = None  # opened by open_tasks() after the first frame
+        self.reminders = None  # DueScheduler, started once the first page is shown
+        self.first_page_shown = False
+        self.settings = Settings()
+        self.current_theme = self.settings.get_theme()
+        self.current_view = self.settings.get_view()
+        self.current_filter = "all"
+        self.query_generation = 0
+        self.page_cursor = None  # where the next page of the current query starts
+        self.query_args = ("all", None, "", None)  # view, query, search text, sort
+        self.query_fields = set()  # task fields the current query depends on
+        self.smart_views = load_smart_views()  # name -> query string
+        self.query_pool = QThreadPool(self)
+        self.query_pool.setMaxThreadCount(1)
+        self.init_ui()
+        self.open_tasks_after_first_frame()
+        
+    def init_ui(self):
+        self.setWindowTitle("Todo List Manager")
+        self.setMinimumSize(1200, 800)
+        
+        if os.path.exists(ICON_PATH):
+            self.setWindowIcon(QIcon(ICON_PATH))
+        
+        # Main layout
+        main_widget = QWidget()
+        self.setCentralWidget(main_widget)
+        layout = QHBoxLayout()
+        main_widget.setLayout(layout)
+        
+        # Sidebar
+        self.sidebar = Sidebar()
+        self.sidebar.theme_toggle.clicked.connect(self.toggle_theme)
+        self.sidebar.nav_group.buttonClicked.connect(self.handle_navigation)
+        for name in self.smart_views:
+            self.sidebar.add_smart_view(name)
+        layout.addWidget(self.sidebar)
+        
+        # Main content area
+        content_layout = QVBoxLayout()
+        
+        # Search bar
+        self.search_bar = SearchBar()
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.filter_tasks)
+        self.search_bar.search_input.textChanged.connect(self.search_timer.start)
+        self.search_bar.save_view_btn.clicked.connect(self.save_smart_view)
+        content_layout.addWidget(self.search_bar)
+        
+        # Toolbar
+        toolbar_layout = QHBoxLayout()
+        
+        # View toggle
+        self.view_toggle = QButtonGroup()
+        list_view_btn = QRadioButton("List View")
+        card_view_btn = QRadioButton("Card View")
+        (list_view_btn if self.current_view == "list" else card_view_btn).setChecked(True)
+        self.view_toggle.addButton(list_view_btn)
+        self.view_toggle.addButton(card_view_btn)
+        
+        # Sort options
+        self.sort_combo = QComboBox()
+        self.sort_combo.addItems(list(SORT_KEYS))
+        self.sort_combo.currentTextChanged.connect(self.filter_tasks)
+        
+        for widget in [list_view_btn, card_view_btn, QLabel("Sort by:"), self.sort_combo]:
+            toolbar_layout.addWidget(widget)
+        
+        toolbar_layout.addStretch()
+        content_layout.addLayout(toolbar_layout)
+        
+        # Task container, holds the list and card views once they are built
+        self.stack_widget = QStackedWidget()
+        self.list_model = self.list_view = self.card_scroll = None
+        self.stack_widget.setCurrentWidget(self.view_widget(self.current_view))
+        content_layout.addWidget(self.stack_widget)
+        
+        # Connect view toggle
+        list_view_btn.toggled.connect(lambda: self.switch_view("list"))
+        card_view_btn.toggled.connect(lambda: self.switch_view("card"))
+        
+        # Floating add button
+        self.add_button = QToolButton(self)
+        self.add_button.setText("+")
+        self.add_button.setFixedSize(56, 56)
+        self.add_button.clicked.connect(self.add_task)
+        self.add_button.setObjectName("addButton")
+        
+        layout.addLayout(content_layout)
+        
+        # Position floating button
+        self.add_button.move(self.width() - 76, self.height() - 76)
+        
+        # Apply initial theme
+        self.apply_theme()
+    
+    def view_widget(self, view_type):
+        """The list view or the card area, built the first time it is asked for"""
+        if view_type == "list":
+            if self.list_view is None:
+                self.build_list_view()
+            return self.list_view
+        if self.card_scroll is None:
+            self.build_card_view()
+        return self.card_scroll
+    
+    def build_list_view(self):
+        # Rows are painted by the delegate so only visible ones cost anything
+        self.list_model = TaskListModel(self)
+        self.list_model.moreRequested.connect(self.fetch_more)
+        self.list_view = QListView()
+        self.list_view.setModel(self.list_model)
+        self.list_view.setItemDelegate(TaskItemDelegate(self.list_view))
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setMouseTracking(True)
+        self.list_view.doubleClicked.connect(self.edit_list_task)
+        self.list_view.setFrameShape(QFrame.NoFrame)
+        self.stack_widget.addWidget(self.list_view)
+    
+    def build_card_view(self):
+        self.card_scroll = CardScrollArea()
+        self.card_scroll.taskChanged.connect(self.handle_task_change)
+        self.card_scroll.taskDeleted.connect(self.handle_task_delete)
+        self.card_scroll.moreRequested.connect(self.fetch_more)
+        self.card_scroll.setFrameShape(QFrame.NoFrame)
+        self.stack_widget.addWidget(self.card_scroll)
+    
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # Update floating button position
+        self.add_button.move(self.width() - 76, self.height() - 76)
+    
+    def switch_view(self, view_type):
+        self.current_view = view_type
+        self.stack_widget.setCurrentWidget(self.view_widget(view_type))
+        self.load_tasks()
+    
+    def toggle_theme(self):
+        self.current_theme = "dark" if self.current_theme == "light" else "light"
+        self.apply_theme()
+    
+    def apply_theme(self):
+        # The task views have no stylesheet and just repaint with the new palette
+        apply_app_theme(self.current_theme,
+                        [self.sidebar, self.search_bar, self.sort_combo, self.add_button])
+    
+    def handle_navigation(self, button):
+        for name, btn in self.sidebar.nav_buttons.items():
+            if btn == button:
+                self.current_filter = name
+                break
+        self.filter_tasks()
+    
+    def filter_tasks(self):
+        """Start a background query for the current view, search text and sort order"""
+        self.search_timer.stop()
+        view, query = self.current_filter, None
+        if view.startswith(SMART_VIEW_PREFIX):
+            query = self.smart_views.get(view[len(SMART_VIEW_PREFIX):])
+            view = "all"
+        elif view not in FILTERS:
+            view = "all"
+        
+        # Plain words are a ranked search, anything else in the search bar is a query
+        search_text = self.search_bar.search_input.text().lower().strip()
+        self.search_bar.search_input.setToolTip("")
+        if search_text:
+            try:
+                plan = compile_query(search_text)
+            except QuerySyntaxError as e:
+                self.search_bar.search_input.setToolTip(str(e))
+                plan = None
+            if plan is not None and not plan.text_only:
+                query = f"{query} {search_text}" if query else search_text
+                search_text = ""
+        
+        self.query_args = (view, query, search_text, self.sort_combo.currentText())
+        self.query_fields = set(SORT_FIELDS.get(self.sort_combo.currentText(), ()))
+        self.query_fields |= filter_plan(view, query).fields
+        if search_text:
+            self.query_fields |= SEARCH_FIELDS
+        # Refreshing keeps as many rows as are loaded, so the view doesn't jump back
+        self.start_query(limit=max(PAGE_SIZE, len(self.shown_tasks().tasks)))
+    
+    def fetch_more(self):
+        """Load the page after the rows shown, when the view scrolled to the end"""
+        if self.page_cursor is not None:
+            self.start_query(after=self.page_cursor)
+    
+    def start_query(self, after=None, limit=PAGE_SIZE):
+        if after is None:
+            # A new query, the cursor of the old one belongs to another sort or filter
+            self.page_cursor = None
+        if self.todo_list is None:
+            # open_tasks() queries the current view once the task list is open
+            return
+        self.query_generation += 1
+        worker = TaskQueryWorker(
+            self.todo_list, self.query_generation,
+            lambda generation: generation == self.query_generation,
+            *self.query_args, after, limit)
+        worker.signals.finished.connect(self.show_query_results)
+        worker.signals.failed.connect(self.show_query_error)
+        self.query_pool.start(worker)
+    
+    def show_query_results(self, generation, task_ids, cursor, appended):
+        if generation != self.query_generation:
+            return
+        tasks = (self.todo_list.get_task(task_id) for task_id in task_ids)
+        self.page_cursor = cursor
+        self.display_tasks([task for task in tasks if task is not None], appended)
+    
+    def show_query_error(self, generation, message):
+        if generation != self.query_generation:
+            return
+        self.page_cursor = None
+        self.shown_tasks().has_more = False
+        self.statusBar().showMessage(f"Couldn't load tasks: {message}", 5000)
+    
+    def shown_tasks(self):
+        """The list model or the card area, whichever the current view uses"""
+        return self.list_model if self.current_view == "list" else self.card_scroll
+    
+    def display_tasks(self, tasks, appended=False):
+        shown = self.shown_tasks()
+        # Only the current view may ask for the next page of this query
+        for view in (self.list_model, self.card_scroll):
+            if view is not None:
+                view.has_more = False
+        shown.has_more = self.page_cursor is not None
+        if appended:
+            shown.append_tasks(tasks)
+        else:
+            shown.set_tasks(tasks)
+        self.first_page_loaded()
+    
+    def save_smart_view(self):
+        """Save the current view and search as a smart view in settings.json"""
+        view, query, search_text, _ = self.query_args
+        text = " ".join(part for part in (FILTERS[view], query, search_text) if part)
+        if not text:
+            QMessageBox.information(self, "Smart View", "Type a search or filter to save first.")
+            return
+        name, ok = QInputDialog.getText(self, "Save Smart View", f"Name for '{text}':")
+        name = name.strip()
+        if not ok or not name:
+            return
+        try:
+            save_smart_view(name, text)
+        except OSError as e:
+            QMessageBox.warning(self, "Smart View", f"Could not save settings.json: {e}")
+            return
+        self.smart_views[name] = text
+        button = self.sidebar.add_smart_view(name)
+        button.setChecked(True)
+        self.current_filter = SMART_VIEW_PREFIX + name
+        self.search_bar.search_input.clear()
+        self.filter_tasks()
+    
+    def handle_task_change(self, task_id, fields):
+        self.todo_list.update_task(task_id, fields)
+    
+    def handle_task_delete(self, task_id):
+        self.todo_list.delete_task(task_id)
+    
+    # Change events from the task list, only the affected row or card is touched
+    def task_added(self, task):
+        # Where a new task goes depends on the filter, search and sort order
+        self.filter_tasks()
+    
+    def task_updated(self, task_id, fields):
+        if self.query_fields.intersection(fields):
+            # The task may move or leave the view
+            self.filter_tasks()
+            return
+        task = self.todo_list.get_task(task_id)
+        if task is not None:
+            for view in (self.list_model, self.card_scroll):
+                if view is not None:
+                    view.update_task(task)
+    
+    def task_deleted(self, task_id):
+        for view in (self.list_model, self.card_scroll):
+            if view is not None:
+                view.remove_task(task_id)
+    
+    def tasks_changed(self, changes):
+        self.filter_tasks()
+    
+    def load_tasks(self):
+        self.filter_tasks()
+    
+    def edit_list_task(self, index):
+        task = index.data(Qt.UserRole)
+        dialog = TaskEditDialog(self, task)
+        if dialog.exec_():
+            self.todo_list.update_task(task["id"], dialog.get_task_data())
+    
+    def add_task(self):
+        if self.todo_list is None:
+            return
+        dialog = TaskEditDialog(self)
+        if dialog.exec_():
+            task_data = dialog.get_task_data()
+            task_data["completed"] = False
+            task_data["created_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.todo_list.add_task(task_data)
+
+def main():
+    app = QApplication(sys.argv)
+    app.setStyle('Fusion')
+    window = ModernTodoApp()
+    window.show()
+    sys.exit(app.exec_())
+
+if __name__ == '__main__':
     main() 
\ No newline at end of file
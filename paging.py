@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import json
+import base64
+from collections import namedtuple
+
+from task_query import compile_query
+
+# Tasks per page when the caller doesn't ask for a size
+PAGE_SIZE = 50
+
+# Built-in views and the query each of them runs
+FILTERS = {"all": "", "pending": "pending", "today": "due:today", "upcoming": "due>today",
+           "completed": "completed"}
+
+
+class Page(namedtuple("Page", "tasks cursor")):
+    """One page of tasks, cursor is None on the last page"""
+    __slots__ = ()
+
+
+def encode_cursor(position):
+    """Opaque, URL-safe cursor for a position in a result order"""
+    data = json.dumps(position, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Position stored in a cursor made by encode_cursor"""
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}") from None
+
+
+def entry_cursor(cursor, sort):
+    """(key, id) entry of a sorted view stored in a cursor, None for the first page.
+
+    Cursors name the sort order they were made for, a key of one order
+    means nothing in another, so a cursor of another sort is rejected.
+    """
+    if cursor is None:
+        return None
+    position = decode_cursor(cursor)
+    if not (isinstance(position, list) and len(position) == 3 and type(position[2]) is int):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if position[0] != sort:
+        raise ValueError(f"Cursor doesn't belong to sort {sort!r}")
+    return tuple(position[1:])
+
+
+def offset_cursor(cursor):
+    """Offset into a ranked result list stored in a cursor, 0 for the first page"""
+    if cursor is None:
+        return 0
+    position = decode_cursor(cursor)
+    if type(position) is not int or position < 0:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return position
+
+
+def filter_plan(name, query=None):
+    """Compiled query of one of FILTERS, narrowed down by an optional query string"""
+    if name not in FILTERS:
+        raise ValueError(f"Unknown filter: {name}")
+    return compile_query(" ".join(part for part in (FILTERS[name], query) if part))
+
+
+def page_entries(entries, get_task, accept, limit, sort):
+    """Collect a page from (key, id) entries that follow the cursor.
+
+    Entries are only read until one past the page, so the cost is the
+    page size plus the tasks the filter skips, not the task count.
+    """
+    tasks = []
+    last = None
+    for entry in entries:
+        task = get_task(entry[1])
+        if task is None or (accept is not None and not accept(task)):
+            continue
+        if len(tasks) == limit:
+            return Page(tasks, encode_cursor([sort, *last]))
+        tasks.append(task)
+        last = entry
+    return Page(tasks, None)
+
+
+def page_ranked(task_ids, get_task, accept, offset, limit):
+    """Collect a page from a ranked id list, such as search results"""
+    tasks = []
+    for position in range(offset, len(task_ids)):
+        task = get_task(task_ids[position])
+        if task is None or (accept is not None and not accept(task)):
+            continue
+        if len(tasks) == limit:
+            return Page(tasks, encode_cursor(position))
+        tasks.append(task)
+    return Page(tasks, None)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+import time
+import heapq
+import itertools
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from changes import TaskObserver
+
+# Longest sleep between looks at the clock, in case it jumped as after a suspend
+MAX_WAIT = 3600
+# Seconds between looks for changes other processes made, while run() waits
+REFRESH_INTERVAL = 1.0
+
+# kind is "due" when the due day starts and "overdue" once it has passed
+Reminder = namedtuple("Reminder", "kind task when")
+
+
+@lru_cache(maxsize=4096)
+def due_times(due_date):
+    """(start of the due day, start of the day after) as local timestamps, None if no date"""
+    try:
+        day = datetime.strptime(due_date[:10], "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+    return day.timestamp(), (day + timedelta(days=1)).timestamp()
+
+
+class DueScheduler(TaskObserver):
+    """Min-heap of the next due or overdue moment of every open task with a due date.
+
+    The heap is built once from the task list and then kept up to date by
+    its change events, so only changed tasks are looked at again. Every
+    task has at most one live entry, entries replaced by a change stay in
+    the heap and are skipped when they come up. Nothing is polled:
+    next_deadline() tells when fire_due() will have something to report,
+    and callers sleep until then. clock returns the current time as a
+    timestamp, tests pass one they control.
+    """
+
+    def __init__(self, todo_list, clock=time.time):
+        self.todo_list = todo_list
+        self.clock = clock
+        self.heap = []  # [time, sequence, task id, kind]
+        self.live = {}  # task id -> sequence of its live entry
+        self.sequence = itertools.count()
+        self.listeners = []
+        self.wakeups = []
+        now = clock()
+        for task_id, due_date in todo_list.get_due_dates():
+            entry = self._entry(task_id, due_date, now)
+            if entry is not None:
+                self.heap.append(entry)
+        heapq.heapify(self.heap)
+        todo_list.add_listener(self)
+
+    def close(self):
+        self.todo_list.remove_listener(self)
+
+    def add_listener(self, listener):
+        """Call listener(reminders) with the list of Reminders each time some fire"""
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def add_wakeup(self, callback):
+        """Call callback() when a change moves the next deadline earlier, to sleep less"""
+        self.wakeups.append(callback)
+
+    def __len__(self):
+        return len(self.live)
+
+    def _entry(self, task_id, due_date, now):
+        """Heap entry for the next reminder of an open task, None if it gets none"""
+        times = due_times(due_date)
+        if times is None:
+            self.live.pop(task_id, None)
+            return None
+        sequence = next(self.sequence)
+        self.live[task_id] = sequence
+        # A task already past its due day only gets the overdue reminder
+        if now >= times[1]:
+            return [times[1], sequence, task_id, "overdue"]
+        return [times[0], sequence, task_id, "due"]
+
+    def schedule(self, task):
+        """(Re)schedule a task after its due date or completion changed"""
+        if task.get("completed", False):
+            self.unschedule(task["id"])
+            return
+        entry = self._entry(task["id"], task.get("due_date"), self.clock())
+        if entry is not None:
+            heapq.heappush(self.heap, entry)
+
+    def unschedule(self, task_id):
+        self.live.pop(task_id, None)
+
+    def next_deadline(self):
+        """Timestamp of the next reminder, None if no open task has a due date"""
+        heap = self.heap
+        while heap and self.live.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def fire_due(self):
+        """Report every reminder whose time has come and return them"""
+        now = self.clock()
+        heap, live = self.heap, self.live
+        reminders = []
+        while heap and heap[0][0] <= now:
+            when, sequence, task_id, kind = heapq.heappop(heap)
+            if live.get(task_id) != sequence:
+                continue
+            task = self.todo_list.get_task(task_id)
+            times = due_times(task.get("due_date")) if task is not None else None
+            if times is None or task.get("completed", False):
+                # Gone, done or without a due date through a change that wasn't reported
+                del live[task_id]
+                continue
+            if kind == "due":
+                # Comes back once the due day is over, right away if it already is
+                overdue_at = times[1]
+                live[task_id] = next(self.sequence)
+                heapq.heappush(heap, [overdue_at, live[task_id], task_id, "overdue"])
+                if overdue_at <= now:
+                    continue
+            else:
+                del live[task_id]
+            reminders.append(Reminder(kind, task, when))
+        if reminders:
+            for listener in list(self.listeners):
+                listener(reminders)
+        return reminders
+
+    def run(self, stop=None, refresh_interval=REFRESH_INTERVAL):
+        """Fire reminders as they come due until stop, a threading.Event, is set.
+
+        Sleeps until the next deadline, waking every refresh_interval to
+        pick up changes other processes made to the task list.
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.todo_list.refresh()
+            self.fire_due()
+            deadline = self.next_deadline()
+            timeout = refresh_interval
+            if deadline is not None:
+                timeout = min(timeout, max(0, deadline - self.clock()))
+            stop.wait(min(timeout, MAX_WAIT))
+
+    def __call__(self, changes):
+        before = self.next_deadline()
+        super().__call__(changes)
+        after = self.next_deadline()
+        if after is not None and (before is None or after < before):
+            for callback in list(self.wakeups):
+                callback()
+
+    def task_added(self, task):
+        self.schedule(task)
+
+    def task_updated(self, task_id, fields):
+        if "due_date" in fields or "completed" in fields:
+            task = self.todo_list.get_task(task_id)
+            if task is not None:
+                self.schedule(task)
+
+    def task_deleted(self, task_id):
+        self.unschedule(task_id)
+
+
+def describe(reminders):
+    """One line for a list of reminders, naming the task when there is only one"""
+    if len(reminders) == 1:
+        reminder = reminders[0]
+        state = "is due today" if reminder.kind == "due" else "is overdue"
+        return f"{reminder.task['title']} {state} (due {reminder.task['due_date']})"
+    due = sum(reminder.kind == "due" for reminder in reminders)
+    parts = [f"{due} due today" if due else "",
+             f"{len(reminders) - due} overdue" if len(reminders) > due else ""]
+    return f"{len(reminders)} tasks: " + ", ".join(part for part in parts if part)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+import re
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Field bits stored in the postings, title hits rank above description hits
+TITLE = 2
+DESCRIPTION = 1
+
+GRAM_SIZE = 3
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def grams(token):
+    """All substrings of token up to GRAM_SIZE characters long"""
+    return {token[i:i + n] for n in range(1, GRAM_SIZE + 1)
+            for i in range(len(token) - n + 1)}
+
+
+class SearchIndex:
+    """Incremental inverted index over task titles and descriptions.
+
+    Every token maps to the ids of the tasks containing it, together with
+    the fields it occurs in. Every 1-3 character gram maps to the tokens
+    containing it, so a query word is matched as a substring of tokens
+    (the same results as ``word in text.lower()``) without scanning tasks.
+    """
+
+    def __init__(self):
+        self.postings = {}  # token -> {task id: field bits}
+        self.gram_tokens = {}  # gram -> set of tokens
+        self.task_tokens = {}  # task id -> {token: field bits}
+
+    def rebuild(self, tasks):
+        """Index a full task list from scratch"""
+        self.postings = {}
+        self.gram_tokens = {}
+        self.task_tokens = {}
+        for task in tasks:
+            self.add(task)
+
+    def add(self, task):
+        """Index a new task"""
+        fields = {}
+        for token in tokenize(task.get("title")):
+            fields[token] = fields.get(token, 0) | TITLE
+        for token in tokenize(task.get("description")):
+            fields[token] = fields.get(token, 0) | DESCRIPTION
+        self.task_tokens[task["id"]] = fields
+        for token, bits in fields.items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = {}
+                for gram in grams(token):
+                    self.gram_tokens.setdefault(gram, set()).add(token)
+            posting[task["id"]] = bits
+
+    def remove(self, task_id):
+        """Drop a task from the index"""
+        for token in self.task_tokens.pop(task_id, ()):
+            posting = self.postings[token]
+            del posting[task_id]
+            if not posting:
+                del self.postings[token]
+                for gram in grams(token):
+                    tokens = self.gram_tokens[gram]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self.gram_tokens[gram]
+
+    def update(self, task):
+        """Re-index a task whose title or description changed"""
+        self.remove(task["id"])
+        self.add(task)
+
+    def matching_tokens(self, word):
+        """Indexed tokens that contain word as a substring"""
+        if len(word) <= GRAM_SIZE:
+            return self.gram_tokens.get(word, ())
+        # Start from the rarest trigram, then confirm the whole word
+        smallest = None
+        for i in range(len(word) - GRAM_SIZE + 1):
+            tokens = self.gram_tokens.get(word[i:i + GRAM_SIZE])
+            if not tokens:
+                return ()
+            if smallest is None or len(tokens) < len(smallest):
+                smallest = tokens
+        return [token for token in smallest if word in token]
+
+    def match_word(self, word):
+        """Map of task id -> field bits for tasks with a token containing word"""
+        tokens = self.matching_tokens(word)
+        if len(tokens) == 1:
+            return self.postings[next(iter(tokens))]
+        hits = {}
+        for token in tokens:
+            for task_id, bits in self.postings[token].items():
+                hits[task_id] = hits.get(task_id, 0) | bits
+        return hits
+
+    def search(self, text, get_task=None):
+        """Return ids of tasks matching text, title hits first.
+
+        A query made of one word is answered from the index alone. For
+        longer queries the index narrows the candidates and ``get_task`` is
+        used to check the whole phrase against the task text.
+        """
+        query = text.lower()
+        words = TOKEN_RE.findall(query)
+        if not words:
+            return []
+
+        # Intersect starting from the word with the fewest hits
+        word_hits = sorted((self.match_word(word) for word in set(words)), key=len)
+        hits = word_hits[0]
+        for other in word_hits[1:]:
+            hits = {task_id: bits & other[task_id]
+                    for task_id, bits in hits.items() if task_id in other}
+            if not hits:
+                return []
+
+        if words != [query] and get_task is not None:
+            # The phrase may span punctuation or spaces, check it against the text
+            checked = {}
+            for task_id in hits:
+                task = get_task(task_id)
+                bits = 0
+                if query in task["title"].lower():
+                    bits |= TITLE
+                if query in (task.get("description") or "").lower():
+                    bits |= DESCRIPTION
+                if bits:
+                    checked[task_id] = bits
+            hits = checked
+
+        ids = sorted(hits)
+        return ([task_id for task_id in ids if hits[task_id] & TITLE] +
+                [task_id for task_id in ids if not hits[task_id] & TITLE])
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+from bisect import bisect_left, bisect_right, insort
+
+PRIORITY_ORDER = {'High': 0, 'Medium': 1, 'Low': 2}
+
+
+def title_key(title):
+    """Case-insensitive sort key of a title, SQLite sorts with it too"""
+    return title.lower()
+
+
+# Greater than any task id, bisects past every entry with a given key
+INFINITY = float('inf')
+
+SORT_KEYS = {
+    'Due Date': lambda task: task.get("due_date") or "",
+    'Priority': lambda task: PRIORITY_ORDER.get(task.get("priority", "Medium"), 1),
+    'Title': lambda task: title_key(task["title"])
+}
+
+
+class SortedView:
+    """Task ids kept in the order of key(task), updated one task at a time.
+
+    Entries are (key, id) tuples in a sorted list, so ties keep id order
+    and every change is a bisect plus one list insert or delete.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.entries = []
+        self.entry_by_id = {}
+
+    def rebuild(self, tasks):
+        """Sort a full task list from scratch"""
+        self.entry_by_id = {task["id"]: (self.key(task), task["id"]) for task in tasks}
+        self.entries = sorted(self.entry_by_id.values())
+
+    def add(self, task):
+        """Insert a new task at its sorted position"""
+        entry = (self.key(task), task["id"])
+        self.entry_by_id[task["id"]] = entry
+        insort(self.entries, entry)
+
+    def patch(self, removed_ids, tasks):
+        """Drop removed_ids and add or move tasks in one go, for batches of changes.
+
+        Tasks whose key didn't change are left alone. Stale entries are
+        bisected out when there are few of them and filtered out in one
+        pass otherwise, new entries are appended and sorted in once.
+        """
+        stale = []
+        new_entries = []
+        for task_id in removed_ids:
+            entry = self.entry_by_id.pop(task_id, None)
+            if entry is not None:
+                stale.append(entry)
+        for task in tasks:
+            entry = (self.key(task), task["id"])
+            old = self.entry_by_id.get(task["id"])
+            if old == entry:
+                continue
+            if old is not None:
+                stale.append(old)
+            self.entry_by_id[task["id"]] = entry
+            new_entries.append(entry)
+        if len(stale) <= 64:
+            for entry in stale:
+                del self.entries[bisect_left(self.entries, entry)]
+        else:
+            stale = set(stale)
+            self.entries = [entry for entry in self.entries if entry not in stale]
+        if len(new_entries) <= 64:
+            for entry in new_entries:
+                insort(self.entries, entry)
+        else:
+            self.entries.extend(new_entries)
+            self.entries.sort()
+
+    def remove(self, task_id):
+        """Drop a task from the view"""
+        entry = self.entry_by_id.pop(task_id, None)
+        if entry is not None:
+            del self.entries[bisect_left(self.entries, entry)]
+
+    def update(self, task):
+        """Move a task if its sort key changed"""
+        entry = self.entry_by_id.get(task["id"])
+        if entry is None or entry[0] != self.key(task):
+            self.remove(task["id"])
+            self.add(task)
+
+    def ids(self, start=0, stop=None):
+        """Task ids in sorted order, optionally only the rows start to stop"""
+        return [task_id for _, task_id in self.entries[start:stop]]
+
+    def key_range(self, low=None, high=None, low_inclusive=True, high_inclusive=True):
+        """(start, stop) rows of the tasks whose key lies between low and high, None is open"""
+        entries = self.entries
+        if low is None:
+            start = 0
+        elif low_inclusive:
+            start = bisect_left(entries, (low,))
+        else:
+            start = bisect_right(entries, (low, INFINITY))
+        if high is None:
+            stop = len(entries)
+        elif high_inclusive:
+            stop = bisect_right(entries, (high, INFINITY))
+        else:
+            stop = bisect_left(entries, (high,))
+        return start, max(start, stop)
+
+    def entries_after(self, entry=None, chunk=256):
+        """Entries after entry in sorted order, from the start when entry is None.
+
+        Reads a chunk at a time and bisects again from the last entry it
+        returned, so changes to the view in between never skip or repeat one.
+        """
+        entries = self.entries
+        start = 0 if entry is None else bisect_right(entries, entry)
+        while True:
+            part = entries[start:start + chunk]
+            if not part:
+                return
+            yield from part
+            entries = self.entries
+            start = bisect_right(entries, part[-1])
+
+
+def id_view(task_ids):
+    """SortedView in id order, built from the ids alone so no task is read"""
+    view = SortedView(lambda task: task["id"])
+    task_ids = sorted(task_ids)
+    view.entries = [(task_id, task_id) for task_id in task_ids]
+    view.entry_by_id = dict(zip(task_ids, view.entries))
+    return view
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from storage import iter_json_array, open_snapshot
+from blob_store import BlobStore, attach_blobs
+from archive import TaskArchive
+from search_index import SearchIndex
+from changes import Batch, ChangeSet
+from sorted_views import title_key
+from paging import (PAGE_SIZE, Page, encode_cursor, entry_cursor, offset_cursor, filter_plan,
+                    page_ranked)
+
+COLUMNS = ("id", "title", "description", "due_date", "priority", "category",
+           "completed", "created_at", "completed_at")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    due_date TEXT,
+    priority TEXT,
+    category TEXT,
+    completed INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    completed_at TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks (due_date);
+CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks (category);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority);
+CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks (completed);
+CREATE INDEX IF NOT EXISTS idx_tasks_due_order ON tasks (COALESCE(due_date, ''), id);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority_order
+    ON tasks (CASE priority WHEN 'High' THEN 0 WHEN 'Low' THEN 2 ELSE 1 END, id);
+DROP INDEX IF EXISTS idx_tasks_title_order;
+CREATE INDEX IF NOT EXISTS idx_tasks_title_key ON tasks (title_key(title), id);
+CREATE TABLE IF NOT EXISTS task_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id INTEGER NOT NULL,
+    op TEXT NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS log_task_add AFTER INSERT ON tasks
+BEGIN INSERT INTO task_changes (task_id, op) VALUES (NEW.id, 'add'); END;
+CREATE TRIGGER IF NOT EXISTS log_task_update AFTER UPDATE ON tasks
+BEGIN INSERT INTO task_changes (task_id, op) VALUES (NEW.id, 'update'); END;
+CREATE TRIGGER IF NOT EXISTS log_task_delete AFTER DELETE ON tasks
+BEGIN INSERT INTO task_changes (task_id, op) VALUES (OLD.id, 'delete'); END;
+"""
+
+# Rows of task_changes kept for processes that haven't refreshed yet
+CHANGE_LOG_ROWS = 10000
+
+# Sort keys matching sorted_views.SORT_KEYS, None is id order. SCHEMA has an index on
+# each of them, so a page is an index seek.
+SORT_COLUMNS = {
+    "Due Date": "COALESCE(due_date, '')",
+    "Priority": "CASE priority WHEN 'High' THEN 0 WHEN 'Low' THEN 2 ELSE 1 END",
+    "Title": "title_key(title)",
+    None: "id"
+}
+
+# ORDER BY clauses for SORT_COLUMNS, ties keep id order
+SORT_ORDERS = {name: f"{column}, id" for name, column in SORT_COLUMNS.items() if name is not None}
+
+INSERT_SQL = (f"INSERT OR REPLACE INTO tasks ({', '.join(COLUMNS)}, extra) "
+              f"VALUES ({', '.join('?' * (len(COLUMNS) + 1))})")
+
+
+def task_to_row(task):
+    """Split a task dict into column values plus a JSON blob of unknown keys"""
+    extra = {key: value for key, value in task.items() if key not in COLUMNS}
+    return (task.get("id"), task.get("title", ""), task.get("description") or "",
+            task.get("due_date"), task.get("priority"), task.get("category"),
+            1 if task.get("completed") else 0, task.get("created_at"),
+            task.get("completed_at"), json.dumps(extra) if extra else None)
+
+
+def row_to_task(row):
+    """Turn a database row back into a task dict"""
+    task = dict(zip(COLUMNS, row[:-1]))
+    task["completed"] = bool(task["completed"])
+    if row[-1]:
+        task.update(json.loads(row[-1]))
+    return task
+
+
+class SqliteTodoList:
+    """TodoList backend that keeps tasks in an indexed SQLite database"""
+
+    def __init__(self, filename="tasks.db"):
+        self.filename = filename
+        # The GUI runs queries from a worker thread, the lock serializes access
+        self.conn = sqlite3.connect(filename, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # SQLite's LOWER() only folds ASCII, titles sort by the key the other backends use
+        self.conn.create_function("title_key", 1, title_key, deterministic=True)
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        # Built on the first search, then kept up to date by the mutations
+        self.search_index = None
+        self.listeners = []
+        # Newest task_changes row this connection has seen or written
+        self.change_seq = self._last_change()
+
+    def flush(self):
+        """Every change is committed right away, nothing to write"""
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+    def refresh(self):
+        """Pick up what other processes committed, returned as a ChangeSet.
+
+        Triggers log every insert, update and delete to task_changes, so
+        this reads the rows after the last one seen here and only fetches
+        the tasks they name. Every commit does the same first.
+        """
+        with self.lock:
+            changes = self._read_changes()
+        if changes:
+            self._notify(changes)
+        return changes
+
+    def watched_paths(self):
+        """Files that change when another process commits"""
+        return [self.filename, f"{self.filename}-wal"]
+
+    def _last_change(self):
+        return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM task_changes").fetchone()[0]
+
+    def _read_changes(self):
+        """ChangeSet of the logged changes after change_seq, with the lock held"""
+        changes = ChangeSet()
+        rows = self.conn.execute("SELECT seq, task_id, op FROM task_changes WHERE seq > ? "
+                                 "ORDER BY seq", (self.change_seq,)).fetchall()
+        if not rows:
+            return changes
+        oldest = self.conn.execute("SELECT MIN(seq) FROM task_changes").fetchone()[0]
+        if oldest > self.change_seq + 1 and self.search_index is not None:
+            # Rows were pruned before this connection read them, the index can't catch up
+            self.search_index = None
+        self.change_seq = rows[-1][0]
+        task_ids = list({task_id for _, task_id, _ in rows})
+        tasks = {}
+        for start in range(0, len(task_ids), 500):
+            part = task_ids[start:start + 500]
+            for task in self._query(f"WHERE id IN ({', '.join('?' * len(part))})", part):
+                tasks[task["id"]] = task
+        for _, task_id, op in rows:
+            task = tasks.get(task_id)
+            if op == "delete":
+                changes.delete(task_id)
+            elif task is None:
+                continue  # deleted again later on
+            elif op == "add":
+                changes.add(task)
+            else:
+                # The log doesn't say which fields, report them all
+                changes.update(task_id, task)
+        self._update_index(changes, tasks)
+        return changes
+
+    def _update_index(self, changes, tasks):
+        if self.search_index is None:
+            return
+        for task_id in changes.deleted:
+            self.search_index.remove(task_id)
+        for task_id in changes.updated:
+            self.search_index.update(tasks[task_id])
+        # The index may already have a task whose add is only read now
+        for task in changes.added.values():
+            self.search_index.update(task)
+
+    def _query(self, where="", params=()):
+        sql = f"SELECT {', '.join(COLUMNS)}, extra FROM tasks {where}"
+        with self.lock:
+            return [row_to_task(row) for row in self.conn.execute(sql, params)]
+
+    def add_listener(self, listener):
+        """Call listener(changes) with a ChangeSet after every mutation or batch.
+
+        A TaskObserver is such a listener and turns the ChangeSet into typed
+        added/updated/deleted/bulk events.
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def _notify(self, changes):
+        for listener in list(self.listeners):
+            listener(changes)
+
+    def batch(self):
+        """Collect many adds, updates and deletes and commit them in one transaction"""
+        return Batch(self)
+
+    def _new_task(self, task, keep_created=False):
+        """Task dict ready to insert, the database assigns its id"""
+        task = dict(task)
+        task.pop("id", None)
+        if not (keep_created and task.get("created_at")):
+            task["created_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return task
+
+    def add_task(self, task):
+        """Add a new task"""
+        task["created_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        task.pop("id", None)
+        self._commit_batch([("add", task)])
+        return task
+
+    def add_tasks(self, tasks):
+        """Add a batch of new tasks in one transaction"""
+        added = [self._new_task(task, keep_created=True) for task in tasks]
+        self._commit_batch([("add", task) for task in added])
+        return added
+
+    def update_task(self, task_id, updated_data):
+        """Update an existing task"""
+        changes = self._commit_batch([("update", task_id, updated_data)])
+        return self.get_task(task_id) if changes else None
+
+    def delete_task(self, task_id):
+        """Delete a task"""
+        return bool(self._commit_batch([("delete", task_id)]))
+
+    def _commit_batch(self, ops):
+        """Apply the operations of a Batch in one transaction and notify once"""
+        changes = ChangeSet()
+        updated = {}
+        with self.lock:
+            with self.conn:
+                # Holding the write lock from the start, no other commit can slip in
+                # between the changes read here and the ones written below
+                self.conn.execute("BEGIN IMMEDIATE")
+                external = self._read_changes()
+                for op in ops:
+                    if op[0] == "add":
+                        task = op[1]
+                        cursor = self.conn.execute(INSERT_SQL, task_to_row(task))
+                        task["id"] = cursor.lastrowid
+                        changes.add(task)
+                    elif op[0] == "update":
+                        _, task_id, fields = op
+                        # A task added earlier in the batch keeps its record up to date
+                        task = changes.added.get(task_id) or self.get_task(task_id)
+                        if task is None:
+                            continue
+                        task.update(fields)
+                        task["id"] = task_id
+                        self.conn.execute(
+                            f"UPDATE tasks SET {', '.join(f'{col} = ?' for col in COLUMNS[1:])}, "
+                            "extra = ? WHERE id = ?", task_to_row(task)[1:] + (task_id,))
+                        updated[task_id] = task
+                        changes.update(task_id, fields)
+                    elif op[0] == "delete":
+                        cursor = self.conn.execute("DELETE FROM tasks WHERE id = ?", (op[1],))
+                        if cursor.rowcount > 0:
+                            changes.delete(op[1])
+                self.change_seq = self._last_change()
+                self.conn.execute("DELETE FROM task_changes WHERE seq <= ?",
+                                  (self.change_seq - CHANGE_LOG_ROWS,))
+            self._update_index(changes, updated)
+        if external:
+            self._notify(external)
+        if changes:
+            self._notify(changes)
+        return changes
+
+    # The database keeps every task, include_archived is accepted for TodoList compatibility
+    def get_tasks(self, include_archived=False):
+        """Get all tasks"""
+        return self._query("ORDER BY id")
+
+    def iter_tasks(self, include_archived=False, chunk_size=1000):
+        """Yield every task in id order, reading chunk_size rows at a time"""
+        last_id = 0
+        while True:
+            tasks = self._query("WHERE id > ? ORDER BY id LIMIT ?", (last_id, chunk_size))
+            yield from tasks
+            if len(tasks) < chunk_size:
+                return
+            last_id = tasks[-1]["id"]
+
+    def get_task(self, task_id):
+        """Get a specific task by ID"""
+        tasks = self._query("WHERE id = ?", (task_id,))
+        return tasks[0] if tasks else None
+
+    def search(self, text, include_archived=False):
+        """Get ids of tasks whose title or description contains text, title hits first"""
+        with self.lock:
+            if self.search_index is None:
+                self.search_index = SearchIndex()
+                rows = self.conn.execute("SELECT id, title, description FROM tasks")
+                for task_id, title, description in rows:
+                    self.search_index.add({"id": task_id, "title": title,
+                                           "description": description})
+            return self.search_index.search(text, self.get_task)
+
+    def get_sorted_ids(self, sort_by, start=0, stop=None, include_archived=False):
+        """Get task ids ordered by one of SORT_ORDERS, optionally only rows start to stop"""
+        limit = -1 if stop is None else max(0, stop - start)
+        sql = f"SELECT id FROM tasks ORDER BY {SORT_ORDERS[sort_by]} LIMIT ? OFFSET ?"
+        with self.lock:
+            return [row[0] for row in self.conn.execute(sql, (limit, start))]
+
+    def get_page(self, filter="all", sort=None, after=None, limit=PAGE_SIZE, search=None,
+                 include_archived=False, query=None):
+        """Get one page of tasks and the cursor of the next page, like TodoList.get_page.
+
+        Pages are keyset queries, rows after the (key, id) of the cursor,
+        so the database seeks in a sort index instead of counting its way
+        through the rows before the page like OFFSET does.
+        """
+        if limit < 1:
+            raise ValueError(f"limit must be at least 1, not {limit}")
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unknown sort: {sort}")
+        plan = filter_plan(filter, query)
+        if search:
+            return page_ranked(self.search(search), self.get_task, plan.predicate(),
+                               offset_cursor(after), limit)
+        # The query compiles to conditions on the indexed columns
+        condition, params = plan.sql()
+        key = SORT_COLUMNS[sort]
+        position = entry_cursor(after, sort)
+        if position is not None and sort is None:
+            condition += " AND id > ?"
+            params.append(position[1])
+        elif position is not None:
+            # Spelled out rather than as a row value, which SQLite can't seek an index with
+            condition += f" AND {key} >= ? AND ({key} > ? OR id > ?)"
+            params.extend((position[0], position[0], position[1]))
+        sql = (f"SELECT {key}, {', '.join(COLUMNS)}, extra FROM tasks WHERE {condition} "
+               f"ORDER BY {key}, id LIMIT ?")
+        with self.lock:
+            rows = self.conn.execute(sql, params + [limit + 1]).fetchall()
+        tasks = [row_to_task(row[1:]) for row in rows[:limit]]
+        if len(rows) <= limit:
+            return Page(tasks, None)
+        last = rows[limit - 1]
+        return Page(tasks, encode_cursor([sort, last[0], last[1]]))
+
+    def get_tasks_due_on(self, day):
+        """Get tasks due on the given YYYY-MM-DD date"""
+        return self._query("WHERE due_date = ? ORDER BY id", (day,))
+
+    def get_tasks_due_after(self, day):
+        """Get tasks due after the given YYYY-MM-DD date"""
+        return self._query("WHERE due_date > ? ORDER BY due_date, id", (day,))
+
+    def get_due_dates(self):
+        """(id, due date) of every task not completed that has a due date"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT id, due_date FROM tasks WHERE completed = 0 AND due_date > ''").fetchall()
+
+    def get_completed_tasks(self, include_archived=False):
+        """Get all completed tasks"""
+        return self._query("WHERE completed = 1 ORDER BY id")
+
+    def import_json(self, json_filename, batch_size=1000):
+        """Stream tasks from a tasks.json file and its archive into the database.
+
+        Everything is written in one transaction, and the task_changes rows
+        its triggers logged are dropped before it commits: a migration isn't
+        a change for other connections to replay one task at a time.
+        """
+        # Archived tasks first, a copy still in tasks.json replaces them
+        archive = TaskArchive(f"{os.path.splitext(json_filename)[0]}.archive")
+        archived = archive.open()
+        blobs = BlobStore(f"{json_filename}.blobs")
+        try:
+            with self.lock, self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                logged = self._last_change()
+                self.conn.executemany(INSERT_SQL,
+                                      (task_to_row(task) for task in archived.values()))
+                count = len(archived)
+                batch = []
+                with open_snapshot(json_filename) as f:
+                    for task in iter_json_array(f):
+                        batch.append(task_to_row(attach_blobs(task, blobs, lazy=False)))
+                        if len(batch) >= batch_size:
+                            self.conn.executemany(INSERT_SQL, batch)
+                            count += len(batch)
+                            batch = []
+                if batch:
+                    self.conn.executemany(INSERT_SQL, batch)
+                    count += len(batch)
+                # Changes not yet compacted into the snapshot live in the journal
+                for path in (f"{json_filename}.journal.old", f"{json_filename}.journal"):
+                    if os.path.exists(path):
+                        self._replay_journal(path, blobs)
+                self.conn.execute("DELETE FROM task_changes WHERE seq > ?", (logged,))
+        finally:
+            blobs.close()
+        # Built before the import, it doesn't have the imported tasks
+        self.search_index = None
+        return count
+
+    def _replay_journal(self, path, blobs):
+        """Apply the records of a tasks.json journal within import_json()'s transaction"""
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if record["op"] == "add":
+                    self.conn.execute(INSERT_SQL, task_to_row(
+                        attach_blobs(record["task"], blobs, lazy=False)))
+                elif record["op"] == "update":
+                    task = self.get_task(record["id"])
+                    if task is not None:
+                        task.update(attach_blobs(record["fields"], blobs, lazy=False))
+                        self.conn.execute(INSERT_SQL, task_to_row(task))
+                elif record["op"] == "delete":
+                    self.conn.execute("DELETE FROM tasks WHERE id = ?", (record["id"],))
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        print("Usage: sqlite_store.py TASKS_JSON [TASKS_DB]")
+        sys.exit(1)
+    db = SqliteTodoList(sys.argv[2] if len(sys.argv) == 3 else "tasks.db")
+    count = db.import_json(sys.argv[1])
+    db.close()
+    print(f"Imported {count} tasks into {db.filename}")
+
+
+if __name__ == "__main__":
+    main()
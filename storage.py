@@ -0,0 +1,723 @@
+#!/usr/bin/env python3
+
+import os
+import io
+import copy
+import json
+import mmap
+import time
+import uuid
+import hashlib
+import threading
+
+from blob_store import BLOB_THRESHOLD, BlobRef, BlobStore, store_blobs, attach_blobs
+from file_lock import FileLock
+
+SNAPSHOT_MAGIC = b"#todo-snapshot v1"
+# Fixed-width header so it can be written last, once the body has been hashed
+SNAPSHOT_HEADER = "#todo-snapshot v1 sha256={digest} length={length:020d}\n"
+SNAPSHOT_HEADER_SIZE = len(SNAPSHOT_HEADER.format(digest="0" * 64, length=0))
+SNAPSHOT_BACKUPS = 3
+
+
+class CorruptSnapshotError(ValueError):
+    """Raised when a snapshot and all of its backups fail validation"""
+
+
+def encode_task(obj):
+    """json ``default`` hook for task records that are not plain dicts"""
+    if type(obj) is BlobRef:
+        return {"$blob": [obj.offset, obj.length]}
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return to_dict()
+
+
+def file_stamp(path):
+    """(inode, size, mtime) of a file, or None when it doesn't exist, different after any write"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def write_json_atomic(filename, data):
+    """Write data as JSON to a temp file, fsync it and rename it over filename"""
+    tmp_name = f"{filename}.tmp"
+    with open(tmp_name, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_name, filename)
+
+
+def write_snapshot(filename, tasks, backups=SNAPSHOT_BACKUPS, blobs=None):
+    """Atomically write tasks as a checksummed snapshot, keeping older ones as backups.
+
+    The JSON body is streamed to ``<filename>.tmp`` while it is hashed, the
+    header with the SHA-256 and length is filled in afterwards and the file
+    is fsynced. The previous snapshots move to ``<filename>.1`` ...
+    ``<filename>.<backups>`` before the new one is renamed into place.
+    With a BlobStore, long descriptions are appended to it and the snapshot
+    only keeps their offset and length.
+    """
+    if blobs is not None:
+        tasks = [store_blobs(snapshot_record(task), blobs) for task in tasks]
+        blobs.sync()
+    tmp_name = f"{filename}.tmp"
+    digest = hashlib.sha256()
+    length = 0
+    with open(tmp_name, 'wb') as f:
+        f.write(b" " * SNAPSHOT_HEADER_SIZE)
+        chunks = []
+        buffered = 0
+        for chunk in json.JSONEncoder(indent=4, default=encode_task).iterencode(list(tasks)):
+            chunks.append(chunk)
+            buffered += len(chunk)
+            if buffered >= 64 * 1024:
+                length += _write_hashed(f, digest, chunks)
+                chunks = []
+                buffered = 0
+        length += _write_hashed(f, digest, chunks)
+        f.seek(0)
+        f.write(SNAPSHOT_HEADER.format(digest=digest.hexdigest(), length=length).encode('ascii'))
+        f.flush()
+        os.fsync(f.fileno())
+    replace_snapshot(filename, tmp_name, backups)
+
+
+def replace_snapshot(filename, tmp_name, backups=SNAPSHOT_BACKUPS):
+    """Move tmp_name over filename, shifting the older snapshots to backups"""
+    if backups:
+        for n in range(backups - 1, 0, -1):
+            if os.path.exists(f"{filename}.{n}"):
+                os.replace(f"{filename}.{n}", f"{filename}.{n + 1}")
+        if os.path.exists(filename):
+            os.replace(filename, f"{filename}.1")
+    os.replace(tmp_name, filename)
+
+
+def snapshot_record(task):
+    """Task as a dict for a snapshot, text still in the blob file stays a BlobRef"""
+    to_dict = getattr(task, "to_dict", None)
+    return to_dict(lazy=True) if to_dict is not None else dict(task)
+
+
+def _write_hashed(f, digest, chunks):
+    data = "".join(chunks).encode('utf-8')
+    digest.update(data)
+    f.write(data)
+    return len(data)
+
+
+def snapshot_body_offset(path):
+    """Offset of the JSON body if the snapshot at path passes its checksum, else None.
+
+    Plain JSON files from before the snapshot format have no checksum and
+    start at offset 0. The hash runs over a memory map of the file, so the
+    check never copies the body into Python objects.
+    """
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                return 0
+            f.seek(0)
+            header = f.read(SNAPSHOT_HEADER_SIZE).decode('ascii', 'replace').split()
+            fields = dict(field.split("=", 1) for field in header[2:] if "=" in field)
+            size = os.fstat(f.fileno()).st_size
+            if size != SNAPSHOT_HEADER_SIZE + int(fields.get("length", -1)):
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    digest = hashlib.sha256(view[SNAPSHOT_HEADER_SIZE:]).hexdigest()
+            return SNAPSHOT_HEADER_SIZE if digest == fields.get("sha256") else None
+    except (OSError, ValueError):
+        return None
+
+
+def snapshot_candidates(filename, backups=SNAPSHOT_BACKUPS):
+    """Snapshot files to try, newest first"""
+    paths = [filename, f"{filename}.tmp"]
+    paths += [f"{filename}.{n}" for n in range(1, backups + 1)]
+    return [path for path in paths if os.path.exists(path)]
+
+
+def read_snapshot(filename, backups=SNAPSHOT_BACKUPS):
+    """Load the newest snapshot that passes validation"""
+    candidates = snapshot_candidates(filename, backups)
+    for path in candidates:
+        offset = snapshot_body_offset(path)
+        if offset is None:
+            continue
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+            # An empty tasks.json, as a new install or an editor leaves it, holds no tasks
+            return json.loads(data) if data.strip() else []
+        except ValueError:
+            continue
+    if candidates:
+        raise CorruptSnapshotError(f"No valid snapshot found for {filename}")
+    return []
+
+
+def open_snapshot(filename, backups=SNAPSHOT_BACKUPS):
+    """Open the newest valid snapshot as text, positioned at its JSON body"""
+    for path in snapshot_candidates(filename, backups):
+        offset = snapshot_body_offset(path)
+        if offset is not None:
+            f = open(path, 'rb')
+            f.seek(offset)
+            return io.TextIOWrapper(f, encoding='utf-8')
+    raise CorruptSnapshotError(f"No valid snapshot found for {filename}")
+
+
+def iter_json_array(f, chunk_size=64 * 1024):
+    """Yield the items of a top-level JSON array without loading the whole file"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = False
+    eof = False
+    while True:
+        # Skip whitespace and separators between items
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if not started and pos < len(buffer):
+            if buffer[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                if buffer[pos:].strip():
+                    raise
+                return
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        if end == len(buffer) and not eof:
+            # A number at the end of the buffer may continue in the next chunk
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield item
+        pos = end
+
+
+class JsonStorage:
+    """Storage engine that rewrites the whole snapshot on every change.
+
+    Descriptions of ``blob_threshold`` characters or more go to the
+    ``<filename>.blobs`` file and are loaded as BlobRefs, so loading costs
+    the same whatever the length of the descriptions. ``blob_threshold=None``
+    keeps every description inline.
+
+    Several processes can use the same files. Writes happen under
+    ``lock``, an advisory lock on ``<filename>.lock``, and poll() tells
+    what the other processes changed since this one last looked.
+    """
+
+    def __init__(self, filename="tasks.json", blob_threshold=BLOB_THRESHOLD):
+        self.filename = filename
+        self.meta_path = f"{filename}.meta"
+        # Next free id shared by every process, handed out under the lock
+        self.ids_path = f"{filename}.ids"
+        self._ids_fd = None
+        # Small bookkeeping values such as the id allocator, stored next to the tasks
+        self.meta = {}
+        self.blobs = BlobStore(f"{filename}.blobs", blob_threshold)
+        self.lock = FileLock(f"{filename}.lock")
+        self._seen_snapshot = None  # file_stamp() of the snapshot as last read or written
+
+    def load(self):
+        """Load the task list from the newest valid snapshot"""
+        with self.lock:
+            self.meta = self._load_meta()
+            self._seen_snapshot = file_stamp(self.filename)
+            return [attach_blobs(task, self.blobs) for task in read_snapshot(self.filename)]
+
+    def save(self, tasks):
+        """Save the full task list as a new snapshot"""
+        with self.lock:
+            self.write_tasks(tasks)
+            self._write_meta(self.meta)
+            self._seen_snapshot = file_stamp(self.filename)
+
+    def write_tasks(self, tasks, filename=None):
+        """Write tasks as the new snapshot, every full write goes through here.
+
+        Given a filename the snapshot is written there without backups,
+        to be moved into place later.
+        """
+        if filename is None:
+            write_snapshot(self.filename, tasks, blobs=self.blobs)
+        else:
+            write_snapshot(filename, tasks, backups=0, blobs=self.blobs)
+
+    def append(self, record, tasks):
+        """Persist a single mutation record"""
+        self.save(tasks)
+
+    def append_many(self, records, tasks):
+        """Persist a batch of mutation records with one write"""
+        self.save(tasks)
+
+    def poll(self):
+        """What other processes wrote since this one last read or wrote the files.
+
+        Returns (tasks, records). tasks is the whole reloaded task list when
+        another process wrote a new snapshot and None otherwise, records
+        are the journal records the others appended since, in order.
+        Finding nothing new costs a stat call or two.
+        """
+        with self.lock:
+            if file_stamp(self.filename) != self._seen_snapshot:
+                return self.load(), []
+            return None, []
+
+    def allocate_ids(self, count=1, minimum=1):
+        """First of count consecutive ids that no other process has handed out, at least minimum.
+
+        Ids are taken when a task is created rather than when its record is
+        written, so processes that write later, like WriteBehindStorage,
+        never hand out the same id twice.
+        """
+        with self.lock:
+            if self._ids_fd is None:
+                self._ids_fd = os.open(self.ids_path, os.O_RDWR | os.O_CREAT |
+                                       getattr(os, "O_BINARY", 0), 0o644)
+            # A fixed-width number rewritten in place, no truncating or renaming
+            os.lseek(self._ids_fd, 0, os.SEEK_SET)
+            try:
+                next_id = int(os.read(self._ids_fd, 20))
+            except ValueError:
+                next_id = 1
+            first = max(next_id, minimum)
+            os.lseek(self._ids_fd, 0, os.SEEK_SET)
+            os.write(self._ids_fd, b"%020d" % (first + count))
+            return first
+
+    def watched_paths(self):
+        """Files the other processes write to, for a file system watcher"""
+        return [self.filename]
+
+    def flush(self):
+        """Write out any buffered changes"""
+
+    def close(self):
+        """Release any resources held by the engine"""
+        self.blobs.close()
+        self._close_files()
+
+    def _close_files(self):
+        if self._ids_fd is not None:
+            os.close(self._ids_fd)
+            self._ids_fd = None
+        self.lock.close()
+
+    def _load_meta(self):
+        if os.path.exists(self.meta_path):
+            try:
+                with open(self.meta_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                pass
+        return {}
+
+    def _write_meta(self, meta):
+        # Ids are counted from the highest next_id any process has written
+        next_id = max(self._load_meta().get("next_id", 1), meta.get("next_id", 1))
+        self.meta["next_id"] = max(self.meta.get("next_id", 1), next_id)
+        write_json_atomic(self.meta_path, dict(meta, next_id=next_id))
+
+
+class JournalStorage(JsonStorage):
+    """Storage engine that appends mutations to an NDJSON journal.
+
+    The JSON file is kept as a snapshot. Every mutation is appended to
+    ``<filename>.journal`` as one line and replayed on load. Once the journal
+    grows past ``compact_threshold`` bytes a fresh snapshot is written in a
+    background thread, and the journal lines appended meanwhile move to a
+    new journal. Replaying a record is idempotent, so a crash at any point
+    of the compaction leaves a snapshot and a journal that still add up to
+    the same task list.
+
+    Each line carries the ``writer_id`` of the engine that wrote it, so
+    poll() can hand the lines of other processes to the task list without
+    reading the files again.
+    """
+
+    def __init__(self, filename="tasks.json", compact_threshold=1024 * 1024,
+                 background=True, fsync=False, blob_threshold=BLOB_THRESHOLD):
+        super().__init__(filename, blob_threshold)
+        self.journal_path = f"{filename}.journal"
+        # Only written by older versions, which rotated the journal before compacting
+        self.old_journal_path = f"{self.journal_path}.old"
+        self.compact_threshold = compact_threshold
+        self.background = background
+        self.fsync = fsync
+        self.writer_id = uuid.uuid4().hex[:12]
+        self._journal_size = 0
+        self._seen_journal = 0  # journal bytes already applied by this process
+        self._compactor = None
+
+    def load(self):
+        """Load the snapshot and replay the journals on top of it"""
+        with self.lock:
+            by_id = {task["id"]: task for task in super().load()}
+            for path in (self.old_journal_path, self.journal_path):
+                self._replay(path, by_id)
+            tasks = list(by_id.values())
+            if os.path.exists(self.old_journal_path):
+                # A previous compaction did not finish, fold everything into a snapshot now
+                self.save(tasks)
+            self._journal_size = self._seen_journal = self._file_size(self.journal_path)
+            return tasks
+
+    def save(self, tasks):
+        """Write a full snapshot and start a new, empty journal"""
+        with self.lock:
+            self.write_tasks(tasks)
+            self._write_meta(self.meta)
+            for path in (self.journal_path, self.old_journal_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._seen_snapshot = file_stamp(self.filename)
+            self._journal_size = self._seen_journal = 0
+
+    def append(self, record, tasks):
+        """Append one mutation record to the journal"""
+        self.append_many([record], tasks)
+
+    def append_many(self, records, tasks):
+        """Append a batch of mutation records to the journal with one write.
+
+        The journal is opened for each write rather than kept open, so no
+        process holds it while another one replaces it in a compaction.
+        """
+        data = "".join(json.dumps(dict(record, by=self.writer_id), separators=(',', ':'),
+                                  default=encode_task) + "\n"
+                       for record in records).encode('utf-8')
+        with self.lock:
+            with open(self.journal_path, 'ab') as journal:
+                start = journal.seek(0, os.SEEK_END)
+                journal.write(data)
+                journal.flush()
+                if self.fsync:
+                    os.fsync(journal.fileno())
+            self._journal_size = start + len(data)
+            if self._seen_journal == start:
+                # No lines of other processes in between, poll() can skip ours
+                self._seen_journal = self._journal_size
+            if self._journal_size >= self.compact_threshold:
+                self.compact(tasks)
+
+    def compact(self, tasks):
+        """Write a snapshot of tasks and drop the journal lines it holds.
+
+        tasks must include every line of the journal, as they do for a
+        caller that holds the lock and has applied poll(); None reads them
+        from the files. The snapshot is only moved into place if no other
+        snapshot was written while it was being written.
+        """
+        with self.lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._compactor = None
+            if tasks is None:
+                tasks = self._read_tasks()
+            # Copy on the caller's thread so later in-place edits don't leak into the snapshot
+            snapshot = [task.copy() for task in tasks]
+            base = (file_stamp(self.filename), self._file_size(self.journal_path))
+            meta = dict(self.meta)
+        if self.background:
+            self._compactor = threading.Thread(target=self._write_snapshot,
+                                               args=(snapshot, meta, base), daemon=True)
+            self._compactor.start()
+        else:
+            self._write_snapshot(snapshot, meta, base)
+
+    def poll(self):
+        """What other processes wrote since this one last read or wrote the files.
+
+        Returns (tasks, records) like JsonStorage.poll(). New journal lines
+        are read from where this process left off, so picking up a change
+        costs about the size of the change, not of the task list.
+        """
+        with self.lock:
+            size = self._file_size(self.journal_path)
+            if file_stamp(self.filename) != self._seen_snapshot or size < self._seen_journal:
+                return self.load(), []
+            if size == self._seen_journal:
+                return None, []
+            records, self._seen_journal = self._read_journal(self._seen_journal)
+            return None, [record for record in records if record.get("by") != self.writer_id]
+
+    def watched_paths(self):
+        """Files the other processes write to, for a file system watcher"""
+        return [self.filename, self.journal_path]
+
+    def close(self):
+        """Wait for a running compaction and release the files"""
+        self._wait_for_compaction()
+        self.blobs.close()
+        self._close_files()
+
+    def _write_snapshot(self, snapshot, meta, base):
+        compact_path = f"{self.filename}.compact-{self.writer_id}"
+        self.write_tasks(snapshot, compact_path)
+        stamp, offset = base
+        with self.lock:
+            if file_stamp(self.filename) != stamp or self._file_size(self.journal_path) < offset:
+                # Another snapshot was written meanwhile, it holds everything this one does
+                os.remove(compact_path)
+                return
+            with open(self.journal_path, 'rb') as f:
+                f.seek(offset)
+                tail = f.read()
+            replace_snapshot(self.filename, compact_path)
+            tmp_name = f"{self.journal_path}.tmp"
+            with open(tmp_name, 'wb') as f:
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, self.journal_path)
+            self._write_meta(meta)
+            self._seen_snapshot = file_stamp(self.filename)
+            if self._seen_journal < offset:
+                # Lines of other processes not applied here yet are only in the snapshot now
+                self._seen_snapshot = None
+            self._seen_journal = max(self._seen_journal - offset, 0)
+            self._journal_size = len(tail)
+
+    def _wait_for_compaction(self):
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+            self._compactor = None
+
+    def _read_tasks(self):
+        """Tasks as stored in the files right now, while the lock is held"""
+        by_id = {task["id"]: attach_blobs(task, self.blobs)
+                 for task in read_snapshot(self.filename)}
+        self._replay(self.journal_path, by_id)
+        return by_id.values()
+
+    def _read_journal(self, offset):
+        """Records of the complete journal lines from offset on, and the offset past them"""
+        records = []
+        with open(self.journal_path, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                try:
+                    records.append(self._decode_record(raw))
+                except ValueError:
+                    break
+                offset += len(raw)
+        return records, offset
+
+    def _decode_record(self, raw):
+        record = json.loads(raw)
+        if record.get("op") == "add":
+            attach_blobs(record["task"], self.blobs)
+            self.meta["next_id"] = max(self.meta.get("next_id", 1), record["task"]["id"] + 1)
+        return record
+
+    def _replay(self, path, by_id):
+        """Apply the records in a journal file, truncating a torn last line"""
+        if not os.path.exists(path):
+            return
+        good_size = 0
+        with open(path, 'rb') as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                try:
+                    record = self._decode_record(raw)
+                except ValueError:
+                    break
+                apply_record(by_id, record)
+                good_size += len(raw)
+        if good_size < self._file_size(path):
+            with open(path, 'r+b') as f:
+                f.truncate(good_size)
+
+    @staticmethod
+    def _file_size(path):
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+class WriteBehindStorage(JournalStorage):
+    """Storage engine that persists from a background writer thread.
+
+    append() only queues a copy of the change. The writer thread waits up
+    to ``window`` seconds for more changes to arrive and then appends them
+    all to the journal with one write and one fsync, in between the lines
+    of any other process using the file. At most ``window`` seconds plus
+    one write of changes can be lost in a crash, flush() writes immediately
+    and waits until the changes are on disk.
+    """
+
+    def __init__(self, filename="tasks.json", window=0.25, fsync=True,
+                 blob_threshold=BLOB_THRESHOLD):
+        # The fsync is paid by the writer thread once per coalesced write, not per change
+        super().__init__(filename, fsync=fsync, blob_threshold=blob_threshold)
+        self.window = window
+        self._cond = threading.Condition()
+        self._pending = []
+        self._queued = 0
+        self._written = 0
+        self._saves = 0
+        self._flush_requested = False
+        self._closing = False
+        self._writer = None
+        self._error = None
+        self._attempts = 0  # writes tried, failed ones included
+        self.write_count = 0
+
+    def save(self, tasks):
+        """Write a full snapshot now, it already holds the queued changes"""
+        with self.lock:
+            with self._cond:
+                dropped = len(self._pending)
+                self._pending = []
+                self._saves += 1
+            super().save(tasks)
+            with self._cond:
+                self._written += dropped
+                self._cond.notify_all()
+
+    def append(self, record, tasks):
+        """Queue a single mutation record"""
+        self._enqueue(copy.deepcopy(record))
+
+    def append_many(self, records, tasks):
+        """Queue a batch of mutation records"""
+        self._enqueue(*copy.deepcopy(list(records)))
+
+    def poll(self):
+        """Like JournalStorage.poll(), a reloaded task list includes the queued changes"""
+        tasks, records = super().poll()
+        if tasks is not None:
+            with self._cond:
+                pending = copy.deepcopy(self._pending)
+            by_id = {task["id"]: task for task in tasks}
+            for record in pending:
+                apply_record(by_id, record)
+            tasks = list(by_id.values())
+        return tasks, records
+
+    def flush(self):
+        """Write all queued changes now and wait until they are on disk"""
+        with self._cond:
+            target = self._queued
+            attempts = self._attempts
+            self._flush_requested = True
+            self._cond.notify_all()
+            # An error is only raised once a write started after this call failed too
+            while self._written < target and (self._error is None or self._attempts == attempts):
+                self._cond.wait()
+            if self._written < target:
+                raise self._error
+
+    def close(self):
+        """Flush queued changes and stop the writer thread"""
+        self.flush()
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        self._closing = False
+        super().close()
+
+    def _enqueue(self, *records):
+        with self._cond:
+            self._pending.extend(records)
+            self._queued += len(records)
+            self._cond.notify_all()
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, daemon=True)
+                self._writer.start()
+
+    def _run(self):
+        unwritten = []  # records taken off the queue whose write failed
+        saves = self._saves
+        while True:
+            with self._cond:
+                while not self._pending and not unwritten and not self._closing:
+                    self._cond.wait()
+                if not self._pending and not unwritten:
+                    return
+                # Give more changes a chance to join this write
+                deadline = time.monotonic() + self.window
+                while not self._flush_requested and not self._closing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+            error = None
+            with self.lock:
+                with self._cond:
+                    if self._saves != saves:
+                        # A full snapshot was written since, it holds them
+                        self._written += len(unwritten)
+                        unwritten = []
+                        saves = self._saves
+                    records = unwritten + self._pending
+                    self._pending = []
+                    self._flush_requested = False
+                try:
+                    if records:
+                        # No task list here, a compaction reads it from the files
+                        super().append_many(records, None)
+                except OSError as e:
+                    error = e
+            if error is not None:
+                # Keep the records and try again after a pause
+                unwritten = records
+                with self._cond:
+                    self._error = error
+                    self._attempts += 1
+                    self._cond.notify_all()
+                time.sleep(self.window)
+                continue
+
+            with self._cond:
+                self._written += len(records)
+                unwritten = []
+                self._error = None
+                self._attempts += 1
+                self.write_count += 1
+                self._cond.notify_all()
+
+
+def apply_record(by_id, record):
+    """Apply a journal record to a dict of tasks keyed by id"""
+    op = record.get("op")
+    if op == "add":
+        task = record["task"]
+        by_id[task["id"]] = task
+    elif op == "update":
+        task = by_id.get(record["id"])
+        if task is not None:
+            task.update(record["fields"])
+    elif op == "delete":
+        by_id.pop(record["id"], None)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from sorted_views import PRIORITY_ORDER
+from task_record import (Task, SECONDS_PER_DAY, parse_date, parse_datetime,
+                         format_date)
+
+PRIORITY_NAMES = sorted(PRIORITY_ORDER, key=PRIORITY_ORDER.get)
+NO_CODE = -1
+
+# Column name -> dtype. Dates and times are 0 when a task has none.
+COLUMNS = {
+    "id": "int64",
+    "due": "int32",  # day ordinal
+    "created": "int64",  # seconds since 0001-01-01
+    "completed_time": "int64",
+    "priority": "int8",  # index into PRIORITY_NAMES
+    "category": "int16",  # index into TaskColumns.categories
+    "completed": "bool",
+}
+
+
+def as_int(value):
+    return value if type(value) is int else 0
+
+
+class TaskColumns:
+    """Columnar NumPy mirror of a task list for analytics and bulk filters.
+
+    Every task is one row across the arrays in COLUMNS. Rows are appended
+    at the end, a deleted row is replaced by the last one, so every change
+    costs O(1) and the masks below run over contiguous arrays. Row order is
+    therefore not task order.
+    """
+
+    def __init__(self, capacity=1024):
+        if np is None:
+            raise ImportError("TaskColumns needs numpy, install it with: pip install numpy")
+        self.arrays = {name: np.zeros(capacity, dtype) for name, dtype in COLUMNS.items()}
+        self.size = 0
+        self.row_by_id = {}
+        self.categories = []
+        self.category_codes = {}
+
+    def __len__(self):
+        return self.size
+
+    def __getattr__(self, name):
+        # Live rows of a column, e.g. columns.due
+        arrays = self.__dict__.get("arrays")
+        if arrays is None or name not in arrays:
+            raise AttributeError(name)
+        return arrays[name][:self.size]
+
+    def _category_code(self, category):
+        if not category:
+            return NO_CODE
+        code = self.category_codes.get(category)
+        if code is None:
+            code = self.category_codes[category] = len(self.categories)
+            self.categories.append(category)
+        return code
+
+    def _row(self, task):
+        """Column values of a Task record or plain task dict"""
+        if isinstance(task, Task):
+            due, created, completed_time = (task.due_ordinal, task.created_seconds,
+                                            task.completed_seconds)
+        else:
+            due = parse_date(task.get("due_date"))
+            created = parse_datetime(task.get("created_at"))
+            completed_time = parse_datetime(task.get("completed_at"))
+        return (task["id"], as_int(due), as_int(created), as_int(completed_time),
+                PRIORITY_ORDER.get(task.get("priority"), NO_CODE),
+                self._category_code(task.get("category")),
+                bool(task.get("completed", False)))
+
+    def _write_row(self, row, task):
+        for array, value in zip(self.arrays.values(), self._row(task)):
+            array[row] = value
+
+    def rebuild(self, tasks):
+        """Fill the columns from a full task list"""
+        rows = [self._row(task) for task in tasks]
+        capacity = max(len(rows), 1024)
+        self.arrays = {}
+        for index, (name, dtype) in enumerate(COLUMNS.items()):
+            array = np.zeros(capacity, dtype)
+            array[:len(rows)] = [row[index] for row in rows]
+            self.arrays[name] = array
+        self.size = len(rows)
+        self.row_by_id = {row[0]: index for index, row in enumerate(rows)}
+
+    def add(self, task):
+        """Append a new task as the last row"""
+        if self.size == len(self.arrays["id"]):
+            for name, array in self.arrays.items():
+                grown = np.zeros(len(array) * 2, array.dtype)
+                grown[:self.size] = array[:self.size]
+                self.arrays[name] = grown
+        self.row_by_id[task["id"]] = self.size
+        self._write_row(self.size, task)
+        self.size += 1
+
+    def update(self, task):
+        """Rewrite the row of a changed task"""
+        row = self.row_by_id.get(task["id"])
+        if row is None:
+            self.add(task)
+        else:
+            self._write_row(row, task)
+
+    def remove(self, task_id):
+        """Drop a task, moving the last row into its place"""
+        row = self.row_by_id.pop(task_id, None)
+        if row is None:
+            return
+        last = self.size - 1
+        if row != last:
+            for array in self.arrays.values():
+                array[row] = array[last]
+            self.row_by_id[int(self.arrays["id"][row])] = row
+        self.size = last
+
+    # Filter masks, the same rules as the sidebar views
+    def today_mask(self, today=None):
+        """Tasks due today"""
+        return self.due == self._ordinal(today)
+
+    def upcoming_mask(self, today=None):
+        """Tasks due after today"""
+        return self.due > self._ordinal(today)
+
+    def completed_mask(self):
+        """Completed tasks"""
+        return self.completed.copy()
+
+    def overdue_mask(self, today=None):
+        """Open tasks with a due date before today"""
+        return (self.due > 0) & (self.due < self._ordinal(today)) & ~self.completed
+
+    def _ordinal(self, day):
+        if day is None:
+            return date.today().toordinal()
+        return day.toordinal() if isinstance(day, date) else parse_date(day)
+
+    def ids(self, mask=None):
+        """Ids of the rows selected by mask, or of all rows"""
+        return self.id if mask is None else self.id[mask]
+
+    def count(self, mask=None):
+        """Number of rows selected by mask"""
+        return self.size if mask is None else int(np.count_nonzero(mask))
+
+    # Group-by aggregations, all return {label: count} for the rows in mask
+    def count_by_category(self, mask=None):
+        return self._count_codes(self.category, self.categories, mask)
+
+    def count_by_priority(self, mask=None):
+        return self._count_codes(self.priority, PRIORITY_NAMES, mask)
+
+    def _count_codes(self, codes, labels, mask):
+        if mask is not None:
+            codes = codes[mask]
+        counts = np.bincount(codes[codes != NO_CODE], minlength=len(labels))
+        return {label: int(n) for label, n in zip(labels, counts) if n}
+
+    def completed_per_day(self, mask=None):
+        """Completed tasks per YYYY-MM-DD completion day"""
+        selected = self.completed & (self.completed_time > 0)
+        if mask is not None:
+            selected &= mask
+        days, counts = np.unique(self.completed_time[selected] // SECONDS_PER_DAY,
+                                 return_counts=True)
+        return {format_date(int(day)): int(n) for day, n in zip(days, counts)}
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import json
+from datetime import date, timedelta
+from functools import lru_cache
+
+from sorted_views import PRIORITY_ORDER
+from task_record import load_text
+from search_index import TOKEN_RE as WORD_RE
+
+SETTINGS_PATH = "settings.json"
+
+TERM_RE = re.compile(r'(-?)(?:"([^"]*)"|(\S+))')
+FIELD_RE = re.compile(r'([a-z]+)(<=|>=|<|>|=|:)(.+)$')
+RELATIVE_RE = re.compile(r'([+-]?\d+)([dw])$')
+DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}$')
+
+# Query field -> task key
+FIELDS = {"due": "due_date", "created": "created_at", "priority": "priority",
+          "category": "category"}
+DATE_FIELDS = {"due", "created"}
+# Bare words that test the task state instead of searching the text
+FLAGS = {"completed", "pending", "overdue"}
+NAMED_DAYS = {"today": 0, "tomorrow": 1, "yesterday": -1}
+
+
+class QuerySyntaxError(ValueError):
+    """Raised for a query string that can't be parsed"""
+
+
+class Term:
+    """One condition of a query, negated when written with a leading '-'"""
+    __slots__ = ("negate", "kind", "field", "op", "value")
+
+    def __init__(self, negate, kind, field=None, op=None, value=None):
+        self.negate = negate
+        self.kind = kind  # "text", "flag" or "field"
+        self.field = field
+        self.op = op
+        self.value = value
+
+    def __repr__(self):
+        sign = "-" if self.negate else ""
+        if self.kind == "field":
+            return f"Term({sign}{self.field}{self.op}{self.value})"
+        return f"Term({sign}{self.kind}:{self.value!r})"
+
+
+def parse_term(negate, quoted, bare):
+    if quoted is not None:
+        if not quoted:
+            raise QuerySyntaxError('Empty "" in query')
+        return Term(negate, "text", value=quoted.lower())
+    lowered = bare.lower()
+    if lowered in FLAGS:
+        return Term(negate, "flag", value=lowered)
+    match = FIELD_RE.match(lowered)
+    if match is None or match.group(1) not in FIELDS:
+        return Term(negate, "text", value=lowered)
+    field, op, value = match.groups()
+    if op == ":":
+        op = "="
+    if field in DATE_FIELDS:
+        if value != "none" and value not in NAMED_DAYS and not (
+                DATE_RE.match(value) or RELATIVE_RE.match(value)):
+            raise QuerySyntaxError(f"Invalid date in {bare!r}, use YYYY-MM-DD, today or +7d")
+        if value == "none" and op != "=":
+            raise QuerySyntaxError(f"{field}:none can't be compared in {bare!r}")
+        return Term(negate, "field", field, op, value)
+    if op != "=":
+        raise QuerySyntaxError(f"{field} only supports {field}:value, not {bare!r}")
+    if field == "priority":
+        value = value.capitalize()
+        if value not in PRIORITY_ORDER:
+            raise QuerySyntaxError(f"Unknown priority in {bare!r}")
+    return Term(negate, "field", field, op, value)
+
+
+def resolve_day(value, today):
+    """YYYY-MM-DD for a date term value, relative ones counted from today"""
+    if DATE_RE.match(value):
+        return value
+    if value in NAMED_DAYS:
+        return (today + timedelta(days=NAMED_DAYS[value])).isoformat()
+    amount, unit = RELATIVE_RE.match(value).groups()
+    days = int(amount) * (7 if unit == "w" else 1)
+    return (today + timedelta(days=days)).isoformat()
+
+
+class QueryPlan:
+    """A parsed query, compiled into a predicate, an index lookup and SQL.
+
+    All terms must hold for a task to match. Dates like ``today`` or
+    ``+7d`` are resolved once per evaluation, so a cached plan stays right
+    after midnight. ``candidates()`` picks the positive term with the
+    smallest index lookup, a due date or priority range in a SortedView or
+    a search index hit list, and only those tasks need the predicate.
+    """
+
+    def __init__(self, text, terms):
+        self.text = text
+        self.terms = tuple(terms)
+
+    def __repr__(self):
+        return f"QueryPlan({self.text!r}, {list(self.terms)})"
+
+    @property
+    def fields(self):
+        """Task keys the query reads, to know which changes can move a task in or out"""
+        keys = set()
+        for term in self.terms:
+            if term.kind == "text":
+                keys |= {"title", "description"}
+            elif term.kind == "flag":
+                keys |= {"completed", "due_date"} if term.value == "overdue" else {"completed"}
+            else:
+                keys.add(FIELDS[term.field])
+        return keys
+
+    @property
+    def text_only(self):
+        """Whether the query is plain search words, which search() ranks"""
+        return bool(self.terms) and all(term.kind == "text" and not term.negate
+                                        for term in self.terms)
+
+    def predicate(self, today=None):
+        """Function telling whether a task matches, None when every task does"""
+        if not self.terms:
+            return None
+        today = today or date.today()
+        tests = [(term.negate, self._test(term, today)) for term in self.terms]
+        return lambda task: all(test(task) != negate for negate, test in tests)
+
+    @staticmethod
+    def _test(term, today):
+        if term.kind == "text":
+            text = term.value
+            return lambda task: (text in task["title"].lower()
+                                 or text in (load_text(task.get("description")) or "").lower())
+        if term.kind == "flag":
+            if term.value == "completed":
+                return lambda task: bool(task.get("completed", False))
+            if term.value == "pending":
+                return lambda task: not task.get("completed", False)
+            day = today.isoformat()
+            return lambda task: ("" < (task.get("due_date") or "") < day
+                                 and not task.get("completed", False))
+        if term.field == "priority":
+            order = PRIORITY_ORDER[term.value]
+            return lambda task: PRIORITY_ORDER.get(task.get("priority", "Medium"), 1) == order
+        if term.field == "category":
+            category = term.value
+            return lambda task: (task.get("category") or "").lower() == category
+        key = FIELDS[term.field]
+        if term.value == "none":
+            return lambda task: not task.get(key)
+        day = resolve_day(term.value, today)
+        compare = {"=": str.__eq__, "<": str.__lt__, "<=": str.__le__,
+                   ">": str.__gt__, ">=": str.__ge__}[term.op]
+        # A task without the date never matches a comparison
+        return lambda task: bool(task.get(key)) and compare(task.get(key)[:10], day)
+
+    def key_ranges(self, today=None):
+        """(sort name, low, high, low inclusive, high inclusive) for terms a SortedView answers.
+
+        Terms on the same key are narrowed into one range, so
+        ``due>=2025-06-01 due<2025-07-01`` becomes a single lookup.
+        """
+        today = today or date.today()
+        ranges = []
+        for term in self.terms:
+            if term.negate:
+                continue
+            if term.kind == "flag" and term.value == "overdue":
+                ranges.append(("Due Date", "", today.isoformat(), False, False))
+            elif term.kind == "field" and term.field == "priority":
+                order = PRIORITY_ORDER[term.value]
+                ranges.append(("Priority", order, order, True, True))
+            elif term.kind == "field" and term.field == "due":
+                if term.value == "none":
+                    ranges.append(("Due Date", "", "", True, True))
+                    continue
+                day = resolve_day(term.value, today)
+                ranges.append({
+                    "=": ("Due Date", day, day, True, True),
+                    "<": ("Due Date", "", day, False, False),
+                    "<=": ("Due Date", "", day, False, True),
+                    ">": ("Due Date", day, None, False, True),
+                    ">=": ("Due Date", day, None, True, True)}[term.op])
+        merged = {}
+        for name, low, high, low_inclusive, high_inclusive in ranges:
+            if name not in merged:
+                merged[name] = [low, high, low_inclusive, high_inclusive]
+                continue
+            current = merged[name]
+            if low is not None and (current[0] is None or low > current[0] or
+                                    (low == current[0] and not low_inclusive)):
+                current[0], current[2] = low, low_inclusive
+            if high is not None and (current[1] is None or high < current[1] or
+                                     (high == current[1] and not high_inclusive)):
+                current[1], current[3] = high, high_inclusive
+        return [(name, *bounds) for name, bounds in merged.items()]
+
+    def candidates(self, search, sorted_view, today=None):
+        """Ids of a superset of the matching tasks, None if no term narrows them down.
+
+        ``search(text)`` returns the ids of tasks containing text and
+        ``sorted_view(name)`` the SortedView for one of SORT_KEYS.
+        """
+        best = None  # (size, start, stop, view)
+        for name, low, high, low_inclusive, high_inclusive in self.key_ranges(today):
+            view = sorted_view(name)
+            start, stop = view.key_range(low, high, low_inclusive, high_inclusive)
+            if best is None or stop - start < best[0]:
+                best = (stop - start, start, stop, view)
+        if best is not None and best[0] == 0:
+            return []
+        for term in self.terms:
+            # Text without a word in it, like "++", is beyond the search index
+            if term.kind == "text" and not term.negate and WORD_RE.search(term.value):
+                ids = search(term.value)
+                if best is None or len(ids) < best[0]:
+                    best = (len(ids), ids)
+        if best is None:
+            return None
+        if len(best) == 2:
+            return best[1]
+        return best[3].ids(best[1], best[2])
+
+    def sql(self, today=None):
+        """WHERE condition and parameters for the SQLite store's columns"""
+        today = today or date.today()
+        conditions = []
+        params = []
+        for term in self.terms:
+            condition, values = self._sql_term(term, today)
+            if term.negate:
+                # NULL columns fail a condition, so they pass its negation
+                condition = f"NOT COALESCE({condition}, 0)"
+            conditions.append(condition)
+            params.extend(values)
+        return " AND ".join(conditions) or "1", params
+
+    @staticmethod
+    def _sql_term(term, today):
+        if term.kind == "text":
+            escaped = re.sub(r'([\\%_])', r'\\\1', term.value)
+            pattern = f"%{escaped}%"
+            return ("(LOWER(title) LIKE ? ESCAPE '\\' OR LOWER(description) LIKE ? ESCAPE '\\')",
+                    [pattern, pattern])
+        if term.kind == "flag":
+            if term.value == "completed":
+                return "completed = 1", []
+            if term.value == "pending":
+                return "completed = 0", []
+            return "(due_date > '' AND due_date < ? AND completed = 0)", [today.isoformat()]
+        if term.field == "priority":
+            return ("CASE priority WHEN 'High' THEN 0 WHEN 'Low' THEN 2 ELSE 1 END = ?",
+                    [PRIORITY_ORDER[term.value]])
+        if term.field == "category":
+            return "LOWER(category) = ?", [term.value]
+        column = FIELDS[term.field]
+        if term.value == "none":
+            return f"({column} IS NULL OR {column} = '')", []
+        if term.field == "created":
+            column = f"SUBSTR({column}, 1, 10)"
+        return f"({column} > '' AND {column} {term.op} ?)", [resolve_day(term.value, today)]
+
+
+@lru_cache(maxsize=256)
+def compile_query(text):
+    """Parse a query like 'priority:High due<+7d category:Work -completed "some text"'.
+
+    Plans are cached by query string, repeating a query skips the parsing.
+    Raises QuerySyntaxError for a query that can't be parsed.
+    """
+    if text.count('"') % 2:
+        raise QuerySyntaxError(f"Unbalanced quote in {text!r}")
+    terms = [parse_term(match.group(1) == "-", match.group(2), match.group(3))
+             for match in TERM_RE.finditer(text)]
+    return QueryPlan(text, terms)
+
+
+def load_smart_views(path=SETTINGS_PATH):
+    """Saved smart views from settings.json as {name: query}, unparseable ones left out"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            views = json.load(f).get("smart_views", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+    valid = {}
+    for name, text in views.items() if isinstance(views, dict) else ():
+        try:
+            compile_query(text)
+        except (QuerySyntaxError, TypeError):
+            continue
+        valid[name] = text
+    return valid
+
+
+def save_smart_view(name, text, path=SETTINGS_PATH):
+    """Store a smart view in settings.json next to the other settings, None as text removes it"""
+    if text is not None:
+        compile_query(text)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            settings = json.load(f)
+    except (OSError, ValueError):
+        settings = {}
+    views = settings.setdefault("smart_views", {})
+    if text is None:
+        views.pop(name, None)
+    else:
+        views[name] = text
+    tmp_name = f"{path}.tmp"
+    with open(tmp_name, 'w', encoding='utf-8') as f:
+        json.dump(settings, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_name, path)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+import sys
+from collections.abc import MutableMapping
+from datetime import date
+
+from blob_store import BlobRef
+
+SECONDS_PER_DAY = 86400
+MISSING = object()
+
+
+def parse_date(value):
+    """'YYYY-MM-DD' -> proleptic Gregorian ordinal, other values pass through"""
+    if isinstance(value, str) and len(value) == 10:
+        try:
+            return date.fromisoformat(value).toordinal()
+        except ValueError:
+            pass
+    return value
+
+
+def format_date(value):
+    if type(value) is int:
+        return date.fromordinal(value).isoformat()
+    return value
+
+
+def parse_datetime(value):
+    """'YYYY-MM-DD HH:MM:SS' -> seconds since 0001-01-01, other values pass through"""
+    if isinstance(value, str) and len(value) == 19 and value[10] == " ":
+        try:
+            days = date.fromisoformat(value[:10]).toordinal()
+            hours, minutes, seconds = int(value[11:13]), int(value[14:16]), int(value[17:19])
+        except ValueError:
+            return value
+        if not (0 <= hours < 24 and 0 <= minutes < 60 and 0 <= seconds < 60):
+            return value
+        return days * SECONDS_PER_DAY + hours * 3600 + minutes * 60 + seconds
+    return value
+
+
+def format_datetime(value):
+    if type(value) is int:
+        days, rest = divmod(value, SECONDS_PER_DAY)
+        hours, rest = divmod(rest, 3600)
+        minutes, seconds = divmod(rest, 60)
+        return f"{date.fromordinal(days).isoformat()} {hours:02d}:{minutes:02d}:{seconds:02d}"
+    return value
+
+
+def load_text(value):
+    return value.load() if type(value) is BlobRef else value
+
+
+def text_preview(task, key, limit):
+    """Up to limit characters of a text field and whether it goes on.
+
+    A field still in the blob file only has its first bytes read.
+    """
+    if isinstance(task, Task):
+        value = getattr(task, FIELDS[key][0], None)
+    else:
+        value = task.get(key)
+    if type(value) is BlobRef:
+        return value.preview(limit)
+    value = value or ""
+    return value[:limit], len(value) > limit
+
+
+def intern_string(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+# Task key -> (slot, parse, format), in the order keys are listed and saved
+FIELDS = {
+    "id": ("id", None, None),
+    "title": ("title", None, None),
+    "description": ("description", None, load_text),  # may be a lazy BlobRef
+    "due_date": ("due", parse_date, format_date),
+    "priority": ("priority", intern_string, None),
+    "category": ("category", intern_string, None),
+    "completed": ("completed", None, None),
+    "created_at": ("created", parse_datetime, format_datetime),
+    "completed_at": ("completed_time", parse_datetime, format_datetime),
+}
+
+
+class Task(MutableMapping):
+    """Compact task record that behaves like the task dicts it replaces.
+
+    Known keys live in slots: dates are stored as day ordinals or seconds,
+    priority and category strings are interned, and any other keys go to a
+    small ``extra`` dict. A key that was never set is missing, exactly like
+    in a dict, so ``task["due_date"]`` and ``task.get("due_date")`` keep
+    their old behaviour.
+    """
+    __slots__ = tuple(slot for slot, _, _ in FIELDS.values()) + ("extra",)
+
+    def __init__(self, data=(), **kwargs):
+        self.extra = None
+        self.update(data, **kwargs)
+
+    def update(self, data=(), **kwargs):
+        """dict.update, with a fast path for plain dicts and other Task records"""
+        if isinstance(data, (dict, Task)):
+            for key in data:
+                self[key] = data[key]
+        else:
+            super().update(data)
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        field = FIELDS.get(key)
+        if field is None:
+            if self.extra is None or key not in self.extra:
+                raise KeyError(key)
+            return self.extra[key]
+        slot, _, format_value = field
+        try:
+            value = getattr(self, slot)
+        except AttributeError:
+            raise KeyError(key) from None
+        return format_value(value) if format_value else value
+
+    def __setitem__(self, key, value):
+        field = FIELDS.get(key)
+        if field is None:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+            return
+        slot, parse_value, _ = field
+        setattr(self, slot, parse_value(value) if parse_value else value)
+
+    def __delitem__(self, key):
+        field = FIELDS.get(key)
+        try:
+            if field is None:
+                del self.extra[key]
+            else:
+                delattr(self, field[0])
+        except (AttributeError, KeyError, TypeError):
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        for key, (slot, _, _) in FIELDS.items():
+            if hasattr(self, slot):
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        field = FIELDS.get(key)
+        if field is None:
+            return self.extra is not None and key in self.extra
+        return hasattr(self, field[0])
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        return f"Task({self.to_dict()!r})"
+
+    def copy(self):
+        """Shallow copy, like dict.copy"""
+        clone = Task.__new__(Task)
+        for slot in Task.__slots__:
+            value = getattr(self, slot, MISSING)
+            if value is not MISSING:
+                setattr(clone, slot, value)
+        if clone.extra:
+            clone.extra = dict(clone.extra)
+        return clone
+
+    def to_dict(self, lazy=False):
+        """Plain dict with the same keys and values, used for saving.
+
+        With lazy=True, text still in the blob file stays a BlobRef.
+        """
+        data = {}
+        for key, (slot, _, format_value) in FIELDS.items():
+            value = getattr(self, slot, MISSING)
+            if value is MISSING:
+                continue
+            if type(value) is BlobRef:
+                data[key] = value if lazy else value.load()
+            else:
+                data[key] = format_value(value) if format_value else value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    @property
+    def due_ordinal(self):
+        """Due date as a day ordinal, or None"""
+        value = getattr(self, "due", None)
+        return value if type(value) is int else None
+
+    @property
+    def created_seconds(self):
+        """Creation time in seconds since 0001-01-01, or None"""
+        value = getattr(self, "created", None)
+        return value if type(value) is int else None
+
+    @property
+    def completed_seconds(self):
+        """Completion time in seconds since 0001-01-01, or None"""
+        value = getattr(self, "completed_time", None)
+        return value if type(value) is int else None
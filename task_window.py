@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+import os
+
+from PyQt5.QtCore import Qt, QTimer, QEvent, QFileSystemWatcher
+from PyQt5.QtWidgets import QApplication
+
+from reminders import DueScheduler, MAX_WAIT, describe
+
+# The storage engines are imported by open_task_list(), after the window is on screen
+
+# Tasks move to this database once migrated with sqlite_store.py
+DB_PATH = "tasks.db"
+# Binary snapshot made with binary_snapshot.py, opens without reading every task
+BIN_PATH = "tasks.bin"
+# Characters of a description shown before a card is expanded or in a tooltip
+PREVIEW_CHARS = 200
+# Changes by other processes are read this long after the file watcher fires,
+# and polled this often in case its events don't arrive, as on network drives
+REFRESH_DEBOUNCE_MS = 100
+REFRESH_POLL_MS = 2000
+
+
+def open_task_list(use_database=False):
+    """The task list of the current directory: tasks.db if use_database, tasks.bin or tasks.json"""
+    from todo import TodoList
+    from storage import WriteBehindStorage
+    from binary_snapshot import BinaryStorage
+    if use_database and os.path.exists(DB_PATH):
+        from sqlite_store import SqliteTodoList
+        return SqliteTodoList(DB_PATH)
+    if os.path.exists(BIN_PATH):
+        return TodoList(BIN_PATH, BinaryStorage(BIN_PATH), auto_archive=True)
+    # Edits are written by a background thread, a few times per second at most
+    return TodoList(storage=WriteBehindStorage("tasks.json"), auto_archive=True)
+
+
+class TaskWindowMixin:
+    """Opening the task list and following other processes' changes, shared by both windows.
+
+    Mixed into a QMainWindow before it. The window is painted before the
+    task list is opened, open_tasks() runs right after the first frame.
+    Other processes' changes are picked up when the task files change and
+    every REFRESH_POLL_MS, and reach the window as task events. Tasks
+    coming due are reported in the status bar.
+    The window defines the firstPageShown signal and load_tasks(), sets
+    todo_list, reminders and first_page_shown to None, None and False,
+    and calls first_page_loaded() whenever a page of tasks is in the view.
+    USE_DATABASE opens tasks.db when there is one.
+    """
+    USE_DATABASE = False
+
+    def open_tasks_after_first_frame(self):
+        # Any paint means the window is on screen, the tasks are opened after it
+        QApplication.instance().installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self.todo_list is None:
+            QApplication.instance().removeEventFilter(self)
+            QTimer.singleShot(0, self.open_tasks)
+        return super().eventFilter(obj, event)
+
+    def open_tasks(self):
+        """Open the task list and show its first page"""
+        if self.todo_list is not None:
+            return
+        self.todo_list = open_task_list(self.USE_DATABASE)
+        # Changes come back as task_added/task_updated/task_deleted events
+        self.todo_list.add_listener(self)
+        # Built from every task, so only once the first page is on screen
+        self.firstPageShown.connect(self.start_reminders, Qt.QueuedConnection)
+        self.load_tasks()
+        self.init_file_watcher()
+
+    def first_page_loaded(self):
+        if not self.first_page_shown:
+            self.first_page_shown = True
+            self.firstPageShown.emit()
+
+    def start_reminders(self):
+        """Report tasks coming due in the status bar, a timer wakes up at the next deadline"""
+        self.reminders = DueScheduler(self.todo_list)
+        self.reminders.add_listener(lambda reminders: self.statusBar().showMessage(
+            f"Reminder: {describe(reminders)}"))
+        self.reminder_timer = QTimer(self)
+        self.reminder_timer.setSingleShot(True)
+        self.reminder_timer.timeout.connect(self.fire_reminders)
+        # A new or moved task can come due before the timer would fire
+        self.reminders.add_wakeup(self.arm_reminder_timer)
+        self.fire_reminders()
+
+    def fire_reminders(self):
+        self.reminders.fire_due()
+        self.arm_reminder_timer()
+
+    def arm_reminder_timer(self):
+        deadline = self.reminders.next_deadline()
+        if deadline is None:
+            self.reminder_timer.stop()
+            return
+        wait = min(max(0, deadline - self.reminders.clock()), MAX_WAIT)
+        self.reminder_timer.start(int(wait * 1000) + 1)
+
+    def init_file_watcher(self):
+        # Other processes writing the task files, their changes arrive as task events
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(REFRESH_DEBOUNCE_MS)
+        self.refresh_timer.timeout.connect(self.refresh_tasks)
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_watcher.directoryChanged.connect(lambda path: self.refresh_timer.start())
+        self.file_watcher.fileChanged.connect(lambda path: self.refresh_timer.start())
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(REFRESH_POLL_MS)
+        self.poll_timer.timeout.connect(self.refresh_tasks)
+        self.poll_timer.start()
+        self.watch_task_files()
+
+    def watch_task_files(self):
+        # A file replaced by a rename drops out of the watcher, so add it again
+        paths = [os.path.abspath(path) for path in self.todo_list.watched_paths()]
+        paths += sorted({os.path.dirname(path) for path in paths})
+        watched = set(self.file_watcher.files() + self.file_watcher.directories())
+        missing = [path for path in paths if path not in watched and os.path.exists(path)]
+        if missing:
+            self.file_watcher.addPaths(missing)
+
+    def refresh_tasks(self):
+        self.todo_list.refresh()
+        self.watch_task_files()
+
+    def closeEvent(self, event):
+        # Write out anything still queued before the window goes away
+        if self.todo_list is not None:
+            self.poll_timer.stop()
+            if self.reminders is not None:
+                self.reminder_timer.stop()
+            self.todo_list.close()
+        super().closeEvent(event)
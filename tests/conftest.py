@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+# The modules are scripts next to each other, not a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from binary_snapshot import BinaryStorage
+from sqlite_store import SqliteTodoList
+from todo import TodoList
+
+
+def open_backend(kind, directory):
+    """Empty task list of one kind: tasks.json, a binary tasks.bin or a tasks.db"""
+    filename = os.path.join(directory, f"tasks.{kind}")
+    if kind == "db":
+        return SqliteTodoList(filename)
+    if kind == "bin":
+        return TodoList(filename, BinaryStorage(filename), archive_after_days=None)
+    return TodoList(filename, archive_after_days=None)
+
+
+@pytest.fixture
+def sample_tasks():
+    """Thirty tasks with every priority and category, a third of them completed"""
+    priorities = ["Low", "Medium", "High"]
+    categories = ["Personal", "Work", "Shopping"]
+    return [{
+        "title": f"Task {i} {['report', 'groceries', 'review'][i % 3]}",
+        "description": f"Step one of task {i}",
+        "due_date": f"2025-06-{i % 28 + 1:02d}",
+        "priority": priorities[i % 3],
+        "category": categories[i // 10],
+        "completed": i % 3 == 0,
+        "created_at": "2025-05-06 13:36:07",
+        "completed_at": "2025-05-07 09:00:00" if i % 3 == 0 else None,
+    } for i in range(30)]
+
+
+@pytest.fixture(params=["json", "bin", "db"])
+def todo_list(request, tmp_path):
+    todo_list = open_backend(request.param, str(tmp_path))
+    yield todo_list
+    todo_list.close()
@@ -0,0 +1,41 @@
+import os
+
+from todo import TodoList, run_command
+
+
+def old_completed_list(directory):
+    """tasks.json with one task completed long ago and one open task"""
+    filename = str(directory / "tasks.json")
+    todo_list = TodoList(filename, archive_after_days=None)
+    for title, completed_at in (("Old", "2020-01-01 10:00:00"), ("Open", None)):
+        todo_list.add_task({"title": title, "description": "", "due_date": None,
+                            "priority": "Low", "category": "Work",
+                            "completed": completed_at is not None, "completed_at": completed_at})
+    todo_list.close()
+    return filename
+
+
+def file_state(directory):
+    return {name: os.stat(os.path.join(directory, name)).st_mtime_ns
+            for name in os.listdir(directory) if not name.endswith(".lock")}
+
+
+def test_opening_to_read_does_not_archive(tmp_path, capsys):
+    directory = tmp_path / "tasks"
+    directory.mkdir()
+    filename = old_completed_list(directory)
+    before = file_state(directory)
+    assert run_command(["--tasks", filename, "export", str(tmp_path / "export.json")]) == 0
+    todo_list = TodoList(filename)
+    assert len(todo_list.get_tasks()) == 2
+    todo_list.close()
+    assert file_state(directory) == before
+
+
+def test_auto_archive_moves_old_completed_tasks(tmp_path):
+    filename = old_completed_list(tmp_path)
+    todo_list = TodoList(filename, auto_archive=True)
+    assert [task["title"] for task in todo_list.get_tasks()] == ["Open"]
+    assert [task["title"] for task in todo_list.get_completed_tasks(include_archived=True)] == \
+        ["Old"]
+    todo_list.close()
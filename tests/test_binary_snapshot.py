@@ -0,0 +1,63 @@
+import os
+
+from binary_snapshot import BinaryStorage, write_binary_snapshot
+from task_record import Task
+from todo import TodoList
+
+
+def open_snapshot(tmp_path, sample_tasks, **kwargs):
+    """TodoList over a tasks.bin holding the sample tasks, one with a description in the blobs"""
+    filename = str(tmp_path / "tasks.bin")
+    sample_tasks[1]["description"] = "long " * 100
+    storage = BinaryStorage(filename, **kwargs)
+    write_binary_snapshot(filename, [Task(dict(task, id=task_id))
+                                     for task_id, task in enumerate(sample_tasks, 1)],
+                          blobs=storage.blobs)
+    return TodoList(filename, storage, archive_after_days=None)
+
+
+def reopened(todo_list):
+    """Every task as stored in the files, read by a second task list"""
+    filename = todo_list.filename
+    other = TodoList(filename, BinaryStorage(filename), archive_after_days=None)
+    tasks = {task["id"]: dict(task) for task in other.get_tasks()}
+    other.close()
+    return tasks
+
+
+def edit(todo_list):
+    todo_list.update_task(3, {"title": "Renamed"})
+    todo_list.delete_task(4)
+    todo_list.add_task({"title": "Added", "due_date": "2025-07-01"})
+
+
+def test_save_copies_records_never_decoded(tmp_path, sample_tasks):
+    todo_list = open_snapshot(tmp_path, sample_tasks)
+    edit(todo_list)
+    todo_list.save_tasks()
+    table = todo_list.tasks_by_id
+    assert len(table.loaded) == 2
+    assert table.snapshot.path == todo_list.filename
+    assert not os.path.exists(f"{todo_list.filename}.journal")
+    expected = {task["id"]: dict(task) for task in todo_list.get_tasks()}
+    assert reopened(todo_list) == expected
+    assert expected[2]["description"] == "long " * 100
+    assert expected[3]["title"] == "Renamed" and 4 not in expected and 31 in expected
+    todo_list.close()
+
+
+def test_compaction_moves_the_table_to_the_new_snapshot(tmp_path, sample_tasks):
+    todo_list = open_snapshot(tmp_path, sample_tasks, compact_threshold=1, background=False)
+    table = todo_list.tasks_by_id
+    first = table.snapshot
+    edit(todo_list)
+    todo_list.refresh()
+    assert table.snapshot is not first
+    assert len(table.loaded) == 2
+    # Changed after the snapshot was written, kept on top of it
+    todo_list.delete_task(5)
+    todo_list.update_task(6, {"priority": "Low"})
+    expected = {task["id"]: dict(task) for task in todo_list.get_tasks()}
+    assert len(expected) == 29
+    assert reopened(todo_list) == expected
+    todo_list.close()
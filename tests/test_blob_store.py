@@ -0,0 +1,67 @@
+import os
+
+from blob_store import BlobRef, BlobStore, attach_blobs, store_blobs
+from storage import JsonStorage
+from task_record import load_text
+
+
+def test_only_long_texts_go_to_the_blob_file(tmp_path):
+    blobs = BlobStore(str(tmp_path / "tasks.json.blobs"), threshold=10)
+    short, long = "x" * 9, "é" * 10
+    assert store_blobs({"description": short}, blobs)["description"] == short
+    ref = store_blobs({"description": long}, blobs)["description"]
+    assert type(ref) is BlobRef and ref.load() == long
+    assert ref.length == len(long.encode('utf-8'))
+    inline = BlobStore(str(tmp_path / "inline.blobs"), threshold=None)
+    assert store_blobs({"description": long * 100}, inline)["description"] == long * 100
+    assert not os.path.exists(inline.path)
+    blobs.close()
+
+
+def test_refs_read_only_what_they_need(tmp_path):
+    blobs = BlobStore(str(tmp_path / "tasks.json.blobs"))
+    first = blobs.put("Meeting notes " * 40)
+    second = blobs.put("ü" * 300)
+    assert first.load() == "Meeting notes " * 40
+    assert second.preview(5) == ("üüüüü", True)
+    assert second.preview(300) == ("ü" * 300, False)
+    assert not BlobRef(blobs, 0, 0) and BlobRef(blobs, 0, 0).load() == ""
+    blobs.close()
+
+
+def test_the_same_text_is_written_once(tmp_path):
+    blobs = BlobStore(str(tmp_path / "tasks.json.blobs"))
+    text = "Long description " * 30
+    ref = blobs.put(text)
+    size = os.path.getsize(blobs.path)
+    assert blobs.put("".join(["Long description "] * 30)) is ref
+    assert os.path.getsize(blobs.path) == size
+    # Keyed by a digest, the texts themselves aren't kept
+    assert text not in blobs._written
+    blobs.close()
+
+
+def test_attach_blobs_turns_saved_refs_back(tmp_path):
+    blobs = BlobStore(str(tmp_path / "tasks.json.blobs"))
+    ref = blobs.put("Saved text " * 30)
+    saved = {"id": 1, "description": {"$blob": [ref.offset, ref.length]}}
+    assert attach_blobs(dict(saved), blobs)["description"] == ref
+    assert attach_blobs(dict(saved), blobs, lazy=False)["description"] == "Saved text " * 30
+    assert attach_blobs({"description": "plain"}, blobs) == {"description": "plain"}
+    blobs.close()
+
+
+def test_descriptions_survive_a_save(tmp_path):
+    filename = str(tmp_path / "tasks.json")
+    storage = JsonStorage(filename)
+    tasks = [{"id": 1, "title": "Long", "description": "d" * 1000},
+             {"id": 2, "title": "Short", "description": "d"}]
+    storage.save(tasks)
+    storage.close()
+    with open(filename, 'rb') as f:
+        assert b"d" * 1000 not in f.read()
+    storage = JsonStorage(filename)
+    loaded = storage.load()
+    assert type(loaded[0]["description"]) is BlobRef
+    assert [load_text(task["description"]) for task in loaded] == ["d" * 1000, "d"]
+    storage.close()
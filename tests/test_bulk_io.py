@@ -0,0 +1,55 @@
+import pytest
+
+from bulk_io import InvalidTaskError, validate_task
+from conftest import open_backend
+from todo import TodoList, run_command
+
+
+def exported_tasks(todo_list):
+    return sorted((dict(task) for task in todo_list.get_tasks(include_archived=True)),
+                  key=lambda task: task["id"])
+
+
+def test_json_export_imports_back(todo_list, sample_tasks, tmp_path):
+    todo_list.add_tasks(sample_tasks)
+    todo_list.add_task({"title": "No priority", "description": "", "due_date": None,
+                        "priority": None, "completed": False, "completed_at": None})
+    before = exported_tasks(todo_list)
+    todo_list.close()
+    kind = todo_list.filename.rsplit(".", 1)[1]
+    export = str(tmp_path / "export.json")
+    assert run_command(["--tasks", todo_list.filename, "export", export]) == 0
+
+    directory = tmp_path / "copy"
+    directory.mkdir()
+    copy = open_backend(kind, str(directory))
+    copy.close()
+    assert run_command(["--tasks", copy.filename, "import", export]) == 0
+    copy = open_backend(kind, str(directory))
+    try:
+        # The import hands out new ids, in the order the tasks were exported
+        assert [{**task, "id": None} for task in exported_tasks(copy)] == \
+            [{**task, "id": None} for task in before]
+    finally:
+        copy.close()
+
+
+def test_null_priority_is_accepted():
+    assert validate_task({"title": "Task", "priority": None})["priority"] is None
+    with pytest.raises(InvalidTaskError):
+        validate_task({"title": "Task", "priority": "Urgent"})
+
+
+def test_export_streams_the_archive(tmp_path):
+    filename = str(tmp_path / "tasks.json")
+    todo_list = TodoList(filename, archive_after_days=None)
+    for title, completed_at in (("Old", "2020-01-01 10:00:00"), ("Open", None)):
+        todo_list.add_task({"title": title, "completed": completed_at is not None,
+                            "completed_at": completed_at})
+    assert todo_list.archive_completed(30) == 1
+    assert not todo_list.archive.is_open
+    tasks = list(todo_list.iter_tasks(include_archived=True))
+    assert [task["title"] for task in tasks] == ["Open", "Old"]
+    # Read a segment at a time, the archive isn't kept in memory
+    assert not todo_list.archive.is_open
+    todo_list.close()
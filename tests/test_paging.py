@@ -0,0 +1,88 @@
+import pytest
+
+from paging import encode_cursor
+from sorted_views import SORT_KEYS
+
+
+def all_pages(todo_list, **kwargs):
+    """Tasks of every page in order and the number of pages"""
+    tasks, pages, after = [], 0, None
+    while True:
+        page = todo_list.get_page(after=after, **kwargs)
+        tasks.extend(page.tasks)
+        pages += 1
+        if page.cursor is None:
+            return tasks, pages
+        after = page.cursor
+
+
+@pytest.mark.parametrize("sort", [None] + list(SORT_KEYS))
+def test_pages_cover_every_task_once(todo_list, sample_tasks, sort):
+    todo_list.add_tasks(sample_tasks)
+    tasks, pages = all_pages(todo_list, sort=sort, limit=7)
+    assert pages == 5
+    key = SORT_KEYS.get(sort, lambda task: 0)
+    expected = sorted(todo_list.get_tasks(), key=lambda task: (key(task), task["id"]))
+    assert [task["id"] for task in tasks] == [task["id"] for task in expected]
+
+
+def test_filters_and_queries(todo_list, sample_tasks):
+    todo_list.add_tasks(sample_tasks)
+    tasks, _ = all_pages(todo_list, filter="pending", query="category:Work", sort="Title",
+                         limit=4)
+    expected = sorted((task for task in todo_list.get_tasks()
+                       if not task["completed"] and task["category"] == "Work"),
+                      key=lambda task: (task["title"].lower(), task["id"]))
+    assert [task["id"] for task in tasks] == [task["id"] for task in expected]
+
+
+def test_search_pages(todo_list, sample_tasks):
+    todo_list.add_tasks(sample_tasks)
+    tasks, pages = all_pages(todo_list, search="groceries", limit=3)
+    assert pages == 4
+    assert [task["id"] for task in tasks] == todo_list.search("groceries")
+
+
+def test_cursor_survives_changes(todo_list, sample_tasks):
+    todo_list.add_tasks(sample_tasks)
+    page = todo_list.get_page(sort="Title", limit=10)
+    # The task the cursor points at is gone, the next page starts right after it
+    todo_list.delete_task(page.tasks[-1]["id"])
+    seen = [task["id"] for task in page.tasks[:-1]]
+    next_page = todo_list.get_page(sort="Title", limit=30, after=page.cursor)
+    seen += [task["id"] for task in next_page.tasks]
+    assert sorted(seen) == sorted(task["id"] for task in todo_list.get_tasks())
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", encode_cursor("text"),
+                                    encode_cursor([1, 2, 3]), encode_cursor(["a", "b"]),
+                                    encode_cursor(["Title", "a", "b"])])
+def test_invalid_cursors(todo_list, cursor):
+    with pytest.raises(ValueError):
+        todo_list.get_page(sort="Title", after=cursor)
+
+
+def test_cursor_of_another_sort_is_rejected(todo_list, sample_tasks):
+    todo_list.add_tasks(sample_tasks)
+    for made_for, used_with in (("Title", "Due Date"), ("Priority", "Title"), (None, "Priority"),
+                                ("Due Date", None)):
+        cursor = todo_list.get_page(sort=made_for, limit=5).cursor
+        with pytest.raises(ValueError):
+            todo_list.get_page(sort=used_with, after=cursor)
+
+
+def test_titles_sort_the_same_on_every_backend(todo_list):
+    # Non-ASCII capitals, which SQLite's LOWER() leaves as they are
+    titles = ["Zebra", "Élan", "éclair", "apple", "Ärger", "ärmel", "Ωmega", "Beta"]
+    for title in titles:
+        todo_list.add_task({"title": title})
+    tasks, _ = all_pages(todo_list, sort="Title", limit=3)
+    assert [task["title"] for task in tasks] == sorted(titles, key=str.lower)
+    assert todo_list.get_sorted_ids("Title") == [task["id"] for task in tasks]
+
+
+def test_invalid_arguments(todo_list):
+    for kwargs in ({"limit": 0}, {"sort": "Colour"}, {"filter": "someday"},
+                   {"query": "priority:urgent"}, {"search": "x", "after": encode_cursor(-1)}):
+        with pytest.raises(ValueError):
+            todo_list.get_page(**kwargs)
@@ -0,0 +1,63 @@
+import pytest
+
+pytest.importorskip("PyQt5")
+pytest.importorskip("core.settings")
+
+from modern_todo import TaskQueryWorker
+
+
+def run_worker(todo_list, view="all", query=None, search_text="", sort_by="Title",
+               after=None, limit=10):
+    """Run one worker on this thread, returns its finished and failed emissions"""
+    finished, failed = [], []
+    worker = TaskQueryWorker(todo_list, 1, lambda generation: generation == 1, view, query,
+                             search_text, sort_by, after, limit)
+    worker.signals.finished.connect(lambda *args: finished.append(args))
+    worker.signals.failed.connect(lambda *args: failed.append(args))
+    worker.run()
+    return finished, failed
+
+
+def test_worker_pages_through_a_query(todo_list, sample_tasks):
+    todo_list.add_tasks(sample_tasks)
+    high = sorted((task for task in todo_list.get_tasks() if task["priority"] == "High"),
+                  key=lambda task: task["title"].lower())
+    (generation, ids, cursor, appended), = run_worker(todo_list, query="priority:High",
+                                                      limit=6)[0]
+    assert generation == 1 and not appended
+    assert ids == [task["id"] for task in high[:6]]
+    (_, more, last, appended), = run_worker(todo_list, query="priority:High", after=cursor,
+                                           limit=6)[0]
+    assert appended and last is None
+    assert more == [task["id"] for task in high[6:]]
+
+
+def test_errors_are_reported(todo_list):
+    finished, failed = run_worker(todo_list, sort_by="Colour")
+    assert finished == []
+    assert len(failed) == 1 and failed[0][0] == 1
+
+
+def test_stale_cursor_is_reported(todo_list, sample_tasks):
+    todo_list.add_tasks(sample_tasks)
+    (_, _, cursor, _), = run_worker(todo_list, sort_by="Priority")[0]
+    finished, failed = run_worker(todo_list, sort_by="Title", after=cursor)
+    assert finished == []
+    assert len(failed) == 1 and failed[0][0] == 1
+
+
+def test_changing_task_list_is_read_again(todo_list, sample_tasks, monkeypatch):
+    todo_list.add_tasks(sample_tasks)
+    get_page = todo_list.get_page
+    calls = []
+
+    def changing(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("dictionary changed size during iteration")
+        return get_page(*args, **kwargs)
+
+    monkeypatch.setattr(todo_list, "get_page", changing)
+    finished, failed = run_worker(todo_list)
+    assert len(calls) == 2 and failed == []
+    assert len(finished[0][1]) == 10 and finished[0][2] is not None
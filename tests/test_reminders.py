@@ -0,0 +1,87 @@
+from reminders import DueScheduler, due_times
+
+DAY = "2025-06-10"
+START, END = due_times(DAY)
+
+
+class Clock:
+    """Time that only moves when a test sets it"""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def open_scheduler(todo_list, now):
+    clock = Clock(now)
+    scheduler = DueScheduler(todo_list, clock)
+    fired = []
+    scheduler.add_listener(fired.extend)
+    return scheduler, clock, fired
+
+
+def test_due_then_overdue(todo_list):
+    task = todo_list.add_task({"title": "Report", "due_date": DAY, "completed": False})
+    scheduler, clock, fired = open_scheduler(todo_list, START - 60)
+    assert scheduler.fire_due() == []
+    assert scheduler.next_deadline() == START
+    clock.now = START
+    assert [(reminder.kind, reminder.task["id"]) for reminder in scheduler.fire_due()] == \
+        [("due", task["id"])]
+    assert scheduler.next_deadline() == END
+    clock.now = END + 5
+    assert [reminder.kind for reminder in scheduler.fire_due()] == ["overdue"]
+    assert [reminder.kind for reminder in fired] == ["due", "overdue"]
+    assert scheduler.next_deadline() is None and len(scheduler) == 0
+    scheduler.close()
+
+
+def test_overdue_task_only_gets_the_overdue_reminder(todo_list):
+    todo_list.add_task({"title": "Late", "due_date": DAY, "completed": False})
+    scheduler, clock, fired = open_scheduler(todo_list, END + 60)
+    assert [reminder.kind for reminder in scheduler.fire_due()] == ["overdue"]
+    assert scheduler.fire_due() == []
+    scheduler.close()
+
+
+def test_changing_the_due_date_reschedules(todo_list):
+    task = todo_list.add_task({"title": "Report", "due_date": "2025-06-20", "completed": False})
+    scheduler, clock, fired = open_scheduler(todo_list, START - 60)
+    woken = []
+    scheduler.add_wakeup(lambda: woken.append(scheduler.next_deadline()))
+    assert scheduler.next_deadline() == due_times("2025-06-20")[0]
+    todo_list.update_task(task["id"], {"due_date": DAY})
+    assert woken == [START]
+    # Moved later, the stale entry for the earlier day is skipped
+    todo_list.update_task(task["id"], {"due_date": "2025-06-30"})
+    assert woken == [START]
+    clock.now = END
+    assert scheduler.fire_due() == []
+    assert scheduler.next_deadline() == due_times("2025-06-30")[0]
+    scheduler.close()
+
+
+def test_completed_and_deleted_tasks_are_unscheduled(todo_list):
+    done = todo_list.add_task({"title": "Done", "due_date": DAY, "completed": False})
+    gone = todo_list.add_task({"title": "Gone", "due_date": DAY, "completed": False})
+    scheduler, clock, fired = open_scheduler(todo_list, START - 60)
+    assert len(scheduler) == 2
+    todo_list.update_task(done["id"], {"completed": True})
+    todo_list.delete_task(gone["id"])
+    assert len(scheduler) == 0
+    clock.now = END + 60
+    assert scheduler.fire_due() == [] and fired == []
+    scheduler.close()
+
+
+def test_entry_of_a_task_that_lost_its_due_date_is_skipped(todo_list):
+    task = todo_list.add_task({"title": "Report", "due_date": DAY, "completed": False})
+    scheduler, clock, fired = open_scheduler(todo_list, START - 60)
+    # Changed without the scheduler hearing of it
+    todo_list.remove_listener(scheduler)
+    todo_list.update_task(task["id"], {"due_date": None})
+    clock.now = START
+    assert scheduler.fire_due() == []
+    assert len(scheduler) == 0
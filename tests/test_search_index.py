@@ -0,0 +1,59 @@
+from search_index import SearchIndex
+
+
+def scan(tasks, text):
+    """What the index must return: substring matches, title hits first"""
+    text = text.lower()
+    in_title = [task["id"] for task in tasks if text in task["title"].lower()]
+    return in_title + [task["id"] for task in tasks if task["id"] not in in_title
+                       and text in task["description"].lower()]
+
+
+def indexed(sample_tasks):
+    tasks = [dict(task, id=i) for i, task in enumerate(sample_tasks, 1)]
+    index = SearchIndex()
+    index.rebuild(tasks)
+    return index, tasks
+
+
+def test_grams_lead_to_the_tokens_containing_them(sample_tasks):
+    index, _ = indexed(sample_tasks)
+    assert set(index.matching_tokens("ep")) == {"step", "report"}
+    assert set(index.matching_tokens("roce")) == {"groceries"}
+    assert set(index.matching_tokens("xyz")) == set()
+    assert index.gram_tokens["rev"] == {"review"}
+
+
+def test_matches_a_substring_scan(sample_tasks):
+    index, tasks = indexed(sample_tasks)
+    by_id = {task["id"]: task for task in tasks}
+    for text in ("report", "TASK 1", "ask 2", "one of", "step", "view", "nothing"):
+        assert index.search(text, by_id.get) == scan(tasks, text), text
+
+
+def test_add_remove_and_update_patch_the_index(sample_tasks):
+    index, tasks = indexed(sample_tasks)
+    by_id = {task["id"]: task for task in tasks}
+    new = {"id": 100, "title": "Quarterly budget", "description": "Spreadsheet"}
+    index.add(new)
+    by_id[100] = new
+    assert index.search("budget") == [100]
+    assert index.search("sheet") == [100]
+
+    index.remove(1)
+    del by_id[1]
+    assert 1 not in index.search("task")
+    assert 1 not in index.task_tokens
+
+    by_id[100] = dict(new, title="Yearly plan", description="")
+    index.update(by_id[100])
+    assert index.search("budget") == []
+    # Tokens and grams nothing contains any more are dropped
+    assert "spreadsheet" not in index.postings
+    assert "udg" not in index.gram_tokens
+    assert index.search("early") == [100]
+
+    rebuilt = SearchIndex()
+    rebuilt.rebuild(by_id.values())
+    assert index.postings == rebuilt.postings
+    assert index.gram_tokens == rebuilt.gram_tokens
@@ -0,0 +1,86 @@
+import json
+import asyncio
+
+from todo_server import TaskServer
+
+
+async def request(host, port, method, path, payload=None):
+    """(status, decoded body) of one request on a fresh connection"""
+    reader, writer = await asyncio.open_connection(host, port)
+    body = b"" if payload is None else json.dumps(payload).encode('utf-8')
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+    return status, json.loads(body) if body else None
+
+
+def run_server(todo_list, client):
+    """Run client(host, port) against a TaskServer over todo_list"""
+    async def main():
+        server = TaskServer(todo_list)
+        host, port = await server.start(port=0)
+        try:
+            return await client(host, port)
+        finally:
+            await server.stop()
+    return asyncio.run(main())
+
+
+def test_post_task_returns_its_id(todo_list):
+    async def client(host, port):
+        status, task = await request(host, port, "POST", "/tasks",
+                                     {"title": "Write report", "priority": "High"})
+        assert status == 201
+        status, fetched = await request(host, port, "GET", f"/tasks/{task['id']}")
+        assert status == 200
+        return task, fetched
+
+    task, fetched = run_server(todo_list, client)
+    assert fetched["title"] == task["title"] == "Write report"
+    assert todo_list.get_task(task["id"])["priority"] == "High"
+
+
+def test_batch_adds_updates_and_deletes(todo_list, sample_tasks):
+    first = todo_list.add_task(dict(sample_tasks[0]))
+
+    async def client(host, port):
+        return await request(host, port, "POST", "/batch", [
+            {"op": "add", "task": {"title": "One"}},
+            {"op": "add", "task": {"title": "Two"}},
+            {"op": "update", "id": first["id"], "fields": {"completed": False}},
+            {"op": "delete", "id": 9999},
+        ])
+
+    status, result = run_server(todo_list, client)
+    assert status == 200
+    assert [task["title"] for task in result["added"]] == ["One", "Two"]
+    ids = [task["id"] for task in result["added"]]
+    assert len(set(ids)) == 2 and first["id"] not in ids
+    assert [todo_list.get_task(task_id)["title"] for task_id in ids] == ["One", "Two"]
+    assert result["updated"] == [first["id"]]
+    assert result["missing"] == [9999]
+    assert todo_list.get_task(first["id"])["completed"] is False
+
+
+def test_concurrent_writes_share_a_batch(todo_list):
+    async def client(host, port):
+        return await asyncio.gather(*(
+            request(host, port, "POST", "/tasks", {"title": f"Task {i}"}) for i in range(20)))
+
+    responses = run_server(todo_list, client)
+    assert [status for status, _ in responses] == [201] * 20
+    ids = {task["id"] for _, task in responses}
+    assert len(ids) == 20
+    assert {task["id"] for task in todo_list.get_tasks()} == ids
+
+
+def test_invalid_task_is_rejected(todo_list):
+    async def client(host, port):
+        return await request(host, port, "POST", "/tasks", {"title": ""})
+
+    status, body = run_server(todo_list, client)
+    assert status == 400 and "title" in body["error"]
+    assert todo_list.get_tasks() == []
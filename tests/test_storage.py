@@ -0,0 +1,281 @@
+import os
+
+import pytest
+
+from conftest import open_backend
+from sqlite_store import SqliteTodoList
+from storage import (SNAPSHOT_MAGIC, CorruptSnapshotError, JournalStorage, JsonStorage,
+                     WriteBehindStorage, read_snapshot, write_snapshot)
+from todo import TodoList
+
+
+def reopen(todo_list):
+    """The same task list read back from its file"""
+    todo_list.close()
+    directory, name = os.path.split(todo_list.filename)
+    return open_backend(name.rsplit(".", 1)[1], directory)
+
+
+def saved_tasks(todo_list):
+    return sorted((dict(task) for task in todo_list.get_tasks()), key=lambda task: task["id"])
+
+
+def test_add_update_delete(todo_list, sample_tasks):
+    first = todo_list.add_task(dict(sample_tasks[0]))
+    second = todo_list.add_task(dict(sample_tasks[1]))
+    assert first["id"] != second["id"]
+    updated = todo_list.update_task(first["id"], {"title": "Renamed", "priority": "Low"})
+    assert updated["title"] == "Renamed"
+    assert todo_list.get_task(first["id"])["priority"] == "Low"
+    assert todo_list.delete_task(second["id"])
+    assert todo_list.get_task(second["id"]) is None
+    assert not todo_list.delete_task(second["id"])
+    assert todo_list.update_task(second["id"], {"title": "Gone"}) is None
+    assert [task["title"] for task in todo_list.get_tasks()] == ["Renamed"]
+
+
+def test_changes_survive_reopening(todo_list, sample_tasks):
+    added = [todo_list.add_task(dict(task)) for task in sample_tasks]
+    todo_list.update_task(added[3]["id"], {"description": "x" * 5000, "completed": True})
+    todo_list.delete_task(added[7]["id"])
+    before = saved_tasks(todo_list)
+    reopened = reopen(todo_list)
+    try:
+        assert saved_tasks(reopened) == before
+        assert len(before) == 29
+        # Ids aren't handed out twice after reopening
+        assert reopened.add_task({"title": "New"})["id"] not in {task["id"] for task in before}
+    finally:
+        reopened.close()
+
+
+def test_batch_is_applied_on_exit(todo_list, sample_tasks):
+    kept = todo_list.add_task(dict(sample_tasks[0]))
+    dropped = todo_list.add_task(dict(sample_tasks[1]))
+    reported = []
+    todo_list.add_listener(reported.append)
+    with todo_list.batch() as batch:
+        new = [batch.add_task(dict(task)) for task in sample_tasks[2:5]]
+        batch.update_task(kept["id"], {"title": "Kept"})
+        batch.delete_task(dropped["id"])
+        assert todo_list.get_task(dropped["id"]) is not None
+    assert len(reported) == 1
+    changes = reported[0]
+    assert sorted(changes.added) == sorted(task["id"] for task in new)
+    assert list(changes.updated) == [kept["id"]]
+    assert list(changes.deleted) == [dropped["id"]]
+    assert todo_list.get_task(kept["id"])["title"] == "Kept"
+    assert todo_list.get_task(dropped["id"]) is None
+    assert len(todo_list.get_tasks()) == 4
+
+
+def test_failed_batch_changes_nothing(todo_list, sample_tasks):
+    task = todo_list.add_task(dict(sample_tasks[0]))
+    with pytest.raises(RuntimeError):
+        with todo_list.batch() as batch:
+            batch.add_task(dict(sample_tasks[1]))
+            batch.delete_task(task["id"])
+            raise RuntimeError("stop")
+    assert [saved["id"] for saved in todo_list.get_tasks()] == [task["id"]]
+
+
+def test_compaction_keeps_every_task(tmp_path, sample_tasks):
+    filename = str(tmp_path / "tasks.json")
+    todo_list = TodoList(filename, JournalStorage(filename, compact_threshold=2000,
+                                                   background=False))
+    for task in sample_tasks:
+        todo_list.add_task(dict(task))
+    todo_list.close()
+    assert os.path.getsize(filename + ".journal") < 2000
+    reopened = TodoList(filename)
+    assert saved_tasks(reopened) == saved_tasks(todo_list)
+    reopened.close()
+
+
+def test_torn_journal_line_is_dropped(tmp_path, sample_tasks):
+    filename = str(tmp_path / "tasks.json")
+    todo_list = TodoList(filename)
+    for task in sample_tasks[:3]:
+        todo_list.add_task(dict(task))
+    todo_list.close()
+    with open(filename + ".journal", 'a', encoding='utf-8') as f:
+        f.write('{"op": "delete", "i')
+    reopened = TodoList(filename)
+    assert len(reopened.get_tasks()) == 3
+    reopened.add_task({"title": "After", "completed": False})
+    reopened.close()
+    assert len(TodoList(filename).get_tasks()) == 4
+
+
+def test_view_queries(todo_list, sample_tasks):
+    for task in sample_tasks:
+        todo_list.add_task(dict(task))
+    tasks = todo_list.get_tasks()
+    assert todo_list.get_tasks_due_on("2025-06-03") == \
+        [task for task in tasks if task["due_date"] == "2025-06-03"]
+    assert [task["id"] for task in todo_list.get_completed_tasks()] == \
+        [task["id"] for task in tasks if task["completed"]]
+    assert [task["id"] for task in todo_list.get_tasks_due_after("2025-06-20")] == [
+        task["id"] for task in sorted(tasks, key=lambda task: (task["due_date"], task["id"]))
+        if task["due_date"] > "2025-06-20"]
+
+
+def test_json_migrates_to_sqlite(tmp_path, sample_tasks):
+    filename = str(tmp_path / "tasks.json")
+    todo_list = TodoList(filename)
+    for task in sample_tasks:
+        todo_list.add_task(dict(task))
+    todo_list.save_tasks()
+    # Left in the journal, the migration replays it
+    todo_list.delete_task(5)
+    todo_list.update_task(6, {"title": "Renamed"})
+    todo_list.close()
+    database = SqliteTodoList(str(tmp_path / "tasks.db"))
+    other = SqliteTodoList(database.filename)
+    assert database.import_json(filename) == 30
+    assert saved_tasks(database) == saved_tasks(TodoList(filename))
+    assert database.get_task(6)["title"] == "Renamed"
+    # Not logged task by task, other connections don't replay the migration
+    assert database.conn.execute("SELECT COUNT(*) FROM task_changes").fetchone()[0] == 0
+    assert not other.refresh()
+    assert len(other.get_tasks()) == 29
+    other.close()
+    database.close()
+
+
+def test_other_processes_changes_are_read(todo_list, sample_tasks):
+    todo_list.add_task(dict(sample_tasks[0]))
+    directory, name = os.path.split(todo_list.filename)
+    other = open_backend(name.rsplit(".", 1)[1], directory)
+    try:
+        added = other.add_task(dict(sample_tasks[1]))
+    finally:
+        other.close()
+    todo_list.refresh()
+    assert todo_list.get_task(added["id"])["title"] == sample_tasks[1]["title"]
+
+
+def write_behind_list(tmp_path, window):
+    filename = str(tmp_path / "tasks.json")
+    return TodoList(filename, WriteBehindStorage(filename, window=window),
+                    archive_after_days=None)
+
+
+def journal_lines(todo_list):
+    with open(todo_list.storage.journal_path, 'rb') as f:
+        return f.read().count(b"\n")
+
+
+def test_write_behind_coalesces_changes(tmp_path, monkeypatch):
+    synced = []
+    fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: (synced.append(fd), fsync(fd)))
+    todo_list = write_behind_list(tmp_path, window=1.0)
+    task = todo_list.add_task({"title": "Toggle", "completed": False})
+    for i in range(200):
+        todo_list.update_task(task["id"], {"completed": i % 2 == 0})
+    todo_list.flush()
+    # Written and synced once, flush() didn't wait out the window
+    assert todo_list.storage.write_count == 1
+    assert len(synced) == 1
+    assert journal_lines(todo_list) == 201
+    todo_list.close()
+
+
+def test_write_behind_close_drains_the_queue(tmp_path, sample_tasks):
+    todo_list = write_behind_list(tmp_path, window=30)
+    for task in sample_tasks:
+        todo_list.add_task(dict(task))
+    before = saved_tasks(todo_list)
+    todo_list.close()
+    assert saved_tasks(TodoList(todo_list.filename)) == before
+
+
+def test_write_behind_retries_a_failed_write(tmp_path, monkeypatch):
+    todo_list = write_behind_list(tmp_path, window=0.2)
+    append_many = JournalStorage.append_many
+    failures = [OSError("disk full")]
+
+    def failing_append_many(storage, records, tasks):
+        if failures:
+            raise failures.pop()
+        append_many(storage, records, tasks)
+
+    monkeypatch.setattr(JournalStorage, "append_many", failing_append_many)
+    todo_list.add_task({"title": "Kept", "completed": False})
+    with pytest.raises(OSError):
+        todo_list.flush()
+    # The writer keeps the records and writes them on its next attempt
+    todo_list.flush()
+    assert journal_lines(todo_list) == 1
+    todo_list.close()
+    assert [task["title"] for task in TodoList(todo_list.filename).get_tasks()] == ["Kept"]
+
+
+def snapshot_versions(tmp_path, count):
+    """tasks.json written count times, the older versions kept as backups"""
+    filename = str(tmp_path / "tasks.json")
+    for version in range(1, count + 1):
+        write_snapshot(filename, [{"id": 1, "title": f"Version {version}"}])
+    return filename
+
+
+def loaded_title(filename):
+    storage = JsonStorage(filename)
+    try:
+        return storage.load()[0]["title"]
+    finally:
+        storage.close()
+
+
+def test_snapshot_is_checksummed(tmp_path):
+    filename = snapshot_versions(tmp_path, 1)
+    with open(filename, 'rb') as f:
+        assert f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+    assert read_snapshot(filename) == [{"id": 1, "title": "Version 1"}]
+
+
+def test_truncated_snapshot_falls_back_to_a_backup(tmp_path):
+    filename = snapshot_versions(tmp_path, 3)
+    with open(filename, 'r+b') as f:
+        f.truncate(os.path.getsize(filename) - 10)
+    assert loaded_title(filename) == "Version 2"
+
+
+def test_checksum_mismatch_falls_back_to_a_backup(tmp_path):
+    filename = snapshot_versions(tmp_path, 3)
+    with open(filename, 'rb') as f:
+        data = f.read()
+    # Same length, one character of the body changed
+    with open(filename, 'wb') as f:
+        f.write(data.replace(b"Version 3", b"Version 9"))
+    assert loaded_title(filename) == "Version 2"
+    os.remove(f"{filename}.1")
+    assert loaded_title(filename) == "Version 1"
+
+
+def test_unfinished_write_is_used_when_the_snapshot_is_missing(tmp_path):
+    filename = snapshot_versions(tmp_path, 2)
+    os.replace(filename, f"{filename}.tmp")
+    assert loaded_title(filename) == "Version 2"
+
+
+def test_no_valid_snapshot_is_an_error(tmp_path):
+    filename = snapshot_versions(tmp_path, 2)
+    for path in (filename, f"{filename}.1"):
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) - 1)
+    with pytest.raises(CorruptSnapshotError):
+        read_snapshot(filename)
+
+
+def test_empty_and_legacy_files_load(tmp_path):
+    filename = str(tmp_path / "tasks.json")
+    open(filename, 'wb').close()
+    assert read_snapshot(filename) == []
+    todo_list = TodoList(filename)
+    assert todo_list.get_tasks() == []
+    todo_list.close()
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write('[{"id": 4, "title": "Plain", "completed": false}]')
+    assert loaded_title(filename) == "Plain"
@@ -0,0 +1,81 @@
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from task_columns import TaskColumns
+
+TODAY = "2025-06-10"
+
+
+def numbered(sample_tasks):
+    return [dict(task, id=i) for i, task in enumerate(sample_tasks, 1)]
+
+
+def selected(columns, mask):
+    return sorted(int(task_id) for task_id in columns.ids(mask))
+
+
+def test_masks_match_the_views(sample_tasks):
+    tasks = numbered(sample_tasks)
+    tasks[0]["due_date"] = None
+    columns = TaskColumns()
+    columns.rebuild(tasks)
+    assert selected(columns, columns.today_mask(TODAY)) == \
+        [task["id"] for task in tasks if task["due_date"] == TODAY]
+    assert selected(columns, columns.upcoming_mask(TODAY)) == \
+        [task["id"] for task in tasks if (task["due_date"] or "") > TODAY]
+    assert selected(columns, columns.completed_mask()) == \
+        [task["id"] for task in tasks if task["completed"]]
+    assert selected(columns, columns.overdue_mask(TODAY)) == \
+        [task["id"] for task in tasks
+         if task["due_date"] and task["due_date"] < TODAY and not task["completed"]]
+    assert columns.count(columns.completed_mask()) == 10
+
+
+def test_group_bys_count_like_a_scan(sample_tasks):
+    tasks = numbered(sample_tasks)
+    tasks[1]["category"] = None
+    columns = TaskColumns()
+    columns.rebuild(tasks)
+    assert columns.count_by_category() == \
+        dict(Counter(task["category"] for task in tasks if task["category"]))
+    assert columns.count_by_priority() == dict(Counter(task["priority"] for task in tasks))
+    pending = ~columns.completed_mask()
+    assert columns.count_by_priority(pending) == \
+        dict(Counter(task["priority"] for task in tasks if not task["completed"]))
+
+
+def test_completed_per_day(sample_tasks):
+    tasks = numbered(sample_tasks)
+    tasks[0]["completed_at"] = "2025-05-09 23:59:59"
+    columns = TaskColumns()
+    columns.rebuild(tasks)
+    assert columns.completed_per_day() == {"2025-05-07": 9, "2025-05-09": 1}
+    first = columns.ids() == 1
+    assert columns.completed_per_day(first) == {"2025-05-09": 1}
+
+
+def test_patches_keep_the_columns_in_sync(sample_tasks):
+    tasks = numbered(sample_tasks)
+    columns = TaskColumns(capacity=4)
+    for task in tasks[:20]:
+        columns.add(task)
+    columns.remove(3)
+    columns.remove(20)
+    columns.update(dict(tasks[4], completed=True, category="Errands"))
+    columns.update(tasks[25])
+    expected = {task["id"]: task for task in tasks[:20] if task["id"] not in (3, 20)}
+    expected[5] = dict(tasks[4], completed=True, category="Errands")
+    expected[26] = tasks[25]
+
+    rebuilt = TaskColumns()
+    rebuilt.rebuild(expected.values())
+    assert len(columns) == len(rebuilt) == 19
+    assert columns.count_by_category() == rebuilt.count_by_category()
+    assert columns.completed_per_day() == rebuilt.completed_per_day()
+    assert selected(columns, columns.completed_mask()) == \
+        selected(rebuilt, rebuilt.completed_mask())
+    for task_id, row in columns.row_by_id.items():
+        assert columns.id[row] == task_id
@@ -0,0 +1,76 @@
+from datetime import date
+
+import pytest
+
+from task_query import QuerySyntaxError, compile_query
+
+TODAY = date(2025, 6, 10)
+
+
+def matching(text, tasks):
+    accept = compile_query(text).predicate(TODAY)
+    return [task["title"] for task in tasks if accept(task)]
+
+
+def titles(tasks, test):
+    return [task["title"] for task in tasks if test(task)]
+
+
+def test_field_terms(sample_tasks):
+    assert matching("priority:high", sample_tasks) == \
+        titles(sample_tasks, lambda task: task["priority"] == "High")
+    assert matching("category:work -completed", sample_tasks) == titles(
+        sample_tasks, lambda task: task["category"] == "Work" and not task["completed"])
+    assert matching("due<=2025-06-05", sample_tasks) == \
+        titles(sample_tasks, lambda task: task["due_date"] <= "2025-06-05")
+
+
+def test_relative_dates_count_from_today(sample_tasks):
+    assert matching("due>today due<=+1w", sample_tasks) == \
+        titles(sample_tasks, lambda task: "2025-06-10" < task["due_date"] <= "2025-06-17")
+    assert matching("overdue", sample_tasks) == titles(
+        sample_tasks, lambda task: task["due_date"] < "2025-06-10" and not task["completed"])
+
+
+def test_text_terms(sample_tasks):
+    assert matching('"task 1"', sample_tasks) == \
+        titles(sample_tasks, lambda task: "task 1" in task["title"].lower())
+    assert matching("groceries -personal", sample_tasks) == \
+        titles(sample_tasks, lambda task: "groceries" in task["title"])
+
+
+def test_plans_are_cached():
+    assert compile_query("priority:Low pending") is compile_query("priority:Low pending")
+
+
+def test_fields_read_by_a_query():
+    assert compile_query("priority:low overdue report").fields == \
+        {"priority", "completed", "due_date", "title", "description"}
+
+
+@pytest.mark.parametrize("text", [
+    'title "unbalanced',
+    '""',
+    "due:someday",
+    "due<none",
+    "priority>low",
+    "priority:urgent",
+])
+def test_syntax_errors(text):
+    with pytest.raises(QuerySyntaxError):
+        compile_query(text)
+
+
+def test_sql_matches_the_predicate(sample_tasks, tmp_path):
+    from sqlite_store import SqliteTodoList
+    todo_list = SqliteTodoList(str(tmp_path / "tasks.db"))
+    todo_list.add_tasks(sample_tasks)
+    try:
+        for text in ("priority:high", "category:work -completed", "due>+3d", "overdue",
+                     "-due:none review", "created:2025-05-06"):
+            condition, params = compile_query(text).sql(TODAY)
+            rows = todo_list.conn.execute(
+                f"SELECT title FROM tasks WHERE {condition} ORDER BY id", params)
+            assert [title for title, in rows] == matching(text, sample_tasks), text
+    finally:
+        todo_list.close()
@@ -0,0 +1,65 @@
+import copy
+import json
+from datetime import date
+
+import pytest
+
+from storage import encode_task
+from task_record import Task, format_date, format_datetime, parse_date, parse_datetime
+
+
+def test_behaves_like_the_dict_it_replaces(sample_tasks):
+    data = {"id": 7, **sample_tasks[0], "colour": "red"}
+    task = Task(data)
+    assert dict(task) == data
+    assert list(task) == list(data)
+    assert len(task) == len(data)
+    assert task == data
+    assert "colour" in task and "missing" not in task
+    assert task.get("missing", 1) == 1
+    with pytest.raises(KeyError):
+        task["missing"]
+
+    task["completed"] = True
+    task["note"] = "x"
+    del task["colour"]
+    del task["due_date"]
+    assert "due_date" not in task and task.get("due_date") is None
+    with pytest.raises(KeyError):
+        del task["due_date"]
+    with pytest.raises(KeyError):
+        del task["colour"]
+    assert task.setdefault("priority", "Low") == data["priority"]
+    assert task.pop("note") == "x"
+    task.update({"title": "Renamed"}, category="Work")
+    expected = dict(data, completed=True, title="Renamed", category="Work")
+    del expected["colour"], expected["due_date"]
+    assert task.to_dict() == expected
+
+
+def test_copies_are_independent(sample_tasks):
+    task = Task(dict(sample_tasks[1], id=2, tags=["a"]))
+    clone = task.copy()
+    clone["title"] = "Other"
+    clone["tags"] = ["b"]
+    assert task["title"] == sample_tasks[1]["title"] and task["tags"] == ["a"]
+    assert copy.deepcopy(task) == task
+
+
+def test_dates_round_trip(sample_tasks):
+    data = dict(sample_tasks[0], id=1)
+    task = Task(data)
+    # Kept as numbers, given back as the same strings
+    assert task.due_ordinal == date(2025, 6, 1).toordinal()
+    assert task.created_seconds == parse_datetime("2025-05-06 13:36:07")
+    assert task["due_date"] == "2025-06-01"
+    assert task["created_at"] == "2025-05-06 13:36:07"
+    assert task["completed_at"] == "2025-05-07 09:00:00"
+    assert json.loads(json.dumps(task, default=encode_task)) == data
+    for value in ("2025-02-29", "tomorrow", "", None):
+        assert format_date(parse_date(value)) == value
+    for value in ("2025-05-06 24:00:00", "2025-05-06T13:36:07", None):
+        assert format_datetime(parse_datetime(value)) == value
+    # Values that aren't valid dates are kept as they are
+    task["due_date"] = "someday"
+    assert task["due_date"] == "someday" and task.due_ordinal is None
@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip("PyQt5")
+pytest.importorskip("core.settings")
+
+from modern_todo import RowIndex, TaskListModel
+
+
+def test_row_index_follows_removes_and_appends():
+    tasks = [{"id": task_id} for task_id in range(10)]
+    rows = RowIndex(tasks)
+    for task_id in (3, 0, 7):
+        del tasks[rows.get(task_id)]
+        rows.remove(task_id)
+    for task_id in (10, 11):
+        rows.append(task_id, len(tasks))
+        tasks.append({"id": task_id})
+    del tasks[rows.get(10)]
+    rows.remove(10)
+    assert [rows.get(task["id"]) for task in tasks] == list(range(len(tasks)))
+    assert rows.get(3) is None and 3 not in rows and 11 in rows
+
+
+def test_model_patches_rows_after_a_delete():
+    model = TaskListModel()
+    model.set_tasks([{"id": task_id, "title": f"Task {task_id}"} for task_id in range(5)])
+    model.remove_task(1)
+    model.append_tasks([{"id": 5, "title": "Task 5"}])
+    model.update_task({"id": 4, "title": "Renamed"})
+    assert [task["title"] for task in model.tasks] == \
+        ["Task 0", "Task 2", "Task 3", "Renamed", "Task 5"]
+    model.remove_task(5)
+    assert model.rowCount() == 4
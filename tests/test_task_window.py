@@ -0,0 +1,24 @@
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from binary_snapshot import BinaryStorage, write_binary_snapshot
+from sqlite_store import SqliteTodoList
+from storage import WriteBehindStorage
+from task_window import open_task_list
+
+
+def test_open_task_list_picks_the_file_in_use(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    todo_list = open_task_list()
+    assert isinstance(todo_list.storage, WriteBehindStorage) and todo_list.auto_archive
+    todo_list.close()
+
+    write_binary_snapshot("tasks.bin", [])
+    SqliteTodoList("tasks.db").close()
+    todo_list = open_task_list()
+    assert isinstance(todo_list.storage, BinaryStorage)
+    todo_list.close()
+    todo_list = open_task_list(use_database=True)
+    assert isinstance(todo_list, SqliteTodoList)
+    todo_list.close()
@@ -1,141 +1,742 @@
-#!/usr/bin/env python3
-
-import os
-import json
-from datetime import datetime
-
-class TodoList:
-    def __init__(self, filename="tasks.json"):
-        self.filename = filename
-        self.tasks = []
-        self.load_tasks()
-
-    def load_tasks(self):
-        """Load tasks from JSON file"""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r') as f:
-                    self.tasks = json.load(f)
-            except json.JSONDecodeError:
-                self.tasks = []
-        else:
-            self.tasks = []
-
-    def save_tasks(self):
-        """Save tasks to JSON file"""
-        with open(self.filename, 'w') as f:
-            json.dump(self.tasks, f, indent=4)
-
-    def add_task(self, task):
-        """Add a new task"""
-        task["id"] = self._generate_id()
-        task["created_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.tasks.append(task)
-        self.save_tasks()
-        return task
-
-    def update_task(self, task_id, updated_data):
-        """Update an existing task"""
-        for task in self.tasks:
-            if task["id"] == task_id:
-                task.update(updated_data)
-                self.save_tasks()
-                return task
-        return None
-
-    def delete_task(self, task_id):
-        """Delete a task"""
-        self.tasks = [task for task in self.tasks if task["id"] != task_id]
-        self.save_tasks()
-
-    def get_tasks(self):
-        """Get all tasks"""
-        return self.tasks
-
-    def get_task(self, task_id):
-        """Get a specific task by ID"""
-        for task in self.tasks:
-            if task["id"] == task_id:
-                return task
-        return None
-
-    def _generate_id(self):
-        """Generate a unique ID for a task"""
-        existing_ids = {task["id"] for task in self.tasks}
-        new_id = 1
-        while new_id in existing_ids:
-            new_id += 1
-        return new_id
-
-def print_task(task):
-    """Format and print a task."""
-    status = "✓" if task["completed"] else "✗"
-    print(f"[{status}] {task['id']}. {task['title']}")
-    if task["description"]:
-        print(f"   Description: {task['description']}")
-    print(f"   Created: {task['created_at']}")
-    if task["completed"]:
-        print(f"   Completed: {task['completed_at']}")
-    print()
-
-def main():
-    todo_list = TodoList()
-    
-    while True:
-        print("\n===== Todo List Manager =====")
-        print("1. Add Task")
-        print("2. View All Tasks")
-        print("3. Mark Task as Completed")
-        print("4. Delete Task")
-        print("5. Exit")
-        
-        choice = input("\nEnter your choice (1-5): ")
-        
-        if choice == "1":
-            title = input("Enter task title: ")
-            description = input("Enter task description (optional): ")
-            task = todo_list.add_task({"title": title, "description": description, "completed": False})
-            print(f"\nTask added with ID: {task['id']}")
-            
-        elif choice == "2":
-            tasks = todo_list.get_tasks()
-            if not tasks:
-                print("\nNo tasks found.")
-            else:
-                print("\n--- Your Tasks ---")
-                for task in tasks:
-                    print_task(task)
-                    
-        elif choice == "3":
-            task_id = input("Enter task ID to mark as completed: ")
-            if task_id.isdigit():
-                task = todo_list.get_task(int(task_id))
-                if task:
-                    task["completed"] = True
-                    task["completed_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    todo_list.update_task(int(task_id), task)
-                    print(f"\nTask {task_id} marked as completed.")
-                else:
-                    print(f"\nTask with ID {task_id} not found.")
-            else:
-                print("\nInvalid task ID.")
-                
-        elif choice == "4":
-            task_id = input("Enter task ID to delete: ")
-            if task_id.isdigit():
-                if todo_list.delete_task(int(task_id)):
-                    print(f"\nTask {task_id} deleted.")
-                else:
-                    print(f"\nTask with ID {task_id} not found.")
-            else:
-                print("\nInvalid task ID.")
-                
-        elif choice == "5":
-            print("\nGoodbye!")
-            break
-            
-        else:
-            print("\nInvalid choice. Please try again.")
-
-if __name__ == "__main__":
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import heapq
+import itertools
+from bisect import bisect_right
+import argparse
+from datetime import datetime, timedelta
+
+from storage import JournalStorage
+from binary_snapshot import BinaryStorage, TaskTable
+from task_record import Task, parse_datetime
+from archive import ARCHIVE_AFTER_DAYS, TaskArchive
+from changes import Batch, ChangeSet
+from search_index import SearchIndex
+from sorted_views import SortedView, SORT_KEYS, id_view
+from task_query import QuerySyntaxError, load_smart_views
+from paging import PAGE_SIZE, entry_cursor, offset_cursor, filter_plan, page_entries, page_ranked
+from sqlite_store import SqliteTodoList
+from reminders import DueScheduler, describe
+import bulk_io
+
+# Tasks printed at a time by "View All Tasks"
+CLI_PAGE_SIZE = 10
+
+class TodoList:
+    """Tasks of one task file, kept in memory and persisted by a storage engine.
+
+    With auto_archive the tasks completed more than archive_after_days ago
+    are archived the first time each day the list is opened. Only the
+    interactive front ends ask for it, opening the list to read it never
+    writes to the files.
+    """
+
+    def __init__(self, filename="tasks.json", storage=None, archive_after_days=ARCHIVE_AFTER_DAYS,
+                 auto_archive=False):
+        self.filename = filename
+        self.storage = storage if storage is not None else JournalStorage(filename)
+        # Shared by tasks.json and tasks.bin, so converting between them keeps the archive
+        self.archive = TaskArchive(f"{os.path.splitext(filename)[0]}.archive")
+        self.archive_after_days = archive_after_days
+        self.auto_archive = auto_archive
+        self.tasks_by_id = {}
+        self.next_id = 1
+        self.search_index = None  # built on the first search, it needs every description
+        self.sorted_views = {}  # sort name, or None for id order -> SortedView, built on first use
+        self.columns = None
+        self.listeners = []
+        self.load_tasks()
+
+    @property
+    def tasks(self):
+        """All tasks in insertion order"""
+        return list(self.tasks_by_id.values())
+
+    @tasks.setter
+    def tasks(self, tasks):
+        self.tasks_by_id = {task["id"]: task for task in tasks}
+
+    def load_tasks(self):
+        """Load tasks from the storage engine"""
+        tasks = self.storage.load()
+        if isinstance(tasks, TaskTable):
+            # Records of a binary snapshot are only decoded when first used
+            self.tasks_by_id = tasks
+            highest_id = tasks.max_id()
+        else:
+            self.tasks = [Task(task) for task in tasks]
+            highest_id = max(self.tasks_by_id, default=0)
+        self.search_index = None
+        self.sorted_views = {}
+        if self.columns is not None:
+            self.columns.rebuild(self.tasks_by_id.values())
+        # Ids are never reused, even after the newest task is deleted
+        self.next_id = max(self.storage.meta.get("next_id", 1), highest_id + 1)
+        if self.auto_archive and self.archive_after_days is not None and \
+                self.archive.last_run() != datetime.now().date().isoformat():
+            self.archive_completed()
+
+    def archive_completed(self, days=None, now=None):
+        """Move tasks completed more than days ago into the archive, returns how many.
+
+        Runs on load once a day with auto_archive. The archived tasks are written and synced
+        before they are deleted from the task list, so a crash in between
+        leaves them in both places and the task list copy wins.
+        """
+        days = self.archive_after_days if days is None else days
+        now = now or datetime.now()
+        cutoff = parse_datetime((now - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S"))
+        with self.storage.lock:
+            self._sync()
+            if isinstance(self.tasks_by_id, TaskTable):
+                old = self.tasks_by_id.completed_before(cutoff)
+            else:
+                old = [task for task in self.tasks_by_id.values()
+                       if task.get("completed") and (task.completed_seconds or cutoff) < cutoff]
+            if old:
+                self.archive.append(old)
+                with self.batch() as batch:
+                    for task in old:
+                        batch.delete_task(task["id"])
+            self.archive.set_last_run(now.date().isoformat())
+        return len(old)
+
+    def save_tasks(self):
+        """Write all tasks to the storage engine"""
+        with self.storage.lock:
+            self._sync()
+            self.storage.save(self.tasks_by_id.values())
+
+    def flush(self):
+        """Make sure every change so far is on disk"""
+        self.storage.flush()
+
+    def close(self):
+        """Flush pending work in the storage engine"""
+        self.storage.close()
+
+    def refresh(self):
+        """Pick up what other processes changed in the task file, returned as a ChangeSet.
+
+        Cheap when nothing changed, so a GUI can call it whenever a file
+        watcher fires. The changes are merged in task by task and reach the
+        listeners like local ones. Every mutation does the same first,
+        while it holds the storage lock.
+        """
+        with self.storage.lock:
+            return self._sync()
+
+    def watched_paths(self):
+        """Files that change when another process writes to the task list"""
+        return self.storage.watched_paths()
+
+    def _sync(self):
+        """Apply what other processes wrote since the last look, with the storage lock held"""
+        tasks, records = self.storage.poll()
+        if tasks is not None:
+            ops = self._diff(tasks)
+        else:
+            ops = []
+            for record in records:
+                if record["op"] == "add":
+                    ops.append(("add", Task(record["task"])))
+                elif record["op"] == "update":
+                    ops.append(("update", record["id"], record["fields"]))
+                elif record["op"] == "delete":
+                    ops.append(("delete", record["id"]))
+        if not ops:
+            return ChangeSet()
+        self.next_id = max(self.next_id, self.storage.meta.get("next_id", 1))
+        self.archive.refresh()
+        changes, _ = self._apply_ops(ops, external=True)
+        if changes:
+            self._notify(changes)
+        return changes
+
+    def _diff(self, tasks):
+        """Operations turning the task list into tasks, reloaded after another process saved"""
+        if not isinstance(tasks, TaskTable):
+            tasks = {task["id"]: Task(task) for task in tasks}
+        ops = []
+        for task_id, task in tasks.items():
+            current = self.tasks_by_id.get(task_id)
+            if current is None:
+                ops.append(("add", task))
+                continue
+            fields = {key: value for key, value in task.items() if current.get(key) != value}
+            if fields:
+                ops.append(("update", task_id, fields))
+        ops.extend(("delete", task_id) for task_id in self.tasks_by_id if task_id not in tasks)
+        return ops
+
+    def add_listener(self, listener):
+        """Call listener(changes) with a ChangeSet after every mutation or batch.
+
+        A TaskObserver is such a listener and turns the ChangeSet into typed
+        added/updated/deleted/bulk events.
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def _notify(self, changes):
+        for listener in list(self.listeners):
+            listener(changes)
+
+    def batch(self):
+        """Collect many adds, updates and deletes and apply them together.
+
+        Used as ``with todo_list.batch() as batch:``, the changes are applied
+        when the block ends, persisted with one storage write and reported
+        to the listeners as one ChangeSet.
+        """
+        return Batch(self)
+
+    def _new_task(self, task, keep_created=False, task_id=None):
+        """Task record with a fresh id and creation time, not added yet"""
+        task = Task(task)
+        task["id"] = self._generate_id() if task_id is None else task_id
+        if not (keep_created and task.get("created_at")):
+            task["created_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return task
+
+    def add_task(self, task):
+        """Add a new task, stored as a compact Task record"""
+        with self.storage.lock:
+            self._sync()
+            task = self._new_task(task)
+            self._insert(task)
+            for view in self.sorted_views.values():
+                view.add(task)
+            self.storage.append({"op": "add", "task": task}, self.tasks_by_id.values())
+        changes = ChangeSet()
+        changes.add(task)
+        self._notify(changes)
+        return task
+
+    def add_tasks(self, tasks):
+        """Add a batch of new tasks with one block of ids and one storage write.
+
+        Tasks that already carry a created_at, such as imported ones, keep it.
+        """
+        tasks = list(tasks)
+        first = self._generate_id(len(tasks))
+        added = [self._new_task(task, keep_created=True, task_id=first + offset)
+                 for offset, task in enumerate(tasks)]
+        self._commit_batch([("add", task) for task in added])
+        return added
+
+    def update_task(self, task_id, updated_data):
+        """Update an existing task"""
+        with self.storage.lock:
+            self._sync()
+            task = self._apply_update(task_id, updated_data)
+            if task is None:
+                return None
+            for view in self.sorted_views.values():
+                view.update(task)
+            self.storage.append({"op": "update", "id": task_id, "fields": updated_data},
+                                self.tasks_by_id.values())
+        changes = ChangeSet()
+        changes.update(task_id, updated_data)
+        self._notify(changes)
+        return task
+
+    def delete_task(self, task_id):
+        """Delete a task"""
+        with self.storage.lock:
+            self._sync()
+            if not self._remove(task_id):
+                return False
+            for view in self.sorted_views.values():
+                view.remove(task_id)
+            self.storage.append({"op": "delete", "id": task_id}, self.tasks_by_id.values())
+        changes = ChangeSet()
+        changes.delete(task_id)
+        self._notify(changes)
+        return True
+
+    # In-memory part of each mutation, the sorted views are handled by the caller
+    def _insert(self, task):
+        self.tasks_by_id[task["id"]] = task
+        if self.search_index is not None:
+            self.search_index.add(task)
+        if self.columns is not None:
+            self.columns.add(task)
+
+    def _apply_update(self, task_id, updated_data):
+        task = self.tasks_by_id.get(task_id)
+        if task is None:
+            task = self._unarchive(task_id)
+            if task is None:
+                return None
+        task.update(updated_data)
+        if self.search_index is not None and ("title" in updated_data or
+                                              "description" in updated_data):
+            self.search_index.update(task)
+        if self.columns is not None:
+            self.columns.update(task)
+        return task
+
+    def _remove(self, task_id):
+        if self.tasks_by_id.pop(task_id, None) is None:
+            return self.archive.remove(task_id) is not None
+        if self.search_index is not None:
+            self.search_index.remove(task_id)
+        if self.columns is not None:
+            self.columns.remove(task_id)
+        return True
+
+    def _unarchive(self, task_id):
+        """Move an archived task back into the task list for a change to it"""
+        task = self.archive.remove(task_id)
+        if task is not None:
+            self._insert(task)
+            self.storage.append({"op": "add", "task": task}, self.tasks_by_id.values())
+        return task
+
+    def _commit_batch(self, ops):
+        """Apply the operations of a Batch, persist them once and notify once"""
+        with self.storage.lock:
+            self._sync()
+            changes, records = self._apply_ops(ops)
+            if records:
+                self.storage.append_many(records, self.tasks_by_id.values())
+        if changes:
+            self._notify(changes)
+        return changes
+
+    def _apply_ops(self, ops, external=False):
+        """In-memory part of a batch, returns the ChangeSet and the records to persist.
+
+        External operations were written by another process, which also
+        took care of the archive, so those for tasks that aren't in the
+        task list are skipped instead of being looked up in the archive.
+        """
+        changes = ChangeSet()
+        records = []
+        for op in ops:
+            if external and op[0] == "add" and op[1]["id"] in self.tasks_by_id:
+                op = ("update", op[1]["id"], dict(op[1]))
+            elif external and op[0] != "add" and op[1] not in self.tasks_by_id:
+                continue
+            if op[0] == "add":
+                task = op[1]
+                self._insert(task)
+                changes.add(task)
+                records.append({"op": "add", "task": task})
+            elif op[0] == "update":
+                _, task_id, fields = op
+                if self._apply_update(task_id, fields) is not None:
+                    changes.update(task_id, fields)
+                    records.append({"op": "update", "id": task_id, "fields": fields})
+            elif op[0] == "delete":
+                if self._remove(op[1]):
+                    changes.delete(op[1])
+                    records.append({"op": "delete", "id": op[1]})
+
+        changed = [self.tasks_by_id[task_id] for task_id in changes.updated]
+        changed.extend(changes.added.values())
+        for view in self.sorted_views.values():
+            view.patch(changes.deleted, changed)
+        return changes, records
+
+    def get_tasks(self, include_archived=False):
+        """Get all tasks, the archived ones only on request"""
+        if not include_archived:
+            return self.tasks
+        return self.tasks + [task for task_id, task in self.archive.open().items()
+                             if task_id not in self.tasks_by_id]
+
+    def iter_tasks(self, include_archived=False):
+        """Yield every task without building a list, the archived ones a segment at a time.
+
+        The ids are taken up front and each task is looked up as it's reached,
+        so the task list can change meanwhile: tasks deleted since are left out.
+        """
+        tasks_by_id = self.tasks_by_id
+        for task_id in list(tasks_by_id):
+            task = tasks_by_id.get(task_id)
+            if task is not None:
+                yield task
+        if include_archived:
+            yield from self.archive.iter_tasks(skip=self.tasks_by_id)
+
+    def get_task(self, task_id):
+        """Get a specific task by ID, archived ones once the archive has been opened"""
+        task = self.tasks_by_id.get(task_id)
+        return task if task is not None else self.archive.get(task_id)
+
+    def search(self, text, include_archived=False):
+        """Get ids of tasks whose title or description contains text, title hits first"""
+        if self.search_index is None:
+            # Under the lock, so no change made during the build is missing from the index
+            with self.storage.lock:
+                if self.search_index is None:
+                    index = SearchIndex()
+                    index.rebuild(self.tasks_by_id.values())
+                    self.search_index = index
+        ids = self.search_index.search(text, self.tasks_by_id.get)
+        if include_archived:
+            ids += [task_id for task_id in self.archive.search(text)
+                    if task_id not in self.tasks_by_id]
+        return ids
+
+    def _sorted_view(self, sort_by):
+        view = self.sorted_views.get(sort_by)
+        if view is not None:
+            return view
+        # Built by GUI query workers too, the lock keeps mutations out until it is published
+        with self.storage.lock:
+            view = self.sorted_views.get(sort_by)
+            if view is None:
+                if sort_by is None:
+                    # Ids don't need the task records, a binary snapshot stays undecoded
+                    view = id_view(self.tasks_by_id)
+                else:
+                    view = SortedView(SORT_KEYS[sort_by])
+                    view.rebuild(self.tasks_by_id.values())
+                self.sorted_views[sort_by] = view
+        return view
+
+    def get_sorted_ids(self, sort_by, start=0, stop=None, include_archived=False):
+        """Get task ids ordered by one of SORT_KEYS, optionally only rows start to stop"""
+        view = self._sorted_view(sort_by)
+        if not include_archived:
+            return view.ids(start, stop)
+        # Both views hold (key, id) entries, merging them keeps the sort order
+        archived = (entry for entry in self.archive.sorted_view(sort_by).entries
+                    if entry[1] not in self.tasks_by_id)
+        entries = heapq.merge(view.entries, archived)
+        return [task_id for _, task_id in itertools.islice(entries, start, stop)]
+
+    def get_page(self, filter="all", sort=None, after=None, limit=PAGE_SIZE, search=None,
+                 include_archived=False, query=None):
+        """Get one page of tasks and the cursor of the next page.
+
+        Tasks come in the order of one of SORT_KEYS, by id when sort is
+        None, or ranked like search() when search text is given. Only those
+        in one of paging.FILTERS and matching the task_query string query
+        are returned. Pass the returned cursor as after to get the next
+        page, it is None on the last one. Pages seek to the cursor in the
+        maintained sorted view, or in the sorted candidates when the query
+        can be answered from an index, so a page doesn't cost more with
+        more tasks.
+        """
+        if limit < 1:
+            raise ValueError(f"limit must be at least 1, not {limit}")
+        if sort is not None and sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort: {sort}")
+        plan = filter_plan(filter, query)
+        accept = plan.predicate()
+        if search:
+            return page_ranked(self.search(search, include_archived), self.get_task, accept,
+                               offset_cursor(after), limit)
+        position = entry_cursor(after, sort)
+        try:
+            entries = self._query_entries(plan, sort, include_archived)
+            if entries is not None:
+                entries = entries[0 if position is None else bisect_right(entries, position):]
+            else:
+                entries = self._sorted_view(sort).entries_after(position)
+                if include_archived:
+                    archived = (entry for entry
+                                in self.archive.sorted_view(sort).entries_after(position)
+                                if entry[1] not in self.tasks_by_id)
+                    entries = heapq.merge(entries, archived)
+            return page_entries(entries, self.get_task, accept, limit, sort)
+        except TypeError:
+            # The cursor holds a key that doesn't compare with the keys of this order
+            raise ValueError(f"Cursor doesn't belong to sort {sort!r}") from None
+
+    def _query_entries(self, plan, sort, include_archived):
+        """Sorted (key, id) entries of the candidates of a query, None if it needs every task"""
+        task_ids = plan.candidates(self.search, self._sorted_view)
+        view = self._sorted_view(sort)
+        # With most tasks as candidates, walking the sorted view fills a page sooner
+        if task_ids is None or len(task_ids) > len(view.entries) // 4:
+            return None
+        entries = [view.entry_by_id[task_id] for task_id in task_ids if task_id in view.entry_by_id]
+        if include_archived:
+            task_ids = plan.candidates(self.archive.search, self.archive.sorted_view)
+            if task_ids is None:
+                return None
+            view = self.archive.sorted_view(sort)
+            entries += [view.entry_by_id[task_id] for task_id in task_ids
+                        if task_id in view.entry_by_id and task_id not in self.tasks_by_id]
+        entries.sort()
+        return entries
+
+    def get_columns(self):
+        """Columnar NumPy mirror of the tasks, built on first use and then kept in sync"""
+        if self.columns is None:
+            # Imported here, NumPy takes longer to import than the rest of the startup
+            from task_columns import TaskColumns
+            self.columns = TaskColumns()
+            self.columns.rebuild(self.tasks_by_id.values())
+        return self.columns
+
+    def get_tasks_due_on(self, day):
+        """Get tasks due on the given YYYY-MM-DD date"""
+        return [task for task in self.tasks_by_id.values() if task.get("due_date") == day]
+
+    def get_tasks_due_after(self, day):
+        """Get tasks due after the given YYYY-MM-DD date"""
+        return [task for task in self.tasks_by_id.values()
+                if (task.get("due_date") or "") > day]
+
+    def get_due_dates(self):
+        """(id, due date) of every task not completed that has a due date"""
+        if isinstance(self.tasks_by_id, TaskTable):
+            return self.tasks_by_id.open_due_dates()
+        return [(task_id, task["due_date"]) for task_id, task in self.tasks_by_id.items()
+                if task.get("due_date") and not task.get("completed", False)]
+
+    def get_completed_tasks(self, include_archived=False):
+        """Get all completed tasks, the archived ones only on request"""
+        tasks = [task for task in self.tasks_by_id.values() if task.get("completed", False)]
+        if include_archived:
+            tasks += [task for task_id, task in self.archive.open().items()
+                      if task_id not in self.tasks_by_id]
+        return tasks
+
+    def _generate_id(self, count=1):
+        """Generate a unique ID for a task, or the first of count consecutive ones"""
+        new_id = self.storage.allocate_ids(count, self.next_id)
+        self.next_id = new_id + count
+        self.storage.meta["next_id"] = self.next_id
+        return new_id
+
+def print_task(task):
+    """Format and print a task."""
+    status = "✓" if task["completed"] else "✗"
+    print(f"[{status}] {task['id']}. {task['title']}")
+    if task["description"]:
+        print(f"   Description: {task['description']}")
+    print(f"   Created: {task['created_at']}")
+    if task["completed"]:
+        print(f"   Completed: {task['completed_at']}")
+    print()
+
+def print_reminder(reminder):
+    """Print one line for a task that came due or is overdue"""
+    state = "Due today" if reminder.kind == "due" else "Overdue"
+    task = reminder.task
+    print(f"{state}: {task['id']}. {task['title']} (due {task['due_date']})", flush=True)
+
+def open_todo_list(filename, auto_archive=False):
+    """TodoList for a tasks.json or binary .bin file, SqliteTodoList for a .db file"""
+    if filename.endswith(".db"):
+        return SqliteTodoList(filename)
+    if filename.endswith(".bin"):
+        return TodoList(filename, BinaryStorage(filename), auto_archive=auto_archive)
+    return TodoList(filename, auto_archive=auto_archive)
+
+def import_command(args):
+    """Stream tasks from a JSON, NDJSON or CSV file into the task list"""
+    fmt = args.format or bulk_io.detect_format(args.file)
+    todo_list = open_todo_list(args.tasks)
+    start = time.perf_counter()
+    try:
+        with bulk_io.open_input(args.file) as f:
+            records = bulk_io.read_records(f, fmt, bulk_io.open_blobs(args.file))
+            imported, rejected = bulk_io.import_tasks(
+                todo_list, records, args.batch_size,
+                lambda number, error: print(f"Skipped record {number}: {error}", file=sys.stderr))
+        todo_list.flush()
+    finally:
+        todo_list.close()
+    elapsed = time.perf_counter() - start
+    print(f"Imported {imported} tasks, skipped {rejected}, in {elapsed:.2f}s "
+          f"({imported / max(elapsed, 1e-9):,.0f} tasks/sec)", file=sys.stderr)
+    return 1 if rejected and not imported else 0
+
+def export_command(args):
+    """Stream every task to a JSON, NDJSON or CSV file"""
+    fmt = args.format or bulk_io.detect_format(args.file)
+    todo_list = open_todo_list(args.tasks)
+    start = time.perf_counter()
+    try:
+        with bulk_io.open_output(args.file) as f:
+            count = bulk_io.write_tasks(f, todo_list.iter_tasks(include_archived=True), fmt)
+    finally:
+        todo_list.close()
+    elapsed = time.perf_counter() - start
+    print(f"Exported {count} tasks in {elapsed:.2f}s "
+          f"({count / max(elapsed, 1e-9):,.0f} tasks/sec)", file=sys.stderr)
+    return 0
+
+def archive_command(args):
+    """Move old completed tasks into the archive now"""
+    todo_list = open_todo_list(args.tasks)
+    if not isinstance(todo_list, TodoList):
+        print("The SQLite store keeps every task, there is nothing to archive", file=sys.stderr)
+        return 1
+    try:
+        count = todo_list.archive_completed(args.days)
+        todo_list.flush()
+    finally:
+        todo_list.close()
+    print(f"Archived {count} tasks completed more than {args.days} days ago", file=sys.stderr)
+    return 0
+
+def list_command(args):
+    """Print the tasks matching a query, read from the storage a page at a time"""
+    query = args.query
+    if args.view is not None:
+        views = load_smart_views()
+        if args.view not in views:
+            print(f"No smart view named {args.view!r} in settings.json", file=sys.stderr)
+            return 1
+        query = " ".join(part for part in (views[args.view], query) if part)
+    todo_list = open_todo_list(args.tasks)
+    count = 0
+    try:
+        page = todo_list.get_page(sort=args.sort, query=query, include_archived=args.archived)
+        while True:
+            for task in page.tasks:
+                print_task(task)
+            count += len(page.tasks)
+            if page.cursor is None:
+                break
+            page = todo_list.get_page(sort=args.sort, query=query, after=page.cursor,
+                                      include_archived=args.archived)
+    except QuerySyntaxError as e:
+        print(f"Invalid query: {e}", file=sys.stderr)
+        return 2
+    finally:
+        todo_list.close()
+    print(f"{count} tasks", file=sys.stderr)
+    return 0
+
+def remind_command(args):
+    """Print the tasks due today or overdue, and with --watch the ones coming due later"""
+    todo_list = open_todo_list(args.tasks)
+    scheduler = DueScheduler(todo_list)
+    scheduler.add_listener(lambda reminders: [print_reminder(reminder) for reminder in reminders])
+    try:
+        if args.watch:
+            scheduler.run()
+        elif not scheduler.fire_due():
+            print("Nothing is due", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.close()
+        todo_list.close()
+    return 0
+
+def run_command(argv):
+    """Run a non-interactive subcommand such as 'import' or 'export'"""
+    parser = argparse.ArgumentParser(prog="todo.py", description="Todo List Manager")
+    parser.add_argument("--tasks", default="tasks.json",
+                        help="task file to use, a .db file selects the SQLite store "
+                             "and a .bin file the binary snapshot")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, func, help_text in (
+            ("import", import_command, "add tasks from FILE ('-' for stdin)"),
+            ("export", export_command, "write all tasks to FILE ('-' for stdout)")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("file", metavar="FILE")
+        command.add_argument("--format", choices=bulk_io.FORMATS,
+                             help="file format, guessed from the extension by default")
+        command.set_defaults(func=func)
+    commands.choices["import"].add_argument("--batch-size", type=int, default=1000,
+                                            help="tasks per id block and storage write")
+    command = commands.add_parser("archive", help="move old completed tasks into the archive")
+    command.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS,
+                         help="archive tasks completed more than DAYS days ago")
+    command.set_defaults(func=archive_command)
+    command = commands.add_parser("list", help="print the tasks matching a query")
+    command.add_argument("query", metavar="QUERY", nargs="?", default="",
+                         help="e.g. 'priority:High due<+7d category:Work -completed \"text\"'")
+    command.add_argument("--view", help="start from a smart view saved in settings.json")
+    command.add_argument("--sort", choices=list(SORT_KEYS), help="sort order, by id by default")
+    command.add_argument("--archived", action="store_true", help="include archived tasks")
+    command.set_defaults(func=list_command)
+    command = commands.add_parser("remind", help="print tasks that are due today or overdue")
+    command.add_argument("--watch", action="store_true",
+                         help="keep running and print tasks as they come due")
+    command.set_defaults(func=remind_command)
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+def main():
+    if len(sys.argv) > 1:
+        sys.exit(run_command(sys.argv[1:]))
+    todo_list = TodoList(auto_archive=True)
+    scheduler = DueScheduler(todo_list)
+    scheduler.add_listener(lambda reminders: print(f"\nReminder: {describe(reminders)}"))
+    
+    while True:
+        # The GUI or a script may have changed tasks while this waited for input
+        todo_list.refresh()
+        scheduler.fire_due()
+        print("\n===== Todo List Manager =====")
+        print("1. Add Task")
+        print("2. View All Tasks")
+        print("3. Mark Task as Completed")
+        print("4. Delete Task")
+        print("5. Exit")
+        
+        choice = input("\nEnter your choice (1-5): ")
+        
+        if choice == "1":
+            title = input("Enter task title: ")
+            description = input("Enter task description (optional): ")
+            task = todo_list.add_task({"title": title, "description": description, "completed": False})
+            print(f"\nTask added with ID: {task['id']}")
+            
+        elif choice == "2":
+            page = todo_list.get_page(limit=CLI_PAGE_SIZE)
+            if not page.tasks:
+                print("\nNo tasks found.")
+            else:
+                print("\n--- Your Tasks ---")
+                while True:
+                    for task in page.tasks:
+                        print_task(task)
+                    if page.cursor is None:
+                        break
+                    if input("Press Enter for more tasks, or q to stop: ").strip().lower() == "q":
+                        break
+                    page = todo_list.get_page(after=page.cursor, limit=CLI_PAGE_SIZE)
+                    
+        elif choice == "3":
+            task_id = input("Enter task ID to mark as completed: ")
+            if task_id.isdigit():
+                task = todo_list.get_task(int(task_id))
+                if task:
+                    task["completed"] = True
+                    task["completed_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    todo_list.update_task(int(task_id), task)
+                    print(f"\nTask {task_id} marked as completed.")
+                else:
+                    print(f"\nTask with ID {task_id} not found.")
+            else:
+                print("\nInvalid task ID.")
+                
+        elif choice == "4":
+            task_id = input("Enter task ID to delete: ")
+            if task_id.isdigit():
+                if todo_list.delete_task(int(task_id)):
+                    print(f"\nTask {task_id} deleted.")
+                else:
+                    print(f"\nTask with ID {task_id} not found.")
+            else:
+                print("\nInvalid task ID.")
+                
+        elif choice == "5":
+            print("\nGoodbye!")
+            break
+            
+        else:
+            print("\nInvalid choice. Please try again.")
+
+if __name__ == "__main__":
     main() 
\ No newline at end of file
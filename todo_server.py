@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+
+import sys
+import json
+import signal
+import asyncio
+import argparse
+import itertools
+from collections import namedtuple
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qsl
+
+from todo import open_todo_list
+from storage import encode_task
+from paging import PAGE_SIZE
+from bulk_io import FORMATS, InvalidTaskError, export_chunks, validate_task
+
+DEFAULT_PORT = 8765
+# Largest request body accepted, enough for a batch of a few thousand tasks
+MAX_BODY = 16 * 1024 * 1024
+# Seconds a kept-alive connection may sit idle before it is closed
+IDLE_TIMEOUT = 60
+# Queued write requests applied together as one batch at most
+MAX_WRITE_GROUP = 500
+# Seconds between looks for changes other processes made to the task files
+REFRESH_INTERVAL = 1.0
+# Tasks per chunk of a streamed export
+EXPORT_CHUNK = 1000
+# Tasks whose JSON encoding is kept for the next read, the oldest are dropped first
+ENCODED_TASKS = 20000
+
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 411: "Length Required", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+CONTENT_TYPES = {"json": "application/json", "ndjson": "application/x-ndjson",
+                 "csv": "text/csv; charset=utf-8"}
+
+
+class HttpError(Exception):
+    """Raised by a request handler to answer with an error status"""
+
+    def __init__(self, status, message, headers=()):
+        super().__init__(message)
+        self.status = status
+        self.headers = list(headers)
+
+
+Request = namedtuple("Request", "method path params body keep_alive")
+
+
+async def read_request(reader):
+    """Next request on a connection, None once the client has closed it"""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, version = line.decode('latin-1').split()
+    except ValueError:
+        raise HttpError(400, "Malformed request line") from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "transfer-encoding" in headers:
+        raise HttpError(411, "Send the body with a Content-Length")
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(400, "Invalid Content-Length") from None
+    if length > MAX_BODY:
+        raise HttpError(413, f"Request bodies are limited to {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length > 0 else b""
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    url = urlsplit(target)
+    return Request(method.upper(), url.path, dict(parse_qsl(url.query)), body, keep_alive)
+
+
+def response_head(status, headers, keep_alive):
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}"]
+    lines.extend(f"{name}: {value}" for name, value in headers)
+    lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+
+
+def json_body(payload):
+    return json.dumps(payload, default=encode_task, ensure_ascii=False).encode('utf-8')
+
+
+def parse_json(body):
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        raise HttpError(400, f"Invalid JSON: {e}") from None
+
+
+def parse_task_id(text):
+    if not text.isdigit():
+        raise HttpError(404, f"No task {text!r}")
+    return int(text)
+
+
+def clean_task(record):
+    """Validated new task from a request body"""
+    try:
+        return validate_task(record)
+    except InvalidTaskError as e:
+        raise HttpError(400, str(e)) from None
+
+
+def clean_fields(fields):
+    """Validated changes to a task, completing one also stamps its completed_at"""
+    if not isinstance(fields, dict) or not fields:
+        raise HttpError(400, "Expected an object with the fields to change")
+    if "id" in fields:
+        raise HttpError(400, "A task's id can't be changed")
+    try:
+        # validate_task wants a whole task, a placeholder title stands in for the rest
+        checked = validate_task(dict({"title": "-"}, **fields))
+    except InvalidTaskError as e:
+        raise HttpError(400, str(e)) from None
+    fields = {key: checked[key] for key in fields}
+    if "completed" in fields and "completed_at" not in fields:
+        fields["completed_at"] = (datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                                  if fields["completed"] else None)
+    return fields
+
+
+def clean_ops(payload):
+    """Operations of a /batch request in the journal's record shape"""
+    if not isinstance(payload, list):
+        raise HttpError(400, "Expected a list of operations")
+    ops = []
+    for record in payload:
+        op = record.get("op") if isinstance(record, dict) else None
+        if op == "add":
+            ops.append(("add", clean_task(record.get("task"))))
+        elif op in ("update", "delete"):
+            task_id = record.get("id")
+            if type(task_id) is not int:
+                raise HttpError(400, f"{op} needs an integer id")
+            if op == "update":
+                ops.append(("update", task_id, clean_fields(record.get("fields"))))
+            else:
+                ops.append(("delete", task_id))
+        else:
+            raise HttpError(400, f"Unknown operation: {op!r}")
+    return ops
+
+
+class TaskServer:
+    """HTTP/JSON API over a TodoList (or SqliteTodoList) on one asyncio event loop.
+
+    Reads are answered straight from the in-memory task list between two
+    writes, so every response sees a consistent state without locking.
+    Writes are queued to a single writer that applies everything waiting
+    in the queue as one batch, one storage write for many requests, and
+    answers each request once its batch is saved. Connections are kept
+    alive until the client closes them or they sit idle. Task records
+    are encoded once and the encoding reused until a change to the task
+    is reported to the listener.
+    """
+
+    def __init__(self, todo_list, refresh_interval=REFRESH_INTERVAL):
+        self.todo_list = todo_list
+        self.refresh_interval = refresh_interval
+        self._encoded = {}  # task id -> JSON of the task
+        todo_list.add_listener(self._forget_encoded)
+        self.server = None
+        self._writes = None
+        self._tasks = []
+        self._connections = set()
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self._writes = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._write_loop()),
+                       asyncio.create_task(self._refresh_loop())]
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        self.server.close()
+        # Idle kept-alive connections would otherwise hold wait_closed() up
+        for writer in self._connections:
+            writer.close()
+        await self.server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.todo_list.remove_listener(self._forget_encoded)
+
+    def _task_json(self, task):
+        data = self._encoded.get(task["id"])
+        if data is None:
+            data = self._encoded[task["id"]] = json_body(task)
+            if len(self._encoded) > ENCODED_TASKS:
+                del self._encoded[next(iter(self._encoded))]
+        return data
+
+    def _forget_encoded(self, changes):
+        for task_id in itertools.chain(changes.updated, changes.deleted):
+            self._encoded.pop(task_id, None)
+
+    # Writes
+
+    async def write(self, ops):
+        """Queue ("add", task), ("update", id, fields) and ("delete", id) operations.
+
+        Returns the added task records and the ids updated, deleted and
+        not found once they are saved.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._writes.put((ops, future))
+        return await future
+
+    async def _write_loop(self):
+        while True:
+            pending = [await self._writes.get()]
+            while len(pending) < MAX_WRITE_GROUP and not self._writes.empty():
+                pending.append(self._writes.get_nowait())
+            try:
+                results = self._apply_writes([ops for ops, _ in pending])
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(pending, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def _refresh_loop(self):
+        # Writes pick up other processes' changes themselves, this keeps reads
+        # current while nothing is written. Like a write it runs between requests.
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                self.todo_list.refresh()
+            except Exception as e:
+                print(f"Error refreshing {self.todo_list.filename}: {e!r}", file=sys.stderr)
+
+    def _apply_writes(self, requests):
+        """Apply the operations of many requests as one batch, returns a result per request"""
+        results = []
+        created = set()
+        gone = set()
+        with self.todo_list.batch() as batch:
+            for ops in requests:
+                result = {"added": [], "updated": [], "deleted": [], "missing": []}
+                for op in ops:
+                    if op[0] == "add":
+                        task = batch.add_task(op[1])
+                        # SqliteTodoList numbers its new tasks when the batch commits,
+                        # the ids in result["added"] are filled in by then
+                        if "id" in task:
+                            created.add(task["id"])
+                        result["added"].append(task)
+                        continue
+                    task_id = op[1]
+                    if task_id in gone or (task_id not in created and
+                                           self.todo_list.get_task(task_id) is None):
+                        result["missing"].append(task_id)
+                    elif op[0] == "update":
+                        batch.update_task(task_id, op[2])
+                        result["updated"].append(task_id)
+                    else:
+                        batch.delete_task(task_id)
+                        gone.add(task_id)
+                        result["deleted"].append(task_id)
+                results.append(result)
+        return results
+
+    # Connections
+
+    async def _handle_connection(self, reader, writer):
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), IDLE_TIMEOUT)
+                except HttpError as e:
+                    writer.write(self._error(e, False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                await self._respond(request, writer)
+                if not request.keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    def _error(self, error, keep_alive):
+        body = json_body({"error": str(error)})
+        headers = [("Content-Type", CONTENT_TYPES["json"]), ("Content-Length", len(body))]
+        return response_head(error.status, headers + error.headers, keep_alive) + body
+
+    async def _respond(self, request, writer):
+        try:
+            if request.path == "/export":
+                if request.method != "GET":
+                    raise HttpError(405, "Use GET", [("Allow", "GET")])
+                await self._export(request, writer)
+                return
+            status, payload = await self._dispatch(request)
+        except HttpError as e:
+            writer.write(self._error(e, request.keep_alive))
+        except ConnectionError:
+            raise
+        except Exception as e:
+            print(f"Error handling {request.method} {request.path}: {e!r}", file=sys.stderr)
+            writer.write(self._error(HttpError(500, "Internal error"), request.keep_alive))
+        else:
+            if payload is None or isinstance(payload, bytes):
+                body = payload or b""
+            else:
+                body = json_body(payload)
+            headers = [("Content-Length", len(body))]
+            if payload is not None:
+                headers.insert(0, ("Content-Type", CONTENT_TYPES["json"]))
+            writer.write(response_head(status, headers, request.keep_alive) + body)
+        await writer.drain()
+
+    async def _dispatch(self, request):
+        """(status, payload) answering a request.
+
+        payload is None for an empty body, bytes when it is encoded already.
+        """
+        parts = request.path.strip("/").split("/")
+        method = request.method
+        if parts == ["tasks"]:
+            if method == "GET":
+                return 200, self._list_tasks(request.params)
+            if method == "POST":
+                result = await self.write([("add", clean_task(parse_json(request.body)))])
+                return 201, result["added"][0]
+            raise HttpError(405, "Use GET or POST", [("Allow", "GET, POST")])
+        if len(parts) == 2 and parts[0] == "tasks":
+            task_id = parse_task_id(parts[1])
+            if method == "GET":
+                task = self.todo_list.get_task(task_id)
+            elif method == "PATCH":
+                fields = clean_fields(parse_json(request.body))
+                result = await self.write([("update", task_id, fields)])
+                task = self.todo_list.get_task(task_id) if result["updated"] else None
+            elif method == "DELETE":
+                result = await self.write([("delete", task_id)])
+                if result["deleted"]:
+                    return 204, None
+                task = None
+            else:
+                raise HttpError(405, "Use GET, PATCH or DELETE",
+                                [("Allow", "GET, PATCH, DELETE")])
+            if task is None:
+                raise HttpError(404, f"No task {task_id}")
+            return 200, self._task_json(task)
+        if parts == ["batch"]:
+            if method != "POST":
+                raise HttpError(405, "Use POST", [("Allow", "POST")])
+            return 200, await self.write(clean_ops(parse_json(request.body)))
+        raise HttpError(404, f"Nothing at {request.path}")
+
+    def _list_tasks(self, params):
+        """One page of tasks for GET /tasks"""
+        try:
+            limit = int(params.get("limit", PAGE_SIZE))
+        except ValueError:
+            raise HttpError(400, "limit must be an integer") from None
+        try:
+            page = self.todo_list.get_page(
+                filter=params.get("filter", "all"), sort=params.get("sort"),
+                after=params.get("after"), limit=limit, search=params.get("search"),
+                include_archived=params.get("archived", "") in ("1", "true", "yes"),
+                query=params.get("query"))
+        except ValueError as e:
+            # Unknown filter or sort, invalid cursor or query syntax
+            raise HttpError(400, str(e)) from None
+        return b'{"tasks": [%s], "cursor": %s}' % (
+            b", ".join(self._task_json(task) for task in page.tasks), json_body(page.cursor))
+
+    async def _export(self, request, writer):
+        """Stream every task in one of bulk_io.FORMATS with chunked transfer encoding"""
+        fmt = request.params.get("format", "ndjson")
+        if fmt not in FORMATS:
+            raise HttpError(400, f"format must be one of {', '.join(FORMATS)}")
+        # Read as it streams, a task deleted meanwhile is left out and an edited one sent as is
+        tasks = self.todo_list.iter_tasks(include_archived=True)
+        headers = [("Content-Type", CONTENT_TYPES[fmt]), ("Transfer-Encoding", "chunked")]
+        writer.write(response_head(200, headers, request.keep_alive))
+        for text, _ in export_chunks(tasks, fmt, EXPORT_CHUNK):
+            data = text.encode('utf-8')
+            if data:
+                writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+                await writer.drain()
+        writer.write(b"0\r\n\r\n")
+
+
+async def serve(todo_list, host="127.0.0.1", port=DEFAULT_PORT):
+    """Run a TaskServer until SIGINT or SIGTERM"""
+    server = TaskServer(todo_list)
+    host, port = await server.start(host, port)
+    print(f"Serving {todo_list.filename} on http://{host}:{port}", file=sys.stderr, flush=True)
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stopped.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows has no signal handlers on the loop, Ctrl+C raises KeyboardInterrupt
+            pass
+    try:
+        await stopped.wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/JSON API for a task list")
+    parser.add_argument("--tasks", default="tasks.json",
+                        help="task file to serve, a .db file selects the SQLite store "
+                             "and a .bin file the binary snapshot")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help="port to listen on, 0 picks a free one")
+    args = parser.parse_args()
+    todo_list = open_todo_list(args.tasks)
+    try:
+        asyncio.run(serve(todo_list, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        todo_list.close()
+
+
+if __name__ == "__main__":
+    main()